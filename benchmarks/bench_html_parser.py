@@ -0,0 +1,78 @@
+"""
+HTML解析微基准：对比整页html.parser解析与各后端只解析结果容器
+
+用法：python benchmarks/bench_html_parser.py [重复次数]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from src import html_parser  # noqa: E402
+from plugins.tgsearch import TGSearchPlugin  # noqa: E402
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def legacy_tg(html):
+    """原TGSearchPlugin的整页解析方式，只取消息ID与正文"""
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for msg in soup.find_all("div", class_="tgme_widget_message_wrap"):
+        date_tag = msg.find("a", class_="tgme_widget_message_date")
+        text = msg.find("div", class_="tgme_widget_message_text")
+        rows.append((date_tag["href"].split("/")[-1], text.get_text(separator="\n") if text else ""))
+    return rows
+
+
+def backend_tg(html, plugin=TGSearchPlugin()):
+    return [(r.message_id, r.content) for r in plugin._parse_messages("bench", html)]
+
+
+def legacy_duoduo(html):
+    """原DuoduoPlugin的整页解析方式"""
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for item in soup.select(".module-search-item"):
+        title_tag = item.select_one(".video-info-header h3 a")
+        if title_tag:
+            rows.append((title_tag.get_text(strip=True), title_tag.get("href")))
+    return rows
+
+
+def backend_duoduo(html):
+    rows = []
+    for item in html_parser.select_containers(html, "module-search-item"):
+        title_tag = item.select_one(".video-info-header h3 a")
+        if title_tag:
+            rows.append((title_tag.text(strip=True), title_tag.attr("href")))
+    return rows
+
+
+def bench(name, html, legacy, current, number):
+    baseline = legacy(html)
+    legacy_time = timeit.timeit(lambda: legacy(html), number=number) / number
+    print(f"\n{name}: {len(html) // 1024} KB, {len(baseline)} 个结果")
+    print(f"  {'html.parser 整页':<24}{legacy_time * 1000:8.2f} ms")
+    for backend in html_parser.available_backends():
+        html_parser.set_backend(backend)
+        rows = current(html)
+        assert rows == baseline, f"{backend} 解析结果与整页解析不一致"
+        elapsed = timeit.timeit(lambda: current(html), number=number) / number
+        print(f"  {backend + ' 仅容器':<24}{elapsed * 1000:8.2f} ms  ({legacy_time / elapsed:.1f}x)")
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"可用后端: {', '.join(html_parser.available_backends())}")
+    bench("tgsearch", (FIXTURES / "tg_channel.html").read_text(encoding="utf-8"), legacy_tg, backend_tg, number)
+    bench("duoduo", (FIXTURES / "duoduo_search.html").read_text(encoding="utf-8"),
+          legacy_duoduo, backend_duoduo, number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+JSON解码微基准：对比标准库完整解码、快速库完整解码与按Schema只解码所需字段
+
+用法：python benchmarks/bench_json_decoder.py [重复次数]
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import json_decoder  # noqa: E402
+
+
+def hunhepan_page(size=30):
+    """模拟一页hunhepan响应，files字段为分享内的完整文件列表"""
+    files = "\n".join(f"第{n:02d}集 4K.HDR.国语中字.mkv" for n in range(1, 120))
+    items = [{
+        "disk_id": f"d{i:06d}",
+        "disk_name": f"<em>繁花</em> 第{i}季 4K",
+        "disk_pass": "ab12" if i % 3 else "",
+        "disk_type": "QUARK",
+        "link": f"https://pan.quark.cn/s/{i:012x}",
+        "shared_time": "2024-01-15 20:30:00",
+        "files": files,
+        "share_user": "user",
+        "share_user_id": i,
+        "tags": ["剧集", "国产", "4K"],
+        "doc_id": f"doc{i}",
+        "weight": i * 0.1,
+        "enabled": True,
+    } for i in range(size)]
+    return json.dumps({"code": 200, "msg": "ok", "data": {"total": size, "list": items}},
+                      ensure_ascii=False).encode()
+
+
+def maccms_page(size=20):
+    """模拟一页MacCMS详情接口响应"""
+    items = [{
+        "vod_id": i,
+        "vod_name": f"繁花 第{i}集",
+        "vod_year": "2023",
+        "vod_area": "大陆",
+        "vod_actor": "胡歌,马伊琍,唐嫣",
+        "vod_director": "王家卫",
+        "vod_remarks": "全30集",
+        "vod_down_from": "KKWP$$$BDWP",
+        "vod_down_url": f"https://pan.quark.cn/s/{i:012x}$$$https://pan.baidu.com/s/1{i:010x}?pwd=ab12",
+        "vod_content": "<p>" + "上世纪九十年代，阿宝在时代的浪潮中起起落落。" * 40 + "</p>",
+        "vod_pic": f"https://img.example.com/{i}.jpg",
+        "vod_play_from": "m3u8",
+        "vod_play_url": "#".join(f"第{n}集$https://v.example.com/{i}/{n}.m3u8" for n in range(1, 31)),
+        "type_name": "国产剧",
+        "vod_score": "8.9",
+    } for i in range(size)]
+    return json.dumps({"code": 1, "msg": "数据列表", "page": 1, "total": size, "list": items},
+                      ensure_ascii=False).encode()
+
+
+def bench(name, body, schema, number):
+    legacy = json.loads(body)
+    print(f"\n{name}: {len(body) // 1024} KB")
+    cases = [
+        ("json 完整解码", lambda: json.loads(body)),
+        (f"{json_decoder.get_backend()} 完整解码", lambda: json_decoder.loads(body)),
+        (f"{json_decoder.get_schema_backend()} {schema.name} Schema", lambda: schema.decode(body)),
+    ]
+    legacy_time = None
+    for label, func in cases:
+        result = func()
+        assert result.get("code") == legacy["code"]
+        elapsed = timeit.timeit(func, number=number) / number
+        legacy_time = legacy_time or elapsed
+        print(f"  {label:<28}{elapsed * 1e6:9.1f} µs  ({legacy_time / elapsed:.1f}x)")
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bench("hunhepan", hunhepan_page(), json_decoder.HUNHEPAN_SEARCH, number)
+    bench("maccms", maccms_page(), json_decoder.MACCMS_VOD, number)
+    if json_decoder.msgspec is None:
+        print("\n未安装msgspec，Schema解码退回完整解码")
+
+
+if __name__ == "__main__":
+    main()
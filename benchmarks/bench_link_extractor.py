@@ -0,0 +1,65 @@
+"""
+链接提取微基准：对比逐网盘多次正则扫描与单次交替式扫描
+
+单次扫描还识别更多网盘与文本中的提取码，耗时与逐网盘扫描相当，并不更快；取多轮中最快的一轮比较。
+
+用法：python benchmarks/bench_link_extractor.py [重复次数]
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.link_extractor import extract_links  # noqa: E402
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "tg_messages.txt"
+
+# 原TGSearchPlugin._extract_links使用的逐网盘正则
+LEGACY_PATTERNS = {
+    "baidu": r"https?://pan\.baidu\.com/s/[a-zA-Z0-9]+",
+    "aliyun": r"https?://www\.aliyundrive\.com/s/[a-zA-Z0-9]+",
+    "quark": r"https?://pan\.quark\.cn/s/[a-zA-Z0-9]+",
+    "tianyi": r"https?://cloud\.189\.cn/t/[a-zA-Z0-9]+",
+    "115": r"https?://115\.com/s/[a-zA-Z0-9]+",
+    "xunlei": r"https?://pan\.xunlei\.com/s/[a-zA-Z0-9]+",
+    "123": r"https?://www\.123pan\.com/s/[a-zA-Z0-9]+",
+    "uc": r"https?://drive\.uc\.cn/s/[a-zA-Z0-9]+",
+}
+
+
+def legacy_extract(text):
+    links = []
+    for typ, pat in LEGACY_PATTERNS.items():
+        for m in re.findall(pat, text):
+            links.append((typ, m, ""))
+    return links
+
+
+def load_corpus():
+    return [m.strip() for m in FIXTURE.read_text(encoding="utf-8").split("\n---\n") if m.strip()]
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = load_corpus()
+
+    legacy_links = sum(len(legacy_extract(m)) for m in messages)
+    new_results = [extract_links(m) for m in messages]
+    new_links = sum(len(links) for links in new_results)
+    with_password = sum(1 for links in new_results for link in links if link.password)
+
+    legacy_time = min(timeit.repeat(lambda: [legacy_extract(m) for m in messages], number=number, repeat=5))
+    new_time = min(timeit.repeat(lambda: [extract_links(m) for m in messages], number=number, repeat=5))
+    per_message = 1e6 / (number * len(messages))
+
+    print(f"语料: {len(messages)} 条消息，重复 {number} 次")
+    print(f"逐网盘正则:   {legacy_time * per_message:7.2f} µs/条  链接 {legacy_links}  提取码 0")
+    print(f"单次交替扫描: {new_time * per_message:7.2f} µs/条  链接 {new_links}  提取码 {with_password}")
+    print(f"耗时比（逐网盘/单次）: {legacy_time / new_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
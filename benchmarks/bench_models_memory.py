@@ -0,0 +1,125 @@
+"""
+结果模型内存基准：对比普通dataclass逐条复制字段与slots模型引用所属结果
+
+用法：python benchmarks/bench_models_memory.py [结果数]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models import Link, MergedLink, SearchResult  # noqa: E402
+
+
+# 原src/models.py中的模型
+@dataclass
+class LegacyLink:
+    type: str
+    url: str
+    password: str = ""
+
+
+@dataclass
+class LegacySearchResult:
+    message_id: str = ""
+    unique_id: str = ""
+    channel: str = ""
+    datetime: Optional[datetime] = None
+    title: str = ""
+    content: str = ""
+    links: List[LegacyLink] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class LegacyMergedLink:
+    url: str
+    password: str = ""
+    note: str = ""
+    datetime: Optional[datetime] = None
+    source: str = ""
+
+
+CHANNELS = ["tgsearch", "hunhepan", "jikepan", "wanou", "ouge", "huban", "duoduo", "local"]
+TYPES = ["quark", "baidu", "aliyun", "uc", "xunlei", "tianyi", "115", "123"]
+
+
+def raw_rows(count):
+    """模拟插件从JSON响应中解析出的字段，字符串均为新建对象而非常量"""
+    rows = [{
+        "unique_id": f"r-{i}",
+        "channel": CHANNELS[i % len(CHANNELS)],
+        "title": f"繁花 第{i % 40}集 4K 国语中字",
+        "content": "",
+        "links": [[TYPES[(i + j) % len(TYPES)], f"https://pan.example.com/s/{i:08x}{j}", "ab12" if j else ""]
+                  for j in range(2)],
+    } for i in range(count)]
+    return json.loads(json.dumps(rows))
+
+
+def build(rows, result_cls, link_cls):
+    dt = datetime(2024, 1, 15, 20, 30)
+    return [
+        result_cls(unique_id=r["unique_id"], channel=r["channel"], datetime=dt, title=r["title"],
+                   content=r["content"], links=[link_cls(type=t, url=u, password=p) for t, u, p in r["links"]])
+        for r in rows
+    ]
+
+
+def group_legacy(results):
+    grouped = {}
+    for result in results:
+        source = result.channel if result.channel else "聚合搜索"
+        for link in result.links:
+            grouped.setdefault(link.type, []).append(LegacyMergedLink(
+                url=link.url, password=link.password, note=result.title, datetime=result.datetime, source=source
+            ))
+    return grouped
+
+
+def group_current(results):
+    grouped = {}
+    for result in results:
+        for link in result.links:
+            grouped.setdefault(link.type, []).append(MergedLink(url=link.url, password=link.password, result=result))
+    return grouped
+
+
+def measure(rows, result_cls, link_cls, group):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = build(rows, result_cls, link_cls)
+    results_bytes = tracemalloc.get_traced_memory()[0]
+    merged = group(results)
+    elapsed = time.perf_counter() - start
+    total_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results, merged
+    return results_bytes, total_bytes - results_bytes, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = raw_rows(count)
+    print(f"{count} 条结果，每条 2 个链接")
+    cases = [
+        ("dataclass + 复制字段", LegacySearchResult, LegacyLink, group_legacy),
+        ("slots + 驻留 + 引用结果", SearchResult, Link, group_current),
+    ]
+    baseline = None
+    for label, result_cls, link_cls, group in cases:
+        results_bytes, merged_bytes, elapsed = measure(rows, result_cls, link_cls, group)
+        total = results_bytes + merged_bytes
+        baseline = baseline or total
+        print(f"  {label:<20} 结果 {results_bytes / 2**20:6.1f} MB  分组链接 {merged_bytes / 2**20:6.1f} MB  "
+              f"合计 {total / 2**20:6.1f} MB ({total / baseline:.0%})  耗时 {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
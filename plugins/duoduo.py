@@ -1,16 +1,16 @@
-import requests
 from typing import List, Dict, Any
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from src.models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.html_parser import select_containers
 
-class DuoduoPlugin(BasePanPlugin):
+class DuoduoPlugin(BasePlugin):
     def name(self) -> str:
         return "duoduo"
 
     def priority(self) -> int:
         return 2
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
         # 这里只实现主列表页抓取，详情页可后续补充
         url = f"https://tv.yydsys.top/index.php/vod/search/wd/{keyword}.html"
         headers = {
@@ -20,19 +20,17 @@ class DuoduoPlugin(BasePanPlugin):
             "Connection": "keep-alive",
             "Referer": "https://tv.yydsys.top/"
         }
+        # 请求失败直接抛出，由PluginManager计入熔断器
+        html = await self.http_client.get_text(url, headers=headers)
         try:
-            resp = requests.get(url, headers=headers, timeout=8)
-            if resp.status_code != 200:
-                return []
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(resp.text, "html.parser")
             results = []
-            for item in soup.select(".module-search-item"):
+            # 只解析搜索结果容器
+            for item in select_containers(html, "module-search-item"):
                 title_tag = item.select_one(".video-info-header h3 a")
                 if not title_tag:
                     continue
-                title = title_tag.get_text(strip=True)
-                unique_id = "duoduo-" + (title_tag.get("href") or "")
+                title = title_tag.text(strip=True)
+                unique_id = "duoduo-" + (title_tag.attr("href") or "")
                 # 这里只抓主信息，不抓详情页
                 results.append(SearchResult(
                     unique_id=unique_id,
@@ -1,20 +1,44 @@
-import requests
-from typing import List, Dict, Any
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from typing import List, Dict, Any, Optional
+from src.models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.json_decoder import MACCMS_VOD
+from src.link_extractor import extract_password
+from src.mirrors import MirrorPool
+
+class HubanPlugin(BasePlugin):
+    MIRRORS = [
+        "http://xsayang.fun:12512/api.php/provide/vod",
+        "http://103.45.162.207:20720/api.php/provide/vod"
+    ]
+    # 主镜像超过该时间未返回则同时请求备用镜像(秒)
+    DEFAULT_HEDGE_DELAY = 1.0
+    # 请求失败的镜像在该时间内不作为主镜像(秒)
+    DEFAULT_RECOVERY = 60
+
+    _mirrors: Optional[MirrorPool] = None
 
-class HubanPlugin(BasePanPlugin):
     def name(self) -> str:
         return "huban"
 
     def priority(self) -> int:
         return 2
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
-        urls = [
-            f"http://xsayang.fun:12512/api.php/provide/vod?ac=detail&wd={keyword}",
-            f"http://103.45.162.207:20720/api.php/provide/vod?ac=detail&wd={keyword}"
-        ]
+    def _get_mirrors(self) -> MirrorPool:
+        # 镜像健康状况保存在插件实例上，跨查询保留
+        if self._mirrors is None:
+            self._mirrors = MirrorPool(
+                self.options.get("mirrors", self.MIRRORS),
+                hedge_delay=self.options.get("hedge_delay", self.DEFAULT_HEDGE_DELAY),
+                recovery=self.options.get("recovery", self.DEFAULT_RECOVERY)
+            )
+        return self._mirrors
+
+    def get_stats(self) -> Dict[str, Any]:
+        # 各镜像的健康状况与延迟滑动平均
+        return {"mirrors": self._get_mirrors().get_stats()}
+
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
+        params = {"ac": "detail", "wd": keyword}
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
@@ -22,35 +46,41 @@ class HubanPlugin(BasePanPlugin):
             "Connection": "keep-alive",
             "Cache-Control": "no-cache"
         }
-        for url in urls:
-            try:
-                resp = requests.get(url, headers=headers, timeout=8)
-                data = resp.json()
-                if data.get("code") != 1:
+
+        async def fetch(url: str):
+            # 单个镜像限时，避免卡死的镜像占满插件超时
+            return await self.http_client.get_json(url, headers=headers, params=params, timeout=8,
+                                               schema=MACCMS_VOD)
+
+        # 所有镜像都请求失败时抛出，由PluginManager计入熔断器
+        data = await self._get_mirrors().race(
+            fetch, is_valid=lambda d: isinstance(d, dict) and d.get("code") == 1
+        )
+        if not isinstance(data, dict) or data.get("code") != 1:
+            return []
+        try:
+            results = []
+            for item in data.get("list", []):
+                title = item.get("vod_name", "").strip()
+                if not title:
                     continue
-                results = []
-                for item in data.get("list", []):
-                    title = item.get("vod_name", "").strip()
-                    if not title:
-                        continue
-                    unique_id = f"huban-{item.get('vod_id')}"
-                    content = self._build_content(item)
-                    links = self._parse_links(item.get("vod_down_from", ""), item.get("vod_down_url", ""))
-                    tags = []
-                    if item.get("vod_year"):
-                        tags.append(item["vod_year"])
-                    results.append(SearchResult(
-                        unique_id=unique_id,
-                        channel=self.name(),
-                        title=title,
-                        content=content,
-                        links=links,
-                        tags=tags
-                    ))
-                return results
-            except Exception:
-                continue
-        return []
+                unique_id = f"huban-{item.get('vod_id')}"
+                content = self._build_content(item)
+                links = self._parse_links(item.get("vod_down_from", ""), item.get("vod_down_url", ""))
+                tags = []
+                if item.get("vod_year"):
+                    tags.append(item["vod_year"])
+                results.append(SearchResult(
+                    unique_id=unique_id,
+                    channel=self.name(),
+                    title=title,
+                    content=content,
+                    links=links,
+                    tags=tags
+                ))
+            return results
+        except Exception:
+            return []
 
     def _build_content(self, item: dict) -> str:
         parts = []
@@ -83,7 +113,7 @@ class HubanPlugin(BasePanPlugin):
                 link_url = link_url.strip()
                 if not link_url or not self._is_valid_url(link_url):
                     continue
-                password = self._extract_password(link_url)
+                password = extract_password(link_url)
                 links.append(Link(type=link_type, url=link_url, password=password))
         # 去重
         seen = set()
@@ -114,13 +144,3 @@ class HubanPlugin(BasePanPlugin):
 
     def _is_valid_url(self, url: str) -> bool:
         return url.startswith("http") or url.startswith("magnet:") or url.startswith("ed2k:")
-
-    def _extract_password(self, url: str) -> str:
-        import re
-        m = re.search(r"\?pwd=([0-9a-zA-Z]+)", url)
-        if m:
-            return m.group(1)
-        m2 = re.search(r"password=([0-9a-zA-Z]+)", url)
-        if m2:
-            return m2.group(1)
-        return ""
\ No newline at end of file
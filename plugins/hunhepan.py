@@ -1,12 +1,12 @@
 import asyncio
-import aiohttp
-import json
 from typing import List, Dict, Any
 from datetime import datetime
-from plugin_base import BasePanPlugin
-from models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.models import SearchResult, Link
+from src.link_extractor import classify_url
+from src.json_decoder import HUNHEPAN_SEARCH
 
-class HunhepanPlugin(BasePanPlugin):
+class HunhepanPlugin(BasePlugin):
     """
     混合盘搜索插件
     """
@@ -15,6 +15,7 @@ class HunhepanPlugin(BasePanPlugin):
     
     DEFAULT_PAGE_SIZE = 30
     MAX_PAGES = 3
+    PAGE_CONCURRENCY = 2
 
     def name(self) -> str:
         return "hunhepan"
@@ -22,51 +23,93 @@ class HunhepanPlugin(BasePanPlugin):
     def priority(self) -> int:
         return 3
 
-    async def _search_api(self, session: aiohttp.ClientSession, api_url: str, keyword: str) -> List[Dict]:
-        """
-        向单个API发送请求
-        """
-        all_items = []
-        
-        for page in range(1, self.MAX_PAGES + 1):
-            try:
-                payload = {
-                    "q": keyword,
-                    "exact": True,
-                    "page": page,
-                    "size": self.DEFAULT_PAGE_SIZE,
-                    "type": "",
-                    "time": "",
-                    "from": "web",
-                    "user_id": 0,
-                    "filter": True,
-                }
-                
-                headers = {
-                    "Content-Type": "application/json",
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                }
-                
-                if "hunhepan.com" in api_url:
-                    headers["Referer"] = "https://hunhepan.com/search"
+    async def _fetch_page(self, api_url: str, keyword: str, page: int, page_size: int) -> List[Dict]:
+        """
+        请求单页结果，接口返回错误码时视为空页
+        """
+        payload = {
+            "q": keyword,
+            "exact": True,
+            "page": page,
+            "size": page_size,
+            "type": "",
+            "time": "",
+            "from": "web",
+            "user_id": 0,
+            "filter": True,
+        }
+        
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        }
+        
+        if "hunhepan.com" in api_url:
+            headers["Referer"] = "https://hunhepan.com/search"
+        
+        # 查询接口可安全重试；只解码用到的字段
+        data = await self.http_client.post_json(api_url, json=payload, headers=headers, idempotent=True,
+                                                schema=HUNHEPAN_SEARCH)
+        
+        if data.get("code") != 200:
+            return []
+        
+        return data.get("data", {}).get("list", []) or []
+
+    async def _search_api(self, api_url: str, keyword: str) -> List[Dict]:
+        """
+        向单个API并发请求多页，返回去重后的条目
+
+        最多同时请求page_concurrency页；某页不足一页大小时说明已到末页，
+        取消更靠后的页面请求。每页到达后立即合并去重。page_concurrency小于
+        max_pages时提前结束才能省下请求。
+        """
+        max_pages = self.options.get("max_pages", self.MAX_PAGES)
+        page_size = self.options.get("page_size", self.DEFAULT_PAGE_SIZE)
+        concurrency = max(1, self.options.get("page_concurrency", self.PAGE_CONCURRENCY))
+        
+        unique_map: Dict[str, Dict] = {}
+        last_page = max_pages
+        next_page = 1
+        running: Dict[asyncio.Task, int] = {}
+        last_error = None
+        succeeded_pages = 0
+        
+        try:
+            while running or next_page <= last_page:
+                while next_page <= last_page and len(running) < concurrency:
+                    task = asyncio.create_task(self._fetch_page(api_url, keyword, next_page, page_size))
+                    running[task] = next_page
+                    next_page += 1
                 
-                async with session.post(api_url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        continue
-                    
-                    data = await response.json()
-                    
-                    if data.get("code") != 200:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = running.pop(task)
+                    if task.exception() is not None:
+                        # 忽略单个页面的错误，继续处理其他页面
+                        last_error = task.exception()
                         continue
                     
-                    items = data.get("data", {}).get("list", [])
-                    all_items.extend(items)
+                    items = task.result()
+                    succeeded_pages += 1
+                    for item in items:
+                        self._merge_item(unique_map, item)
                     
-            except Exception as e:
-                # 忽略单个页面的错误，继续处理其他页面
-                continue
-                
-        return all_items
+                    if len(items) < page_size and page < last_page:
+                        # 已到末页，不再请求更靠后的页面
+                        last_page = page
+                        for other, other_page in list(running.items()):
+                            if other_page > last_page:
+                                other.cancel()
+                                running.pop(other)
+        finally:
+            for task in running:
+                task.cancel()
+        
+        # 所有页面都请求失败时抛出，由PluginManager计入熔断器
+        if succeeded_pages == 0 and last_error is not None:
+            raise last_error
+        return list(unique_map.values())
 
     def _clean_title(self, title: str) -> str:
         """
@@ -89,49 +132,44 @@ class HunhepanPlugin(BasePanPlugin):
         
         return result.strip()
 
-    def _deduplicate_items(self, items: List[Dict]) -> List[Dict]:
+    def _merge_item(self, unique_map: Dict[str, Dict], item: Dict) -> None:
         """
-        去重处理
+        将单个条目合并进去重表，重复时保留信息更丰富的那个
         """
-        unique_map = {}
+        # 清理DiskName中的HTML标签；解码结果由HttpClient共享，写入副本
+        cleaned_name = self._clean_title(item.get("disk_name", ""))
+        item = dict(item, disk_name=cleaned_name)
+        
+        # 创建复合键
+        disk_id = item.get("disk_id", "")
+        link = item.get("link", "")
+        disk_type = item.get("disk_type", "")
         
-        for item in items:
-            # 清理DiskName中的HTML标签
-            cleaned_name = self._clean_title(item.get("disk_name", ""))
-            item["disk_name"] = cleaned_name
+        if disk_id:
+            key = disk_id
+        elif link:
+            key = f"{link}|{cleaned_name}"
+        else:
+            key = f"{cleaned_name}|{disk_type}"
+        
+        # 如果已存在，保留信息更丰富的那个
+        if key in unique_map:
+            existing = unique_map[key]
+            existing_score = len(existing.get("files", ""))
+            new_score = len(item.get("files", ""))
             
-            # 创建复合键
-            disk_id = item.get("disk_id", "")
-            link = item.get("link", "")
-            disk_type = item.get("disk_type", "")
+            # 如果新项有密码而现有项没有，增加新项分数
+            if not existing.get("disk_pass") and item.get("disk_pass"):
+                new_score += 5
             
-            if disk_id:
-                key = disk_id
-            elif link:
-                key = f"{link}|{cleaned_name}"
-            else:
-                key = f"{cleaned_name}|{disk_type}"
+            # 如果新项有时间而现有项没有，增加新项分数
+            if not existing.get("shared_time") and item.get("shared_time"):
+                new_score += 3
             
-            # 如果已存在，保留信息更丰富的那个
-            if key in unique_map:
-                existing = unique_map[key]
-                existing_score = len(existing.get("files", ""))
-                new_score = len(item.get("files", ""))
-                
-                # 如果新项有密码而现有项没有，增加新项分数
-                if not existing.get("disk_pass") and item.get("disk_pass"):
-                    new_score += 5
-                
-                # 如果新项有时间而现有项没有，增加新项分数
-                if not existing.get("shared_time") and item.get("shared_time"):
-                    new_score += 3
-                
-                if new_score > existing_score:
-                    unique_map[key] = item
-            else:
+            if new_score > existing_score:
                 unique_map[key] = item
-        
-        return list(unique_map.values())
+        else:
+            unique_map[key] = item
 
     def _convert_disk_type(self, disk_type: str) -> str:
         """
@@ -161,6 +199,9 @@ class HunhepanPlugin(BasePanPlugin):
             # 创建链接
             disk_type = item.get("disk_type", "")
             link_type = self._convert_disk_type(disk_type)
+            if link_type == "others":
+                # 未登记的网盘类型按链接主机识别
+                link_type = classify_url(item.get("link", "")) or "others"
             
             link = Link(
                 type=link_type,
@@ -202,22 +243,14 @@ class HunhepanPlugin(BasePanPlugin):
         """
         实际的搜索实现
         """
-        async with aiohttp.ClientSession() as session:
-            # 只请求hunhepan API
-            items = await self._search_api(session, self.HUNHEPAN_API, keyword)
-            
-            # 去重处理
-            unique_items = self._deduplicate_items(items)
-            
-            # 转换为标准格式
-            return self._convert_results(unique_items)
+        # 只请求hunhepan API，返回的条目已去重
+        unique_items = await self._search_api(self.HUNHEPAN_API, keyword)
+        
+        # 转换为标准格式
+        return self._convert_results(unique_items)
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
         """
         执行搜索，返回标准化的SearchResult列表
         """
-        try:
-            return asyncio.run(self._do_search(keyword, ext))
-        except Exception as e:
-            # 发生异常时返回空列表而不是抛出异常
-            return []
\ No newline at end of file
+        return await self._do_search(keyword, ext)
\ No newline at end of file
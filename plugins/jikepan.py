@@ -1,24 +1,22 @@
-import requests
-from typing import List, Dict, Any
-
 # 将上一级目录路径添加到系统路径
 import sys
 import os
-import requests
 from typing import List, Dict, Any
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from src.models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.link_extractor import classify_url
+from src.json_decoder import JIKEPAN_SEARCH
 import re
 
-class JikepanPlugin(BasePanPlugin):
+class JikepanPlugin(BasePlugin):
     def name(self) -> str:
         return "jikepan"
 
     def priority(self) -> int:
         return 2
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
         url = "https://api.jikepan.xyz/search"
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -31,9 +29,10 @@ class JikepanPlugin(BasePanPlugin):
         }
         if ext and isinstance(ext, dict) and ext.get("is_all") is True:
             payload["is_all"] = True
+        # 请求失败直接抛出，由PluginManager计入熔断器；查询接口可安全重试
+        data = await self.http_client.post_json(url, json=payload, headers=headers, idempotent=True,
+                                                schema=JIKEPAN_SEARCH)
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=10)
-            data = resp.json()
             if data.get("msg") != "success":
                 return []
             results = []
@@ -44,8 +43,11 @@ class JikepanPlugin(BasePanPlugin):
                 unique_id = f"jikepan-{idx}"
                 links = []
                 for link in item.get("links", []):
-                    link_type = self._determine_type_by_service(link.get("service", ""))
                     link_url = link.get("link", "")
+                    link_type = self._determine_type_by_service(link.get("service", ""))
+                    if link_type == "others":
+                        # 未登记的服务名按链接主机识别
+                        link_type = classify_url(link_url) or "others"
                     password = link.get("pwd", "")
                     if link_type and link_url:
                         links.append(Link(type=link_type, url=link_url, password=password))
@@ -100,6 +102,15 @@ class JikepanPlugin(BasePanPlugin):
         return "others"
 
 if __name__ == "__main__":
-    plugin = JikepanPlugin()
-    results = plugin.search("芙莉莲")
-    print(results)
\ No newline at end of file
+    import asyncio
+    from src.http_client import HttpClient
+
+    async def main():
+        plugin = JikepanPlugin()
+        plugin.set_http_client(HttpClient())
+        try:
+            print(await plugin.search("芙莉莲"))
+        finally:
+            await plugin.http_client.close()
+
+    asyncio.run(main())
\ No newline at end of file
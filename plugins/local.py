@@ -0,0 +1,33 @@
+from typing import List, Dict, Any
+from src.models import SearchResult
+from src.plugin_base import BasePlugin
+
+
+class LocalPlugin(BasePlugin):
+    """从本地索引中检索历史搜索结果，结果与在线插件一同合并"""
+
+    # 索引本身即是缓存，结果不需要再进入插件结果缓存
+    cacheable = False
+
+    # 由PanSearchApp注入的LocalIndex，未启用local_index时为None
+    index = None
+
+    def name(self) -> str:
+        return "local"
+
+    def priority(self) -> int:
+        # 排在在线插件之后，去重时优先保留在线结果
+        return 9
+
+    def set_index(self, index) -> None:
+        self.index = index
+
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
+        if self.index is None:
+            return []
+        limit = self.options.get("max_results")
+        # 在索引自己的读线程池中检索
+        return await self.index.search_async(keyword, limit)
+
+    def get_description(self) -> str:
+        return "本地历史索引"
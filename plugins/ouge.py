@@ -1,17 +1,19 @@
-import requests
 from typing import List, Dict, Any
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from src.models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.json_decoder import MACCMS_VOD
+from src.link_extractor import extract_password
 
-class OugePlugin(BasePanPlugin):
+class OugePlugin(BasePlugin):
     def name(self) -> str:
         return "ouge"
 
     def priority(self) -> int:
         return 2
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
-        url = f"https://woog.nxog.eu.org/api.php/provide/vod?ac=detail&wd={keyword}"
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
+        url = "https://woog.nxog.eu.org/api.php/provide/vod"
+        params = {"ac": "detail", "wd": keyword}
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
@@ -20,9 +22,9 @@ class OugePlugin(BasePanPlugin):
             "Referer": "https://woog.nxog.eu.org/",
             "Cache-Control": "no-cache"
         }
+        # 请求失败直接抛出，由PluginManager计入熔断器
+        data = await self.http_client.get_json(url, headers=headers, params=params, schema=MACCMS_VOD)
         try:
-            resp = requests.get(url, headers=headers, timeout=8)
-            data = resp.json()
             if data.get("code") != 1:
                 return []
             results = []
@@ -78,7 +80,7 @@ class OugePlugin(BasePanPlugin):
             url_str = url_parts[i].strip()
             if not url_str or not self._is_valid_url(url_str):
                 continue
-            password = self._extract_password(url_str)
+            password = extract_password(url_str)
             links.append(Link(type=link_type, url=url_str, password=password))
         return links
 
@@ -102,10 +104,3 @@ class OugePlugin(BasePanPlugin):
 
     def _is_valid_url(self, url: str) -> bool:
         return url.startswith("http") or url.startswith("magnet:") or url.startswith("ed2k:")
-
-    def _extract_password(self, url: str) -> str:
-        import re
-        m = re.search(r"\?pwd=([0-9a-zA-Z]+)", url)
-        if m:
-            return m.group(1)
-        return ""
\ No newline at end of file
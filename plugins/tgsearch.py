@@ -1,54 +1,97 @@
-import re
-import requests
+import asyncio
 from datetime import datetime
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from src.models import SearchResult
+from src.plugin_base import BasePlugin
+from src.link_extractor import extract_links
+from src.html_parser import select_containers
 
-class TGSearchPlugin(BasePanPlugin):
+class TGSearchPlugin(BasePlugin):
     """
     以插件形式实现TG频道资源搜索，支持多频道，结果结构与其他插件统一
-    ext 参数需包含 'channels'（list[str]），否则默认 tgsearchers2
+    频道列表优先取 ext 参数的 'channels'（list[str]），其次取配置
+    plugins.options.tgsearch.channels，否则默认 tgsearchers2
     """
 
+    DEFAULT_CHANNELS = ["tgsearchers2"]
+    # 每个频道默认只读取第一页搜索结果
+    DEFAULT_MAX_PAGES = 1
+
     def name(self) -> str:
         return "tgsearch"
 
     def priority(self) -> int:
         return 3  # TG频道优先级较低
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
-        channels = ["tgsearchers2"]
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
+        channels = self.options.get("channels") or self.DEFAULT_CHANNELS
         if ext and "channels" in ext and isinstance(ext["channels"], list):
             channels = ext["channels"]
+        # 各频道并发搜索，总并发由请求调度器按主机限制
+        outcomes = await asyncio.gather(
+            *(self._search_channel(channel, keyword) for channel in channels),
+            return_exceptions=True
+        )
         results = []
-        for channel in channels:
-            results.extend(self._search_channel(channel, keyword))
+        errors = []
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                errors.append(outcome)
+            else:
+                results.extend(outcome)
+        # 所有频道都请求失败时抛出，由PluginManager计入熔断器
+        if errors and len(errors) == len(channels):
+            raise errors[0]
         return results
 
-    def _search_channel(self, channel: str, keyword: str) -> List[SearchResult]:
-        url = f"https://t.me/s/{channel}?q={keyword}"
-        try:
-            resp = requests.get(url, timeout=5)
-            resp.raise_for_status()
-        except Exception:
-            return []
-        soup = BeautifulSoup(resp.text, "html.parser")
-        messages = soup.find_all("div", class_="tgme_widget_message_wrap")
+    async def _search_channel(self, channel: str, keyword: str) -> List[SearchResult]:
+        """
+        搜索单个频道，通过 before=<最小消息ID> 向更早的消息翻页，最多 max_pages 页
+        """
+        url = f"https://t.me/s/{channel}"
+        max_pages = self.options.get("max_pages", self.DEFAULT_MAX_PAGES)
+        results = []
+        seen_ids = set()
+        before = None
+        for page in range(max_pages):
+            params = {"q": keyword}
+            if before is not None:
+                params["before"] = before
+            try:
+                html = await self.http_client.get_text(url, params=params)
+            except Exception:
+                # 首页失败视为频道失败，后续页失败则返回已获取的结果
+                if page == 0:
+                    raise
+                break
+            page_results = [r for r in self._parse_messages(channel, html) if r.message_id not in seen_ids]
+            if not page_results:
+                break
+            results.extend(page_results)
+            seen_ids.update(r.message_id for r in page_results)
+            message_ids = [int(r.message_id) for r in page_results if r.message_id.isdigit()]
+            if not message_ids:
+                break
+            before = min(message_ids)
+        return results
+
+    def _parse_messages(self, channel: str, html: str) -> List[SearchResult]:
+        # 只解析消息容器，跳过页头的样式、脚本与频道信息
+        messages = select_containers(html, "tgme_widget_message_wrap", tag="div")
         results = []
         for msg in messages:
             try:
-                msg_id_tag = msg.find("a", class_="tgme_widget_message_date")
-                if not msg_id_tag or not msg_id_tag.has_attr("href"):
+                msg_id_tag = msg.select_one("a.tgme_widget_message_date")
+                if not msg_id_tag or not msg_id_tag.attr("href"):
                     continue
-                msg_id = msg_id_tag["href"].split("/")[-1]
-                date_str = msg_id_tag.find("time")["datetime"] if msg_id_tag.find("time") else ""
+                msg_id = msg_id_tag.attr("href").split("/")[-1]
+                time_tag = msg_id_tag.select_one("time")
+                date_str = time_tag.attr("datetime", "") if time_tag else ""
                 dt = datetime.fromisoformat(date_str.replace("Z", "+00:00")) if date_str else None
-                title = msg.find("div", class_="tgme_widget_message_text")
-                title_text = title.get_text(separator="\n") if title else ""
+                title = msg.select_one("div.tgme_widget_message_text")
+                title_text = title.text(separator="\n") if title else ""
                 content = title_text
-                links = self._extract_links(title_text)
+                links = extract_links(title_text)
                 result = SearchResult(
                     message_id=msg_id,
                     unique_id=f"{channel}_{msg_id}",
@@ -63,21 +106,3 @@ class TGSearchPlugin(BasePanPlugin):
             except Exception:
                 continue
         return results
-
-    def _extract_links(self, text: str) -> List[Link]:
-        # 支持常见网盘链接
-        patterns = {
-            "baidu": r"https?://pan\.baidu\.com/s/[a-zA-Z0-9]+",
-            "aliyun": r"https?://www\.aliyundrive\.com/s/[a-zA-Z0-9]+",
-            "quark": r"https?://pan\.quark\.cn/s/[a-zA-Z0-9]+",
-            "tianyi": r"https?://cloud\.189\.cn/t/[a-zA-Z0-9]+",
-            "115": r"https?://115\.com/s/[a-zA-Z0-9]+",
-            "xunlei": r"https?://pan\.xunlei\.com/s/[a-zA-Z0-9]+",
-            "123": r"https?://www\.123pan\.com/s/[a-zA-Z0-9]+",
-            "uc": r"https?://drive\.uc\.cn/s/[a-zA-Z0-9]+",
-        }
-        links = []
-        for typ, pat in patterns.items():
-            for m in re.findall(pat, text):
-                links.append(Link(type=typ, url=m))
-        return links
\ No newline at end of file
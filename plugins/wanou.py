@@ -1,17 +1,19 @@
-import requests
 from typing import List, Dict, Any
-from models import SearchResult, Link
-from plugin_base import BasePanPlugin
+from src.models import SearchResult, Link
+from src.plugin_base import BasePlugin
+from src.json_decoder import MACCMS_VOD
+from src.link_extractor import classify_url, extract_password
 
-class WanouPlugin(BasePanPlugin):
+class WanouPlugin(BasePlugin):
     def name(self) -> str:
         return "wanou"
 
     def priority(self) -> int:
         return 1
 
-    def search(self, keyword: str, ext: Dict[str, Any] = None) -> List[SearchResult]:
-        url = f"https://woog.nxog.eu.org/api.php/provide/vod?ac=detail&wd={keyword}"
+    async def search(self, keyword: str, ext: Dict[str, Any] = None, **kwargs) -> List[SearchResult]:
+        url = "https://woog.nxog.eu.org/api.php/provide/vod"
+        params = {"ac": "detail", "wd": keyword}
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
@@ -20,9 +22,9 @@ class WanouPlugin(BasePanPlugin):
             "Referer": "https://woog.nxog.eu.org/",
             "Cache-Control": "no-cache"
         }
+        # 请求失败直接抛出，由PluginManager计入熔断器
+        data = await self.http_client.get_json(url, headers=headers, params=params, schema=MACCMS_VOD)
         try:
-            resp = requests.get(url, headers=headers, timeout=8)
-            data = resp.json()
             if data.get("code") != 1:
                 return []
             results = []
@@ -72,50 +74,12 @@ class WanouPlugin(BasePanPlugin):
         min_len = min(len(from_parts), len(url_parts))
         links = []
         for i in range(min_len):
-            from_type = from_parts[i].strip()
             url_str = url_parts[i].strip()
             if not url_str:
                 continue
-            link_type = self._determine_link_type(from_type, url_str)
+            link_type = classify_url(url_str)
             if not link_type:
                 continue
-            password = self._extract_password(url_str)
+            password = extract_password(url_str)
             links.append(Link(type=link_type, url=url_str, password=password))
         return links
-
-    def _determine_link_type(self, api_type: str, url: str) -> str:
-        # 只实现常见类型，便于扩展
-        if "baidu" in url:
-            return "baidu"
-        if "quark" in url:
-            return "quark"
-        if "aliyundrive" in url or "alipan" in url:
-            return "aliyun"
-        if "xunlei" in url:
-            return "xunlei"
-        if "cloud.189" in url:
-            return "tianyi"
-        if "115.com" in url:
-            return "115"
-        if "weiyun" in url:
-            return "weiyun"
-        if "lanzou" in url or "lanzo" in url:
-            return "lanzou"
-        if "jianguoyun" in url:
-            return "jianguoyun"
-        if "123pan" in url:
-            return "123"
-        if "mypikpak" in url:
-            return "pikpak"
-        if url.startswith("magnet:"):
-            return "magnet"
-        if url.startswith("ed2k:"):
-            return "ed2k"
-        return ""
-
-    def _extract_password(self, url: str) -> str:
-        import re
-        m = re.search(r"\?pwd=([0-9a-zA-Z]+)", url)
-        if m:
-            return m.group(1)
-        return ""
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+无界面的JSON HTTP搜索服务，供其他服务调用
+
+启动：python -m src.api_server [--config config.yaml] [--host HOST] [--port PORT] [--workers N]
+
+接口：
+    GET /health               健康检查，含使用中的解析后端
+    GET /api/plugins          插件状态
+    GET /api/search?q=关键词   聚合搜索，refresh=1跳过缓存；stream=1或请求头
+                              Accept: application/x-ndjson 时按NDJSON逐行返回各插件结果，最后一行为聚合响应
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from . import html_parser, json_decoder
+from .app import PanSearchApp
+from .config import ConfigManager
+from .models import SearchResponse, SearchResult
+from .plugin_manager import PluginOutcome
+
+
+NDJSON = "application/x-ndjson"
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def result_to_dict(result: SearchResult) -> Dict[str, Any]:
+    """将搜索结果转换为可JSON序列化的字典"""
+    return {
+        "message_id": result.message_id,
+        "unique_id": result.unique_id,
+        "channel": result.channel,
+        "datetime": _iso(result.datetime),
+        "title": result.title,
+        "content": result.content,
+        "links": [{"type": link.type, "url": link.url, "password": link.password} for link in result.links],
+        "tags": result.tags,
+    }
+
+
+def response_to_dict(keyword: str, response: SearchResponse) -> Dict[str, Any]:
+    """将搜索响应转换为可JSON序列化的字典"""
+    merged = None
+    if response.merged_by_type is not None:
+        merged = {
+            link_type: [
+                {"url": m.url, "password": m.password, "note": m.note,
+                 "datetime": _iso(m.datetime), "source": m.source}
+                for m in links
+            ]
+            for link_type, links in response.merged_by_type.items()
+        }
+    return {
+        "keyword": keyword,
+        "total": response.total,
+        "results": [result_to_dict(result) for result in response.results],
+        "merged_by_type": merged,
+        "pending": response.pending,
+        "timed_out": response.timed_out,
+        "failed": response.failed,
+    }
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SearchServer:
+    """包装PanSearchApp的aiohttp应用，每个工作进程一个实例"""
+    
+    def __init__(self, config_path: str = "config.yaml", gzip_min_size: int = 1024):
+        self.app = PanSearchApp(config_path)
+        # 小于该字节数的响应不压缩
+        self.gzip_min_size = gzip_min_size
+        self.started_at = time.monotonic()
+    
+    def build(self) -> web.Application:
+        web_app = web.Application()
+        web_app.router.add_get("/health", self.health)
+        web_app.router.add_get("/api/plugins", self.plugins)
+        web_app.router.add_get("/api/search", self.search)
+        web_app.on_startup.append(self._startup)
+        web_app.on_cleanup.append(self._cleanup)
+        return web_app
+    
+    async def _startup(self, _web_app: web.Application) -> None:
+        await self.app.initialize()
+        self.started_at = time.monotonic()
+    
+    async def _cleanup(self, _web_app: web.Application) -> None:
+        await self.app.close()
+    
+    def _json(self, data: Any, status: int = 200) -> web.Response:
+        body = _dumps(data)
+        response = web.Response(body=body, status=status, content_type="application/json", charset="utf-8")
+        if len(body) >= self.gzip_min_size:
+            # 按请求的Accept-Encoding决定是否压缩
+            response.enable_compression()
+        return response
+    
+    async def health(self, request: web.Request) -> web.Response:
+        """健康检查，搜索服务未能初始化时返回503；同时报告使用中的解析后端"""
+        ready = self.app.search_service is not None
+        enabled = [p.name() for p in self.app.plugin_manager.get_plugins() if p.is_enabled()]
+        return self._json({
+            "status": "ok" if ready else "unavailable",
+            "enabled_plugins": enabled,
+            "uptime": round(time.monotonic() - self.started_at, 1),
+            "html_parser": html_parser.get_backend(),
+            "json_decoder": json_decoder.get_backend(),
+            "json_schema_decoder": json_decoder.get_schema_backend(),
+        }, status=200 if ready else 503)
+    
+    async def plugins(self, request: web.Request) -> web.Response:
+        """插件状态，含熔断器状态"""
+        return self._json(self.app.get_plugin_status())
+    
+    async def search(self, request: web.Request) -> web.StreamResponse:
+        """聚合搜索"""
+        keyword = request.query.get("q", "").strip()
+        if not keyword:
+            return self._json({"error": "缺少搜索关键词参数q"}, status=400)
+        bypass_cache = request.query.get("refresh", "") in ("1", "true")
+        stream = request.query.get("stream", "") in ("1", "true") or NDJSON in request.headers.get("Accept", "")
+        if stream:
+            return await self._search_stream(request, keyword, bypass_cache)
+        
+        response = await self.app.search(keyword, bypass_cache=bypass_cache)
+        if response is None:
+            return self._json({"error": "搜索服务不可用"}, status=503)
+        return self._json(response_to_dict(keyword, response))
+    
+    async def _search_stream(self, request: web.Request, keyword: str, bypass_cache: bool) -> web.StreamResponse:
+        """
+        每个插件返回后写出一行 {"event": "plugin", ...}，最后写出 {"event": "response", ...}
+        
+        逐行写出的数据量小，压缩需要攒够数据才输出，会抵消流式返回的意义，因此不压缩。
+        """
+        stream = web.StreamResponse(headers={"Content-Type": f"{NDJSON}; charset=utf-8"})
+        await stream.prepare(request)
+        lines: List[Dict[str, Any]] = []
+        
+        def on_plugin(plugin_name: str, results: PluginOutcome) -> None:
+            failed = isinstance(results, Exception)
+            lines.append({
+                "event": "plugin",
+                "plugin": plugin_name,
+                "timed_out": results is None,
+                "failed": failed,
+                "results": [] if results is None or failed else [result_to_dict(result) for result in results],
+            })
+        
+        final = None
+        async with aclosing(self.app.search_stream(keyword, bypass_cache=bypass_cache,
+                                                   on_plugin=on_plugin)) as snapshots:
+            async for final in snapshots:
+                for line in lines:
+                    await stream.write(_dumps(line) + b"\n")
+                lines.clear()
+        
+        if final is None:
+            await stream.write(_dumps({"event": "error", "error": "搜索服务不可用"}) + b"\n")
+        else:
+            await stream.write(_dumps({"event": "response", **response_to_dict(keyword, final)}) + b"\n")
+        await stream.write_eof()
+        return stream
+
+
+def _run_worker(config_path: str, host: str, port: int, reuse_port: bool,
+                keepalive_timeout: float, gzip_min_size: int) -> None:
+    server = SearchServer(config_path, gzip_min_size=gzip_min_size)
+    web.run_app(server.build(), host=host, port=port, reuse_port=reuse_port,
+                keepalive_timeout=keepalive_timeout, print=None)
+
+
+def serve(config_path: str = "config.yaml", host: Optional[str] = None, port: Optional[int] = None,
+          workers: Optional[int] = None) -> None:
+    """
+    启动服务，参数未指定时读取配置中的server段
+    
+    workers大于1时启动多个进程，通过SO_REUSEPORT共用端口（需要Linux等支持该选项的系统），
+    各进程有独立的内存缓存，SQLite持久化缓存可共用。
+    """
+    server_config = ConfigManager(config_path).get_config().get("server", {}) or {}
+    host = host or server_config.get("host", "0.0.0.0")
+    port = port or server_config.get("port", 11224)
+    workers = max(1, workers or server_config.get("workers", 1))
+    keepalive_timeout = server_config.get("keepalive_timeout", 75)
+    gzip_min_size = server_config.get("gzip_min_size", 1024)
+    args = (config_path, host, port, workers > 1, keepalive_timeout, gzip_min_size)
+    
+    print(f"JSON搜索服务启动: http://{host}:{port}，工作进程数: {workers}")
+    processes = [multiprocessing.Process(target=_run_worker, args=args, daemon=True) for _ in range(workers - 1)]
+    for process in processes:
+        process.start()
+    try:
+        _run_worker(*args)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="网盘聚合搜索JSON服务")
+    parser.add_argument("--config", default="config.yaml", help="配置文件路径")
+    parser.add_argument("--host", help="监听地址，默认读取server.host")
+    parser.add_argument("--port", type=int, help="监听端口，默认读取server.port")
+    parser.add_argument("--workers", type=int, help="工作进程数，默认读取server.workers")
+    args = parser.parse_args()
+    serve(args.config, args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 """
 应用主入口
 """
-import asyncio
+import atexit
+import threading
 from typing import Optional
+from . import html_parser
 from .config import ConfigManager
+from .disk_cache import close_stores
+from .local_index import LocalIndex
+from .cache_warmer import CacheWarmer
+from .http_client import HttpClient
+from .loop_thread import LoopThread
 from .plugin_manager import PluginManager
 from .search_service import SearchService
 
@@ -13,25 +20,51 @@ class PanSearchApp:
     
     def __init__(self, config_path: str = "config.yaml"):
         self.config_manager = ConfigManager(config_path)
+        self.http_client: Optional[HttpClient] = None
         self.plugin_manager = PluginManager()
         self.search_service: Optional[SearchService] = None
+        self.local_index: Optional[LocalIndex] = None
+        self.cache_warmer: Optional[CacheWarmer] = None
         self._initialized = False
+        # 多个线程（各自的事件循环）可能同时首次调用initialize
+        self._init_lock = threading.Lock()
     
     async def initialize(self) -> None:
-        """初始化应用"""
-        if self._initialized:
-            return
-        
+        """初始化应用，并发调用时只初始化一次；预热器在当前事件循环上运行"""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._initialize()
+        if self.cache_warmer is not None:
+            self.cache_warmer.start()
+    
+    def _initialize(self) -> None:
         try:
             # 加载配置
             config = self.config_manager.get_config()
+            html_parser.set_backend(config.get("html_parser", "auto"))
+            
+            # 创建共享连接池
+            self.http_client = HttpClient.from_config(config)
+            self.plugin_manager.configure(config, http_client=self.http_client)
             
             # 加载插件
             enabled_plugins = config.get("plugins", {}).get("enabled", [])
             self.plugin_manager.load_plugins(enabled_plugins)
             
+            # 本地历史索引，供local插件检索
+            self.local_index = LocalIndex.from_config(config)
+            local_plugin = self.plugin_manager.get_plugin("local")
+            if local_plugin is not None:
+                local_plugin.set_index(self.local_index)
+            
             # 初始化搜索服务
-            self.search_service = SearchService(self.plugin_manager)
+            self.search_service = SearchService(self.plugin_manager, self.config_manager,
+                                                local_index=self.local_index)
+            
+            # 热门搜索缓存预热
+            self.cache_warmer = CacheWarmer.from_config(self.search_service, config)
+            self.search_service.cache_warmer = self.cache_warmer
             
             self._initialized = True
             
@@ -40,8 +73,7 @@ class PanSearchApp:
     
     async def search(self, keyword: str, **kwargs):
         """执行搜索"""
-        if not self._initialized:
-            await self.initialize()
+        await self.initialize()
         
         if not self.search_service:
             print("搜索服务未初始化")
@@ -49,6 +81,49 @@ class PanSearchApp:
         
         return await self.search_service.search(keyword, **kwargs)
     
+    async def search_stream(self, keyword: str, **kwargs):
+        """渐进式搜索，逐步产出部分结果"""
+        await self.initialize()
+        
+        if not self.search_service:
+            print("搜索服务未初始化")
+            return
+        
+        async for response in self.search_service.search_stream(keyword, **kwargs):
+            yield response
+    
+    async def search_many(self, keywords, **kwargs):
+        """批量搜索多个关键词，返回 {关键词: 响应}"""
+        await self.initialize()
+        
+        if not self.search_service:
+            print("搜索服务未初始化")
+            return {}
+        
+        return await self.search_service.search_many(keywords, **kwargs)
+    
+    async def iter_search_many(self, keywords, **kwargs):
+        """批量搜索多个关键词，按完成顺序逐个产出 (关键词, 响应)"""
+        await self.initialize()
+        
+        if not self.search_service:
+            print("搜索服务未初始化")
+            return
+        
+        async for outcome in self.search_service.iter_search_many(keywords, **kwargs):
+            yield outcome
+    
+    async def close(self) -> None:
+        """释放应用持有的资源"""
+        if self.cache_warmer is not None:
+            await self.cache_warmer.stop()
+        if self.http_client is not None:
+            await self.http_client.close()
+        self.plugin_manager.close()
+        if self.local_index is not None:
+            self.local_index.close()
+        close_stores()
+    
     def get_plugin_status(self):
         """获取插件状态"""
         return self.plugin_manager.get_plugin_status()
@@ -60,17 +135,53 @@ class PanSearchApp:
 
 # 全局应用实例
 _app: Optional[PanSearchApp] = None
+_app_lock = threading.Lock()
+
+# 运行全局应用的后台事件循环
+_loop_thread: Optional[LoopThread] = None
 
 
 async def get_app(config_path: str = "config.yaml") -> PanSearchApp:
-    """获取应用实例"""
+    """获取应用实例，并发的首次调用得到同一个实例"""
     global _app
-    if _app is None:
-        _app = PanSearchApp(config_path)
-        await _app.initialize()
+    with _app_lock:
+        if _app is None:
+            _app = PanSearchApp(config_path)
+    await _app.initialize()
     return _app
 
 
+def get_loop_thread() -> LoopThread:
+    """获取运行全局应用的后台事件循环，首次调用时启动，进程退出时关闭应用"""
+    global _loop_thread
+    with _app_lock:
+        if _loop_thread is None:
+            _loop_thread = LoopThread(name="pan-search-loop").start()
+            atexit.register(_shutdown_loop_thread)
+    return _loop_thread
+
+
+def get_app_sync(config_path: str = "config.yaml") -> PanSearchApp:
+    """
+    在后台事件循环上获取并初始化应用，供同步代码（如Streamlit）使用
+    
+    应用的协程方法都应通过get_loop_thread().run / iterate提交到该循环执行。
+    """
+    return get_loop_thread().run(get_app(config_path))
+
+
+def _shutdown_loop_thread() -> None:
+    loop_thread = _loop_thread
+    if loop_thread is None or not loop_thread.is_running():
+        return
+    if _app is not None:
+        try:
+            loop_thread.run(_app.close(), timeout=5)
+        except Exception as e:
+            print(f"关闭应用失败: {e}")
+    loop_thread.stop()
+
+
 async def search(keyword: str, config_path: str = "config.yaml", **kwargs):
     """便捷搜索函数"""
     app = await get_app(config_path)
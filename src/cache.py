@@ -0,0 +1,307 @@
+"""
+进程内缓存，可选SQLite持久化层
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .models import SearchResponse
+from .disk_cache import (
+    DiskCache, get_store, encode_response, decode_response, encode_results, decode_results
+)
+
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    value: Any
+    expires_at: float
+    size: int
+    # 过期后仍可作为旧值返回的截止时间
+    stale_until: float = 0.0
+
+
+def normalize_keyword(keyword: str) -> str:
+    """规范化关键词：去除首尾空白、合并连续空白并忽略大小写"""
+    return " ".join(keyword.split()).casefold()
+
+
+def kwargs_key(kwargs: Dict[str, Any]) -> str:
+    """将扩展参数转换为稳定的缓存键片段"""
+    return json.dumps(kwargs, sort_keys=True, default=str) if kwargs else ""
+
+
+def estimate_results_size(results) -> int:
+    """粗略估算SearchResult列表占用的字节数"""
+    size = 64
+    for result in results:
+        size += 200 + len(result.title) * 2 + len(result.content) * 2
+        for link in result.links:
+            size += 120 + len(link.url) + len(link.password)
+        for tag in result.tags:
+            size += 50 + len(tag) * 2
+    return size
+
+
+def estimate_response_size(response: SearchResponse) -> int:
+    """粗略估算SearchResponse占用的字节数，分组链接按每条固定开销计"""
+    size = estimate_results_size(response.results)
+    if response.merged_by_type:
+        for links in response.merged_by_type.values():
+            # 分组链接只持有规范化后的链接并引用所属结果
+            size += 100 * len(links)
+    return size
+
+
+class TTLCache:
+    """
+    带过期时间的LRU缓存，同时按条目数与估算字节数淘汰
+    
+    设置disk后作为其前置的内存层：写入同时在磁盘缓存的写线程中落盘，内存未命中时
+    从磁盘读取并放回内存。事件循环中应使用aget/aget_with_state，磁盘读取在读线程中进行。
+    """
+    
+    def __init__(self, ttl: float, max_entries: int = 1000, max_bytes: int = 0,
+                 sizeof: Optional[Callable[[Any], int]] = None, stale_ttl: float = 0,
+                 disk=None):
+        self.ttl = ttl
+        # 过期后保留旧值的时长，0表示过期即删除
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # max_bytes为0表示不限制字节数
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        # 可选的持久化缓存层（DiskCache）
+        self.disk = disk
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _lookup_memory(self, key: Hashable) -> Optional[CacheEntry]:
+        """查找内存中未超过旧值保留期的条目"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if max(entry.expires_at, entry.stale_until) > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return entry
+                self._remove(key)
+        return None
+    
+    def _lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """查找未超过旧值保留期的条目，内存中没有时再同步查磁盘"""
+        entry = self._lookup_memory(key)
+        if entry is not None or self.disk is None:
+            return entry
+        try:
+            stored = self.disk.get_entry(key)
+        except Exception as e:
+            print(f"读取磁盘缓存失败: {e}")
+            return None
+        return self._load_stored(key, stored)
+    
+    async def _alookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """同_lookup，磁盘读取在读线程中进行"""
+        entry = self._lookup_memory(key)
+        if entry is not None or self.disk is None:
+            return entry
+        try:
+            stored = await self.disk.get_entry_async(key)
+        except Exception as e:
+            print(f"读取磁盘缓存失败: {e}")
+            return None
+        return self._load_stored(key, stored)
+    
+    def _load_stored(self, key: Hashable, stored: Optional[tuple]) -> Optional[CacheEntry]:
+        if stored is None:
+            return None
+        value, expires_at, stale_until, _ = stored
+        # 磁盘上保存的是墙钟时间，换算为单调时钟
+        offset = time.monotonic() - time.time()
+        entry = CacheEntry(value, expires_at + offset, self._sizeof(value), stale_until + offset)
+        with self._lock:
+            self.disk_hits += 1
+            self._insert(key, entry)
+        return entry
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取未过期的缓存值，未命中返回None"""
+        return self._count_get(self._lookup(key))
+    
+    async def aget(self, key: Hashable) -> Optional[Any]:
+        """同get，不在事件循环中读取磁盘"""
+        return self._count_get(await self._alookup(key))
+    
+    def _count_get(self, entry: Optional[CacheEntry]) -> Optional[Any]:
+        with self._lock:
+            if entry is None or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.value
+    
+    def get_with_state(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """获取缓存值及其是否已过期，过期但仍在旧值保留期内的条目同样返回"""
+        return self._count_get_with_state(self._lookup(key))
+    
+    async def aget_with_state(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """同get_with_state，不在事件循环中读取磁盘"""
+        return self._count_get_with_state(await self._alookup(key))
+    
+    def _count_get_with_state(self, entry: Optional[CacheEntry]) -> Tuple[Optional[Any], bool]:
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, False
+            stale = entry.expires_at <= time.monotonic()
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry.value, stale
+    
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """内存中条目距离过期的秒数（已过期为负数），不存在时返回None；不计入命中统计"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return entry.expires_at - time.monotonic()
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        if self.disk is not None:
+            # 编码与写入在磁盘缓存的写线程中进行
+            now = time.time()
+            self.disk.set_async(key, value, now + ttl, now + ttl + self.stale_ttl)
+        size = self._sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._insert(key, CacheEntry(value, expires_at, size, expires_at + self.stale_ttl))
+    
+    def _insert(self, key: Hashable, entry: CacheEntry) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定缓存"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.disk is not None:
+            self.disk.invalidate(key)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+    
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.stale_hits + self.misses
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.stale_hits) / total if total else 0.0,
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.get_stats()
+        return stats
+
+
+def disk_cache_from_config(config: Dict[str, Any], namespace: str, encode, decode):
+    """cache.backend为sqlite时创建指定命名空间的持久化缓存层，否则返回None"""
+    cache_config = config.get("cache", {}) or {}
+    if cache_config.get("backend", "memory") != "sqlite":
+        return None
+    store = get_store(
+        cache_config.get("sqlite_path", "cache/pan_search.db"),
+        vacuum_interval=cache_config.get("sqlite_vacuum_interval", 600),
+    )
+    return DiskCache(
+        store,
+        namespace,
+        encode,
+        decode,
+        max_entries=cache_config.get("sqlite_max_entries", 20000),
+        max_bytes=cache_config.get("sqlite_max_bytes", 0),
+    )
+
+
+class ResponseCache(TTLCache):
+    """SearchService使用的搜索响应缓存"""
+    
+    def __init__(self, ttl: float, max_entries: int = 1000, max_bytes: int = 0, disk=None):
+        super().__init__(ttl, max_entries, max_bytes, sizeof=estimate_response_size, disk=disk)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ResponseCache":
+        """根据配置创建响应缓存"""
+        cache_config = config.get("cache", {}) or {}
+        return cls(
+            ttl=config.get("cache_ttl", 300),
+            max_entries=cache_config.get("max_entries", 1000),
+            max_bytes=cache_config.get("max_bytes", 0),
+            disk=disk_cache_from_config(config, "response", encode_response, decode_response),
+        )
+
+
+class PluginResultCache(TTLCache):
+    """PluginManager使用的单插件结果缓存，支持按插件设置缓存时间"""
+    
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 5000,
+                 max_bytes: int = 0, plugin_ttls: Optional[Dict[str, float]] = None, disk=None):
+        super().__init__(ttl, max_entries, max_bytes, sizeof=estimate_results_size,
+                         stale_ttl=stale_ttl, disk=disk)
+        self.plugin_ttls = plugin_ttls or {}
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "PluginResultCache":
+        """根据配置创建插件结果缓存"""
+        cache_config = config.get("cache", {}) or {}
+        return cls(
+            ttl=cache_config.get("plugin_ttl", config.get("cache_ttl", 300)),
+            stale_ttl=cache_config.get("plugin_stale_ttl", 0),
+            max_entries=cache_config.get("plugin_max_entries", 5000),
+            max_bytes=cache_config.get("plugin_max_bytes", 0),
+            plugin_ttls=cache_config.get("plugin_ttls"),
+            disk=disk_cache_from_config(config, "plugin", encode_results, decode_results),
+        )
+    
+    def ttl_for(self, plugin_name: str) -> float:
+        """获取指定插件的缓存时间"""
+        return self.plugin_ttls.get(plugin_name, self.ttl)
@@ -0,0 +1,203 @@
+"""
+热门搜索缓存预热
+
+QueryTracker统计交互式搜索的关键词热度（按半衰期衰减），CacheWarmer在后台定期
+在热门关键词与配置的关注列表的响应缓存过期前重新搜索，使热门搜索始终命中缓存。
+"""
+import asyncio
+import heapq
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .cache import kwargs_key, normalize_keyword
+
+
+class QueryTracker:
+    """按缓存键统计搜索热度，热度随时间按半衰期衰减"""
+    
+    def __init__(self, half_life: float = 3600, max_tracked: int = 1000):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        # 缓存键 -> [热度, 更新时间, 关键词, 扩展参数]
+        self._queries: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+    
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        if self.half_life <= 0:
+            return score
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+    
+    def record(self, cache_key: Hashable, keyword: str, kwargs: Dict[str, Any]) -> None:
+        """记录一次搜索"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._queries.get(cache_key)
+            if entry is None:
+                self._queries[cache_key] = [1.0, now, keyword, dict(kwargs)]
+                if len(self._queries) > self.max_tracked:
+                    self._prune(now)
+            else:
+                entry[0] = self._decayed(entry[0], entry[1], now) + 1
+                entry[1] = now
+    
+    def _prune(self, now: float) -> None:
+        # 超出上限时一次淘汰热度最低的十分之一，避免每次记录都排序
+        keep = heapq.nlargest(
+            self.max_tracked * 9 // 10, self._queries.items(),
+            key=lambda item: self._decayed(item[1][0], item[1][1], now),
+        )
+        self._queries = dict(keep)
+    
+    def top(self, n: int, min_score: float = 0) -> List[Tuple[str, Dict[str, Any], float]]:
+        """热度最高的n个搜索，返回 (关键词, 扩展参数, 热度)"""
+        now = time.monotonic()
+        with self._lock:
+            scored = [
+                (keyword, kwargs, self._decayed(score, updated_at, now))
+                for score, updated_at, keyword, kwargs in self._queries.values()
+            ]
+        return heapq.nlargest(n, [item for item in scored if item[2] >= min_score], key=lambda item: item[2])
+    
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+class CacheWarmer:
+    """
+    后台缓存预热器
+    
+    每隔interval秒检查热门关键词与watchlist，对响应缓存不存在或将在refresh_ahead秒内
+    过期的关键词重新搜索。预热走批量搜索的调度器，每分钟最多max_per_minute次；
+    有交互式搜索正在进行时让路，本轮等待不到空闲则跳过。
+    """
+    
+    def __init__(self, search_service, interval: float = 60, top_n: int = 20, min_hits: float = 2,
+                 refresh_ahead: float = 90, max_per_minute: float = 6,
+                 watchlist: Optional[List[str]] = None):
+        self.service = search_service
+        self.interval = interval
+        self.top_n = top_n
+        self.min_hits = min_hits
+        self.refresh_ahead = refresh_ahead
+        self.max_per_minute = max_per_minute
+        self.watchlist = [k for k in (watchlist or []) if isinstance(k, str) and k.strip()]
+        self._task: Optional[asyncio.Task] = None
+        self._last_refresh = 0.0
+        self.runs = 0
+        self.refreshed = 0
+        # 因限速或让路未能在本轮完成而顺延的轮数
+        self.deferred = 0
+        self.failures = 0
+    
+    @classmethod
+    def from_config(cls, search_service, config: Dict[str, Any]) -> Optional["CacheWarmer"]:
+        """根据配置中的cache_warmer段创建预热器，未启用时返回None"""
+        warmer_config = config.get("cache_warmer", {}) or {}
+        if not warmer_config.get("enabled", False):
+            return None
+        return cls(
+            search_service,
+            interval=warmer_config.get("interval", 60),
+            top_n=warmer_config.get("top_n", 20),
+            min_hits=warmer_config.get("min_hits", 2),
+            refresh_ahead=warmer_config.get("refresh_ahead", 90),
+            max_per_minute=warmer_config.get("max_per_minute", 6),
+            watchlist=warmer_config.get("watchlist"),
+        )
+    
+    def start(self) -> None:
+        """在当前事件循环上启动后台任务，已在运行时不重复启动；在其他事件循环上运行时先取消原任务"""
+        loop = asyncio.get_running_loop()
+        task = self._task
+        if task is not None and not task.done():
+            if task.get_loop() is loop:
+                return
+            try:
+                task.get_loop().call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # 原事件循环已关闭，任务不会再运行
+                pass
+        self._task = loop.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """停止后台任务"""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.warm_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"缓存预热失败: {e}")
+    
+    def due_queries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """需要预热的 (关键词, 扩展参数)，关注列表在前，其后按热度排列"""
+        candidates = [(keyword, {}) for keyword in self.watchlist]
+        candidates += [(keyword, kwargs) for keyword, kwargs, _ in
+                       self.service.query_tracker.top(self.top_n, self.min_hits)]
+        due = []
+        seen = set()
+        for keyword, kwargs in candidates:
+            key = (normalize_keyword(keyword), kwargs_key(kwargs))
+            if key in seen:
+                continue
+            seen.add(key)
+            remaining = self.service.cache_ttl_remaining(keyword, kwargs)
+            if remaining is None or remaining <= self.refresh_ahead:
+                due.append((keyword, kwargs))
+        return due
+    
+    def _busy(self) -> bool:
+        """是否有交互式搜索（含渐进式搜索）正在进行，或有上游请求在排队"""
+        if self.service.interactive_in_flight > 0:
+            return True
+        return self.service.plugin_manager.get_scheduler_stats()["queued"] > 0
+    
+    async def warm_once(self) -> int:
+        """执行一轮预热，返回刷新的关键词数"""
+        self.runs += 1
+        refreshed = 0
+        round_deadline = time.monotonic() + self.interval
+        spacing = 60 / self.max_per_minute if self.max_per_minute > 0 else 0
+        for keyword, kwargs in self.due_queries():
+            # 限速，并等待交互式搜索结束
+            while True:
+                wait = self._last_refresh + spacing - time.monotonic()
+                if wait <= 0 and not self._busy():
+                    break
+                if time.monotonic() + max(wait, 1) > round_deadline:
+                    self.deferred += 1
+                    return refreshed
+                await asyncio.sleep(max(wait, 1))
+            self._last_refresh = time.monotonic()
+            try:
+                await self.service.search_many([keyword], bypass_cache=True, **kwargs)
+                refreshed += 1
+                self.refreshed += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"预热关键词 {keyword} 失败: {e}")
+        return refreshed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预热统计信息"""
+        return {
+            "tracked_queries": len(self.service.query_tracker),
+            "watchlist": len(self.watchlist),
+            "runs": self.runs,
+            "refreshed": self.refreshed,
+            "deferred": self.deferred,
+            "failures": self.failures,
+        }
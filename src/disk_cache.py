@@ -0,0 +1,396 @@
+"""
+基于SQLite的持久化缓存，作为进程内缓存的第二级，重启后仍可命中
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .models import Link, MergedLink, SearchResponse, SearchResult
+
+
+def _ts(value: Optional[datetime]) -> Optional[str]:
+    # 带时区的时间统一转为UTC保存，不带时区的原样保存，读回后与内存中的一致
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat()
+
+
+def _dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _pack(data: Any) -> bytes:
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _result_row(result: SearchResult) -> list:
+    # 按位置而非字段名序列化，去掉重复的键名
+    return [
+        result.message_id, result.unique_id, result.channel, _ts(result.datetime),
+        result.title, result.content,
+        [[link.type, link.url, link.password] for link in result.links],
+        result.tags,
+    ]
+
+
+def _result_from_row(row: list) -> SearchResult:
+    message_id, unique_id, channel, ts, title, content, links, tags = row
+    return SearchResult(
+        message_id=message_id,
+        unique_id=unique_id,
+        channel=channel,
+        datetime=_dt(ts),
+        title=title,
+        content=content,
+        links=[Link(type=t, url=u, password=p) for t, u, p in links],
+        tags=tags,
+    )
+
+
+def encode_results(results: List[SearchResult]) -> bytes:
+    """将插件结果列表编码为压缩的紧凑格式"""
+    return _pack([_result_row(result) for result in results])
+
+
+def decode_results(blob: bytes) -> List[SearchResult]:
+    """解码encode_results的输出"""
+    return [_result_from_row(row) for row in _unpack(blob)]
+
+
+def encode_response(response: SearchResponse) -> bytes:
+    """将搜索响应编码为压缩的紧凑格式"""
+    merged = None
+    if response.merged_by_type is not None:
+        # 分组链接所属的结果按其在results中的位置保存
+        positions = {id(result): i for i, result in enumerate(response.results)}
+        merged = {
+            link_type: [[m.url, m.password, positions.get(id(m.result))] for m in links]
+            for link_type, links in response.merged_by_type.items()
+        }
+    return _pack([
+        response.total,
+        [_result_row(result) for result in response.results],
+        merged,
+        response.pending,
+        response.timed_out,
+        response.failed,
+    ])
+
+
+def decode_response(blob: bytes) -> SearchResponse:
+    """解码encode_response的输出"""
+    total, rows, merged, pending, timed_out, failed = _unpack(blob)
+    results = [_result_from_row(row) for row in rows]
+    merged_by_type = None
+    if merged is not None:
+        merged_by_type = {
+            link_type: [
+                MergedLink(url=url, password=password, result=results[index] if index is not None else None)
+                for url, password, index in links
+            ]
+            for link_type, links in merged.items()
+        }
+    return SearchResponse(
+        total=total,
+        results=results,
+        merged_by_type=merged_by_type,
+        pending=pending,
+        timed_out=timed_out,
+        failed=failed,
+    )
+
+
+class SQLiteStore:
+    """
+    缓存数据库，WAL模式，多个缓存按命名空间共用一个文件
+    
+    写入连接在线程间共享并由锁保护，异步写入在单独的写线程中串行执行；
+    读取在读线程池中进行，每个读线程使用自己的连接，WAL模式下不等待写入与清理。
+    后台线程定期清理过期条目并回收空间。
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            ns TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            stale_until REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (ns, key)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS entries_lru ON entries (ns, accessed_at, size);
+        CREATE INDEX IF NOT EXISTS entries_stale ON entries (stale_until);
+    """
+    
+    def __init__(self, path: str, vacuum_interval: float = 600, read_workers: int = 2):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.vacuum_interval = vacuum_interval
+        self.vacuum_runs = 0
+        self.last_vacuum = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+        self._reader = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="cache-reader")
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        # 增量回收需要在建表前设置
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._stop = threading.Event()
+        self._vacuum_thread: Optional[threading.Thread] = None
+        if vacuum_interval > 0:
+            self._vacuum_thread = threading.Thread(target=self._vacuum_loop, name="cache-vacuum", daemon=True)
+            self._vacuum_thread.start()
+    
+    def execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """执行一条语句并返回全部结果行"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """在当前线程自己的连接上执行只读查询"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), isolation_level=None)
+            self._local.conn = conn
+        return conn.execute(sql, params).fetchall()
+    
+    async def run_read(self, func: Callable[..., Any], *args) -> Any:
+        """在读线程池中执行func，不阻塞事件循环"""
+        return await asyncio.get_running_loop().run_in_executor(self._reader, func, *args)
+    
+    def submit_write(self, func: Callable[..., Any], *args) -> Future:
+        """在写线程中执行func并立即返回，写入按提交顺序进行"""
+        return self._writer.submit(self._write_logged, func, *args)
+    
+    @staticmethod
+    def _write_logged(func: Callable[..., Any], *args) -> None:
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"写入磁盘缓存失败: {e}")
+    
+    def vacuum(self) -> int:
+        """删除已超过旧值保留期的条目并回收空闲页，返回删除的条目数"""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM entries WHERE stale_until <= ?", (time.time(),)).rowcount
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        # 各命名空间据此重新统计条目数与字节数
+        self.vacuum_runs += 1
+        self.last_vacuum = time.time()
+        return deleted
+    
+    def _vacuum_loop(self) -> None:
+        while not self._stop.wait(self.vacuum_interval):
+            try:
+                self.vacuum()
+            except sqlite3.Error as e:
+                print(f"缓存清理失败: {e}")
+    
+    def close(self) -> None:
+        """等待已提交的写入完成，停止后台清理并关闭连接"""
+        self._stop.set()
+        if self._vacuum_thread is not None:
+            self._vacuum_thread.join(timeout=5)
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+_stores: Dict[str, SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, vacuum_interval: float = 600) -> SQLiteStore:
+    """获取指定路径的缓存数据库，同一文件在进程内只打开一次"""
+    resolved = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.get(resolved)
+        if store is None:
+            store = SQLiteStore(resolved, vacuum_interval)
+            _stores[resolved] = store
+        return store
+
+
+def close_stores() -> None:
+    """关闭所有已打开的缓存数据库"""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+class DiskCache:
+    """
+    SQLiteStore中一个命名空间的缓存，超出容量时淘汰最久未访问的条目
+    
+    条目数与字节数在写线程中增量维护，写入时不再扫描整个命名空间；
+    后台清理删除过期条目后重新统计一次。
+    """
+    
+    def __init__(self, store: SQLiteStore, namespace: str,
+                 encode: Callable[[Any], bytes], decode: Callable[[bytes], Any],
+                 max_entries: int = 20000, max_bytes: int = 0):
+        self.store = store
+        self.namespace = namespace
+        self._encode = encode
+        self._decode = decode
+        self.max_entries = max_entries
+        # max_bytes为0表示不限制字节数
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # 条目数与字节数，None表示需要重新统计；统计时对应的清理次数
+        self._count: Optional[int] = None
+        self._bytes = 0
+        self._counted_at_vacuum = -1
+    
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, ensure_ascii=False, default=str)
+    
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float, float, int]]:
+        """
+        读取仍在旧值保留期内的条目，可在任意线程调用
+        
+        Returns:
+            (值, 过期时间, 旧值保留截止时间, 大小)，时间为time.time()；不存在时返回None
+        """
+        now = time.time()
+        db_key = self._key(key)
+        rows = self.store.query(
+            "SELECT value, expires_at, stale_until, size FROM entries WHERE ns = ? AND key = ? AND stale_until > ?",
+            (self.namespace, db_key, now),
+        )
+        if not rows:
+            return None
+        blob, expires_at, stale_until, size = rows[0]
+        try:
+            value = self._decode(blob)
+        except Exception as e:
+            # 格式不兼容的旧条目直接丢弃
+            print(f"缓存条目解码失败: {e}")
+            self.store.submit_write(self._delete, db_key)
+            return None
+        self.store.submit_write(self._touch, db_key, now)
+        return value, expires_at, stale_until, size
+    
+    async def get_entry_async(self, key: Hashable) -> Optional[Tuple[Any, float, float, int]]:
+        """在读线程中执行get_entry"""
+        return await self.store.run_read(self.get_entry, key)
+    
+    def set(self, key: Hashable, value: Any, expires_at: float, stale_until: float) -> None:
+        """写入条目并按需淘汰，时间为time.time()；同步执行，异步场景使用set_async"""
+        blob = self._encode(value)
+        if self.max_bytes and len(blob) > self.max_bytes:
+            return
+        db_key = self._key(key)
+        self._ensure_counted()
+        old = self.store.execute("SELECT size FROM entries WHERE ns = ? AND key = ?", (self.namespace, db_key))
+        self.store.execute(
+            "INSERT OR REPLACE INTO entries (ns, key, value, size, expires_at, stale_until, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, db_key, blob, len(blob), expires_at, stale_until, time.time()),
+        )
+        if old:
+            self._bytes -= old[0][0]
+        else:
+            self._count += 1
+        self._bytes += len(blob)
+        self._evict()
+    
+    def set_async(self, key: Hashable, value: Any, expires_at: float, stale_until: float) -> None:
+        """在写线程中编码并写入条目，立即返回"""
+        self.store.submit_write(self.set, key, value, expires_at, stale_until)
+    
+    def _touch(self, db_key: str, accessed_at: float) -> None:
+        self.store.execute(
+            "UPDATE entries SET accessed_at = ? WHERE ns = ? AND key = ?",
+            (accessed_at, self.namespace, db_key),
+        )
+    
+    def _ensure_counted(self) -> None:
+        if self._count is not None and self._counted_at_vacuum == self.store.vacuum_runs:
+            return
+        self._counted_at_vacuum = self.store.vacuum_runs
+        self._count, self._bytes = self.store.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE ns = ?", (self.namespace,)
+        )[0]
+    
+    def _over_limit(self) -> bool:
+        return self._count > self.max_entries or bool(self.max_bytes and self._bytes > self.max_bytes)
+    
+    def _evict(self) -> None:
+        # 按最久未访问顺序分批淘汰，每批一条语句，直到条目数与字节数都不超限
+        while self._over_limit():
+            batch = max(1, self._count - self.max_entries)
+            if self.max_bytes and self._bytes > self.max_bytes and self._count:
+                # 按平均大小估算需要淘汰的条数
+                average = max(1, self._bytes // self._count)
+                batch = max(batch, -(-(self._bytes - self.max_bytes) // average))
+            rows = self.store.execute(
+                "DELETE FROM entries WHERE ns = ? AND key IN "
+                "(SELECT key FROM entries WHERE ns = ? ORDER BY accessed_at LIMIT ?) RETURNING size",
+                (self.namespace, self.namespace, batch),
+            )
+            if not rows:
+                self._count = None
+                return
+            self._count -= len(rows)
+            self._bytes -= sum(size for size, in rows)
+            self.evictions += len(rows)
+    
+    def _delete(self, db_key: str) -> None:
+        rows = self.store.execute("DELETE FROM entries WHERE ns = ? AND key = ? RETURNING size",
+                                  (self.namespace, db_key))
+        if rows and self._count is not None:
+            self._count -= 1
+            self._bytes -= rows[0][0]
+    
+    def invalidate(self, key: Hashable) -> None:
+        """在写线程中删除指定条目，排在此前提交的写入之后"""
+        self.store.submit_write(self._delete, self._key(key))
+    
+    def _clear(self) -> None:
+        self.store.execute("DELETE FROM entries WHERE ns = ?", (self.namespace,))
+        self._count, self._bytes = 0, 0
+    
+    def clear(self) -> None:
+        """在写线程中清空该命名空间"""
+        self.store.submit_write(self._clear)
+    
+    def flush(self) -> None:
+        """等待此前提交的写入完成"""
+        self.store.submit_write(lambda: None).result()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取磁盘缓存统计信息"""
+        count, total = self.store.query(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE ns = ?", (self.namespace,)
+        )[0]
+        return {
+            "path": str(self.store.path),
+            "entries": count,
+            "bytes": total,
+            "evictions": self.evictions,
+            "vacuum_runs": self.store.vacuum_runs,
+        }
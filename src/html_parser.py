@@ -0,0 +1,166 @@
+"""
+HTML解析后端
+
+按 selectolax(lexbor) > lxml > html.parser 的顺序选用已安装的解析器，插件只通过
+select_containers 取得结果容器元素，再在容器内用CSS选择器取值，不直接依赖具体解析库。
+"""
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+_backend: Optional[str] = None
+
+
+def available_backends() -> List[str]:
+    """已安装的解析后端，按速度从快到慢排列"""
+    available = []
+    if LexborHTMLParser is not None:
+        available.append("selectolax")
+    if HAS_LXML:
+        available.append("lxml")
+    available.append("html.parser")
+    return available
+
+
+def set_backend(name: str = "auto") -> str:
+    """
+    选择解析后端，auto或未安装时使用可用的最快后端
+    
+    Returns:
+        实际使用的后端名称
+    """
+    global _backend
+    available = available_backends()
+    if name not in (None, "auto") and name not in available:
+        print(f"HTML解析后端 {name} 不可用，改用 {available[0]}")
+    _backend = name if name in available else available[0]
+    return _backend
+
+
+def get_backend() -> str:
+    """当前使用的解析后端"""
+    return _backend or set_backend()
+
+
+class Element(ABC):
+    """解析后端无关的元素接口"""
+    
+    __slots__ = ()
+    
+    @abstractmethod
+    def select_one(self, css: str) -> Optional["Element"]:
+        """第一个匹配CSS选择器的子元素，没有时返回None"""
+        pass
+    
+    @abstractmethod
+    def select(self, css: str) -> List["Element"]:
+        """所有匹配CSS选择器的子元素"""
+        pass
+    
+    @abstractmethod
+    def attr(self, name: str, default: Any = None) -> Any:
+        """属性值，不存在时返回default"""
+        pass
+    
+    @abstractmethod
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        """元素内的全部文本，各文本节点以separator连接"""
+        pass
+
+
+class _SoupElement(Element):
+    __slots__ = ("node",)
+    
+    def __init__(self, node):
+        self.node = node
+    
+    def select_one(self, css: str) -> Optional[Element]:
+        node = self.node.select_one(css)
+        return _SoupElement(node) if node is not None else None
+    
+    def select(self, css: str) -> List[Element]:
+        return [_SoupElement(node) for node in self.node.select(css)]
+    
+    def attr(self, name: str, default: Any = None) -> Any:
+        return self.node.get(name, default)
+    
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self.node.get_text(separator=separator, strip=strip)
+
+
+class _LexborElement(Element):
+    __slots__ = ("node",)
+    
+    def __init__(self, node):
+        self.node = node
+    
+    def select_one(self, css: str) -> Optional[Element]:
+        node = self.node.css_first(css)
+        return _LexborElement(node) if node is not None else None
+    
+    def select(self, css: str) -> List[Element]:
+        return [_LexborElement(node) for node in self.node.css(css)]
+    
+    def attr(self, name: str, default: Any = None) -> Any:
+        value = self.node.attributes.get(name, default)
+        return default if value is None else value
+    
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        if not strip:
+            return self.node.text(deep=True, separator=separator)
+        # selectolax去除空白后仍以separator连接空的文本节点，与BeautifulSoup不一致，这里跳过
+        parts = (node.text_content.strip() for node in self.node.traverse(include_text=True) if node.tag == "-text")
+        return separator.join(part for part in parts if part)
+
+
+def _restrict(html: str, class_name: str) -> str:
+    """从第一个容器开始截取页面，跳过页头的样式、脚本与导航，页面中没有容器时返回空串"""
+    index = html.find(class_name)
+    if index == -1:
+        return ""
+    start = html.rfind("<", 0, index)
+    return html[start:] if start != -1 else html
+
+
+def select_containers(html: str, class_name: str, tag: Optional[str] = None,
+                      backend: Optional[str] = None) -> List[Element]:
+    """
+    只解析页面中带指定class的容器元素（含其子元素）
+    
+    Args:
+        html: 页面源码
+        class_name: 容器的class
+        tag: 容器的标签名，None表示任意标签
+        backend: 解析后端，默认使用set_backend选定的后端
+    """
+    html = _restrict(html, class_name)
+    if not html:
+        return []
+    backend = backend or get_backend()
+    if backend == "selectolax":
+        tree = LexborHTMLParser(html)
+        return [_LexborElement(node) for node in tree.css(f"{tag or ''}.{class_name}")]
+    # BeautifulSoup只为匹配的容器建树；解析阶段class尚未拆分为列表，需自行匹配
+    def has_class(value) -> bool:
+        if not value:
+            return False
+        return class_name in (value.split() if isinstance(value, str) else value)
+    
+    strainer = SoupStrainer(tag, attrs={"class": has_class})
+    soup = BeautifulSoup(html, "lxml" if backend == "lxml" else "html.parser", parse_only=strainer)
+    return [_SoupElement(node) for node in soup.find_all(tag, class_=class_name)]
@@ -0,0 +1,211 @@
+"""
+共享HTTP客户端，为所有插件提供长连接池
+"""
+import asyncio
+import contextlib
+import json
+from typing import Optional, Dict, Any
+
+import aiohttp
+
+from . import json_decoder
+from .cache import TTLCache
+from .singleflight import SingleFlight
+
+
+class HttpClient:
+    """应用级HTTP客户端，持有一个aiohttp会话及其连接池"""
+    
+    DEFAULT_TIMEOUT = 10
+    
+    def __init__(self, pool_size: int = 100, pool_size_per_host: int = 10,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 60,
+                 timeout: float = DEFAULT_TIMEOUT, dedupe_ttl: float = 10,
+                 dedupe_max_entries: int = 256):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 由PluginManager设置的请求调度器，限制全局与单主机并发
+        self.scheduler = None
+        # 由PluginManager设置的瞬时故障重试策略
+        self.retry_policy = None
+        # 合并相同的在途请求，并在dedupe_ttl秒内复用响应体
+        self.flights = SingleFlight()
+        self.payload_cache = TTLCache(ttl=dedupe_ttl, max_entries=dedupe_max_entries)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HttpClient":
+        """根据配置中的http段创建客户端"""
+        http_config = config.get("http", {}) or {}
+        return cls(
+            pool_size=http_config.get("pool_size", 100),
+            pool_size_per_host=http_config.get("pool_size_per_host", 10),
+            dns_cache_ttl=http_config.get("dns_cache_ttl", 300),
+            keepalive_timeout=http_config.get("keepalive_timeout", 60),
+            timeout=config.get("plugins", {}).get("timeout", cls.DEFAULT_TIMEOUT),
+            dedupe_ttl=http_config.get("dedupe_ttl", 10),
+            dedupe_max_entries=http_config.get("dedupe_max_entries", 256),
+        )
+    
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环上的会话，必要时创建"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and (self._loop is not loop or self._session.closed):
+            # 会话绑定在创建它的事件循环上，循环变化后只能重建
+            await self._discard_session()
+        if self._session is None:
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+    
+    async def _discard_session(self) -> None:
+        """丢弃无法在当前循环上继续使用的会话"""
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # 在会话所属的循环上关闭，不等待其完成
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        try:
+            await session.close()
+        except RuntimeError:
+            # 原循环已关闭，底层连接随之失效
+            pass
+    
+    def _request_timeout(self, timeout: Optional[float]) -> Optional[aiohttp.ClientTimeout]:
+        if timeout is None:
+            return None
+        return aiohttp.ClientTimeout(total=timeout)
+    
+    async def _request(self, method: str, url: str, decode: str, timeout: Optional[float] = None,
+                       idempotent: Optional[bool] = None,
+                       schema: Optional[json_decoder.Schema] = None, **kwargs) -> Any:
+        """
+        发送请求并按decode解码响应体，JSON响应可按schema只解码需要的字段
+        
+        幂等请求（默认仅GET）会与相同的在途请求合并，成功解码的响应体在dedupe_ttl秒内
+        直接复用，多个插件请求同一地址时只访问一次上游。共享的是响应体而非解码结果，
+        每个调用方各自解码，修改得到的对象不影响其他调用方。
+        """
+        if idempotent is None:
+            idempotent = method == "GET"
+        if not idempotent:
+            return self._decode(await self._fetch(method, url, decode, timeout, idempotent, **kwargs),
+                                decode, schema)
+        
+        key = self._dedupe_key(method, url, decode, schema, kwargs)
+        body = self.payload_cache.get(key)
+        if body is not None:
+            return self._decode(body, decode, schema)
+        body = await self.flights.do(key, lambda: self._fetch(method, url, decode, timeout, idempotent, **kwargs))
+        payload = self._decode(body, decode, schema)
+        # 解码成功后才复用，格式错误的响应体不缓存
+        self.payload_cache.set(key, body)
+        return payload
+    
+    @staticmethod
+    def _decode(body: Any, decode: str, schema: Optional[json_decoder.Schema]) -> Any:
+        if decode == "json":
+            return json_decoder.decode(body, schema)
+        return body
+    
+    async def _fetch(self, method: str, url: str, decode: str, timeout: Optional[float],
+                     idempotent: bool, **kwargs) -> Any:
+        """
+        实际发送请求并返回响应体，decode为json时为bytes，否则为文本，经过调度器限制并发
+        
+        幂等请求遇到瞬时故障时按重试策略重试，每次尝试单独占用调度名额。
+        """
+        async def attempt():
+            session = await self.get_session()
+            async with self._slot(url):
+                async with session.request(method, url, timeout=self._request_timeout(timeout),
+                                           **kwargs) as resp:
+                    resp.raise_for_status()
+                    if decode == "json":
+                        # 部分接口返回的Content-Type不是application/json，不检查直接解码
+                        return await resp.read()
+                    return await resp.text()
+        
+        if self.retry_policy is None or not idempotent:
+            return await attempt()
+        return await self.retry_policy.call(attempt)
+    
+    @staticmethod
+    def _dedupe_key(method: str, url: str, decode: str, schema: Optional[json_decoder.Schema],
+                    kwargs: Dict[str, Any]) -> tuple:
+        """请求合并键，请求头只影响上游识别客户端，不参与比较"""
+        params = kwargs.get("params")
+        body = kwargs.get("json")
+        return (
+            method,
+            url,
+            decode,
+            schema.name if schema is not None else "",
+            tuple(sorted((str(k), str(v)) for k, v in params.items())) if params else (),
+            json.dumps(body, sort_keys=True, default=str) if body is not None else "",
+        )
+    
+    def _slot(self, url: str):
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.slot(url)
+    
+    async def get_json(self, url: str, headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None,
+                       schema: Optional[json_decoder.Schema] = None) -> Any:
+        """GET请求并解析JSON，忽略响应的Content-Type；指定schema时只解码其中声明的字段"""
+        return await self._request("GET", url, "json", timeout, schema=schema,
+                                   headers=headers, params=params)
+    
+    async def post_json(self, url: str, json: Any = None,
+                        headers: Optional[Dict[str, str]] = None,
+                        timeout: Optional[float] = None, idempotent: bool = False,
+                        schema: Optional[json_decoder.Schema] = None) -> Any:
+        """POST JSON请求并解析JSON响应，只读的查询接口可设置idempotent=True以允许重试"""
+        return await self._request("POST", url, "json", timeout, idempotent=idempotent,
+                                   schema=schema, json=json, headers=headers)
+    
+    async def get_text(self, url: str, headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None) -> str:
+        """GET请求并返回文本"""
+        return await self._request("GET", url, "text", timeout, headers=headers, params=params)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取请求合并与响应复用统计信息"""
+        return {
+            "singleflight": self.flights.get_stats(),
+            "payload_cache": self.payload_cache.get_stats(),
+        }
+    
+    async def close(self) -> None:
+        """关闭会话并释放连接池"""
+        if self._session is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            await self._session.close()
+            self._session = None
+            self._loop = None
+        else:
+            await self._discard_session()
@@ -0,0 +1,139 @@
+"""
+JSON响应解码
+
+优先使用已安装的 orjson / msgspec，均未安装时使用标准库json。
+插件可为接口声明Schema，安装msgspec时只解码Schema中列出的字段，其余字段
+在解析时直接跳过，不创建Python对象。
+"""
+import json
+from typing import Any, List, Optional, TypedDict, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def get_backend() -> str:
+    """完整解码（loads）使用的JSON解码库"""
+    if orjson is not None:
+        return "orjson"
+    if msgspec is not None:
+        return "msgspec"
+    return "json"
+
+
+def get_schema_backend() -> str:
+    """按Schema解码使用的JSON解码库，未安装msgspec时与完整解码相同"""
+    return "msgspec" if msgspec is not None else get_backend()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """完整解码JSON，空响应体返回None"""
+    if not data.strip():
+        return None
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+class Schema:
+    """
+    接口响应结构，按TypedDict声明需要的字段
+    
+    解码结果仍是普通dict，插件照常用get取值。响应中的字段类型与声明不符时退回完整解码。
+    """
+    
+    __slots__ = ("name", "type", "_decoder")
+    
+    def __init__(self, name: str, type_: Any):
+        self.name = name
+        self.type = type_
+        self._decoder = None
+    
+    def decode(self, data: Union[bytes, str]) -> Any:
+        if msgspec is None or not data.strip():
+            return loads(data)
+        if self._decoder is None:
+            self._decoder = msgspec.json.Decoder(self.type)
+        try:
+            return self._decoder.decode(data)
+        except msgspec.ValidationError:
+            return loads(data)
+    
+    def __repr__(self) -> str:
+        return f"Schema({self.name!r})"
+
+
+def decode(data: Union[bytes, str], schema: Optional[Schema] = None) -> Any:
+    """按schema解码JSON，schema为None时完整解码"""
+    return schema.decode(data) if schema is not None else loads(data)
+
+
+# MacCMS资源站接口 /api.php/provide/vod?ac=detail，wanou、ouge、huban使用
+MacCMSItem = TypedDict("MacCMSItem", {
+    "vod_id": Any,
+    "vod_name": str,
+    "vod_year": Any,
+    "vod_area": str,
+    "vod_actor": str,
+    "vod_director": str,
+    "vod_remarks": str,
+    "vod_down_from": str,
+    "vod_down_url": str,
+}, total=False)
+
+MacCMSResponse = TypedDict("MacCMSResponse", {
+    "code": Any,
+    "list": List[MacCMSItem],
+}, total=False)
+
+MACCMS_VOD = Schema("maccms_vod", MacCMSResponse)
+
+# hunhepan /open/search/disk
+HunhepanItem = TypedDict("HunhepanItem", {
+    "disk_id": str,
+    "disk_name": str,
+    "disk_pass": str,
+    "disk_type": str,
+    "link": str,
+    "shared_time": str,
+    "files": str,
+}, total=False)
+
+HunhepanData = TypedDict("HunhepanData", {
+    "list": List[HunhepanItem],
+}, total=False)
+
+HunhepanResponse = TypedDict("HunhepanResponse", {
+    "code": Any,
+    "data": HunhepanData,
+}, total=False)
+
+HUNHEPAN_SEARCH = Schema("hunhepan_search", HunhepanResponse)
+
+# jikepan /search
+JikepanLink = TypedDict("JikepanLink", {
+    "service": str,
+    "link": str,
+    "pwd": str,
+}, total=False)
+
+JikepanItem = TypedDict("JikepanItem", {
+    "name": str,
+    "links": List[JikepanLink],
+}, total=False)
+
+JikepanResponse = TypedDict("JikepanResponse", {
+    "msg": Any,
+    "list": List[JikepanItem],
+}, total=False)
+
+JIKEPAN_SEARCH = Schema("jikepan_search", JikepanResponse)
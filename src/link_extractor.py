@@ -0,0 +1,116 @@
+"""
+网盘分享链接识别与提取
+
+所有网盘在PROVIDERS中登记一次，编译为单个正则交替式：提取时一次扫描即可
+同时找出各类链接与文本中的提取码，分类时只匹配链接开头的主机部分。
+"""
+import re
+from typing import List, Optional, Tuple
+
+from .models import Link
+
+
+# (链接类型, 主机正则, 分享路径正则)，按匹配优先级排列
+PROVIDERS: List[Tuple[str, str, str]] = [
+    ("baidu", r"(?:pan|yun)\.baidu\.com", r"/(?:s/[\w-]+|share/init\?surl=[\w-]+)"),
+    ("aliyun", r"(?:www\.)?(?:aliyundrive|alipan)\.com", r"/s/\w+"),
+    ("quark", r"pan\.quark\.cn", r"/s/\w+"),
+    ("uc", r"(?:drive|fast)\.uc\.cn", r"/s/\w+"),
+    ("xunlei", r"pan\.xunlei\.com", r"/s/[\w-]+"),
+    ("tianyi", r"(?:h5\.)?cloud\.189\.cn", r"/(?:t/\w+|web/share\?code=\w+|web/share\.html#/t/\w+)"),
+    ("115", r"(?:www\.)?(?:115|115cdn|anxia)\.com", r"/s/\w+"),
+    ("123", r"(?:www\.)?(?:123pan|123684|123865|123912)\.com", r"/s/[\w-]+"),
+    ("mobile", r"(?:caiyun|yun)\.139\.com", r"/[\w/#?=&.-]+"),
+    ("weiyun", r"share\.weiyun\.com", r"/\w+"),
+    ("lanzou", r"(?:[\w-]+\.)?lanzo[a-z]*\.com", r"/[\w-]+"),
+    ("jianguoyun", r"(?:www\.)?jianguoyun\.com", r"/p/[\w-]+"),
+    ("pikpak", r"mypikpak\.com", r"/s/\w+"),
+]
+
+# 不以http开头的链接
+SCHEME_PROVIDERS: List[Tuple[str, str]] = [
+    ("magnet", r"magnet:\?xt=urn:btih:[0-9a-zA-Z]{32,40}[^\s\"'<>]*"),
+    ("ed2k", r"ed2k://\|file\|[^\s\"'<>]+?\|/"),
+]
+
+# 链接中携带提取码的查询参数，如 ?pwd=abcd
+_QUERY = r"(?:\?[\w=&%.-]*)?"
+
+# 文本中写在链接旁的提取码，如 “提取码：abcd”、“密码: abcd”、“pwd=abcd”；
+# 英文关键词前不能紧跟字母，避免barcode、Xcode等单词被当作提取码
+_TEXT_PASSWORD = (r"(?:提取码|访问码|密码|口令|(?<![A-Za-z])(?:pwd|PWD|code))"
+                  r"\s*[:：=]?\s*(?P<pwd>[0-9A-Za-z]{4,8})(?![0-9A-Za-z])")
+
+_TYPES = [t for t, _, _ in PROVIDERS] + [t for t, _ in SCHEME_PROVIDERS]
+
+
+def _build_extract_pattern() -> "re.Pattern":
+    # 各分支末尾的空分组p<i>标记命中的网盘，http链接共用协议前缀，
+    # 且不使用IGNORECASE，以便正则引擎按首字符快速跳过无关文本
+    branches = [rf"{host}{path}{_QUERY}(?P<p{i}>)" for i, (_, host, path) in enumerate(PROVIDERS)]
+    alternatives = [rf"https?://(?:{'|'.join(branches)})"]
+    offset = len(PROVIDERS)
+    alternatives += [rf"{pattern}(?P<p{offset + i}>)" for i, (_, pattern) in enumerate(SCHEME_PROVIDERS)]
+    alternatives.append(_TEXT_PASSWORD)
+    return re.compile("|".join(alternatives))
+
+
+def _build_classify_pattern() -> "re.Pattern":
+    alternatives = [rf"(?P<p{i}>(?:https?://)?{host}(?![\w.-]))" for i, (_, host, _) in enumerate(PROVIDERS)]
+    offset = len(PROVIDERS)
+    alternatives += [rf"(?P<p{offset + i}>{pattern.split(':', 1)[0]}:)" for i, (_, pattern) in enumerate(SCHEME_PROVIDERS)]
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+_EXTRACT_RE = _build_extract_pattern()
+_CLASSIFY_RE = _build_classify_pattern()
+_URL_PASSWORD_RE = re.compile(r"[?&](?:pwd|password|passcode)=([0-9a-zA-Z]+)")
+
+
+def classify_url(url: str) -> str:
+    """根据链接的主机判断网盘类型，无法识别时返回空字符串"""
+    # 兼容MacCMS的“标题$链接”格式
+    m = _CLASSIFY_RE.match(url.strip().rsplit("$", 1)[-1])
+    if m is None:
+        return ""
+    return _TYPES[int(m.lastgroup[1:])]
+
+
+def extract_password(url: str) -> str:
+    """取出链接查询参数中的提取码，没有时返回空字符串"""
+    m = _URL_PASSWORD_RE.search(url)
+    return m.group(1) if m else ""
+
+
+def extract_links(text: str) -> List[Link]:
+    """
+    一次扫描提取文本中的所有分享链接
+    
+    文本中的提取码归属于紧邻其前（同一行或下一行）且尚无提取码的链接，
+    否则归属于其后的第一条没有提取码的链接。同一链接只保留第一次出现。
+    """
+    links: List[Link] = []
+    seen = set()
+    last_end = 0
+    pending_password: Optional[str] = None
+    for m in _EXTRACT_RE.finditer(text):
+        password = m.group("pwd")
+        if password is not None:
+            last = links[-1] if links else None
+            if last is not None and not last.password and text.count("\n", last_end, m.start()) <= 1:
+                last.password = password
+            else:
+                pending_password = password
+            continue
+        
+        url = m.group()
+        last_end = m.end()
+        if url in seen:
+            continue
+        seen.add(url)
+        link = Link(type=_TYPES[int(m.lastgroup[1:])], url=url, password=extract_password(url))
+        if pending_password and not link.password:
+            link.password = pending_password
+            pending_password = None
+        links.append(link)
+    return links
@@ -0,0 +1,291 @@
+"""
+本地全文索引：收录搜索过的结果，上游不可用时仍可从历史中检索
+"""
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .models import Link, SearchResult
+from .url_normalizer import normalize_link_url
+
+
+# 中日韩文字按二元组切分，其余按字母数字连续段切分
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def ngram_tokens(text: str, query: bool = False) -> List[str]:
+    """
+    将文本切分为索引词
+    
+    FTS5内置分词器会把连续的中文当作一个词，因此这里预先切成二元组；
+    建索引时额外保留每段的末字，使单字查询也能命中（见build_match_query）。
+    字母数字按词切分并忽略大小写。
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(text.casefold()):
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if not query:
+                tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def build_match_query(keyword: str) -> str:
+    """
+    将关键词转换为FTS5查询，所有词都需命中
+    
+    单个汉字按前缀匹配以二元组开头的位置，末字位置由建索引时保留的末字命中。
+    """
+    terms = []
+    for token in dict.fromkeys(ngram_tokens(keyword, query=True)):
+        if len(token) == 1 and _CJK_RE.match(token):
+            terms.append(f'"{token}"*')
+        else:
+            terms.append('"' + token.replace('"', '""') + '"')
+    return " AND ".join(terms)
+
+
+def content_key(result: SearchResult) -> str:
+    """
+    结果的内容键：来源 + 规范化后的链接地址
+    
+    插件的unique_id常取自结果在列表中的位置（如jikepan-0），不同查询的结果会重复，
+    不能作为索引的主键。
+    """
+    urls = sorted({normalize_link_url(link.url)[0] for link in result.links})
+    digest = hashlib.blake2b("\n".join([result.channel, *urls]).encode("utf-8"), digest_size=16)
+    return digest.hexdigest()
+
+
+class LocalIndex:
+    """
+    基于SQLite FTS5的搜索结果索引
+    
+    写入在单独的线程中串行执行，检索在专用的读线程池中执行，均不阻塞事件循环；
+    每个线程使用自己的连接，WAL模式下读写互不阻塞。写入时按条目数与收录时间淘汰旧结果。
+    结果按内容键（见content_key）去重，检索返回的unique_id为local-加内容键，
+    不会与在线插件的结果互相去重。
+    """
+    
+    DEFAULT_PATH = "cache/local_index.db"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY,
+            content_key TEXT NOT NULL UNIQUE,
+            unique_id TEXT NOT NULL,
+            message_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            datetime REAL,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            links TEXT NOT NULL,
+            tags TEXT NOT NULL,
+            indexed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_indexed_at ON results (indexed_at);
+        CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(tokens, tokenize='unicode61');
+    """
+    
+    # 表结构版本，记录在PRAGMA user_version中
+    SCHEMA_VERSION = 2
+    
+    # 按收录时间淘汰的检查间隔(秒)
+    PRUNE_INTERVAL = 300
+    
+    def __init__(self, path: str = DEFAULT_PATH, max_results: int = 50, max_entries: int = 200000,
+                 max_age: float = 0, read_workers: int = 2):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_results = max_results
+        # 最多保存的结果数与保存时长(秒)，0表示不限制
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.indexed = 0
+        self.queries = 0
+        self.pruned = 0
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-index")
+        self._reader = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="local-index-reader")
+        # 以下仅在写线程中访问；条目数为None表示尚未统计
+        self._count: Optional[int] = None
+        self._last_age_prune = 0.0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # 多个工作进程可能同时打开，建表与升级在同一个写事务中进行
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                # 旧版本按unique_id去重，不同结果已互相覆盖，无法修复，直接重建
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute("DROP TABLE IF EXISTS results_fts")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            for statement in self.SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["LocalIndex"]:
+        """根据配置中的local_index段创建索引，未启用时返回None"""
+        index_config = config.get("local_index", {}) or {}
+        if not index_config.get("enabled", False):
+            return None
+        return cls(
+            path=index_config.get("path", cls.DEFAULT_PATH),
+            max_results=index_config.get("max_results", 50),
+            max_entries=index_config.get("max_entries", 200000),
+            max_age=index_config.get("max_age_days", 0) * 86400,
+            read_workers=index_config.get("read_workers", 2),
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def add_async(self, results: Iterable[SearchResult]) -> None:
+        """在写线程中收录结果，立即返回"""
+        results = [r for r in results if r.unique_id and r.links]
+        if results:
+            self._writer.submit(self._add_logged, results)
+    
+    def _add_logged(self, results: List[SearchResult]) -> None:
+        try:
+            self.add(results)
+        except sqlite3.Error as e:
+            print(f"收录搜索结果失败: {e}")
+    
+    def add(self, results: Iterable[SearchResult]) -> int:
+        """收录结果，内容键相同的结果覆盖旧记录，超出限制时淘汰最早收录的结果，返回收录数"""
+        conn = self._connect()
+        now = time.time()
+        count = 0
+        added = 0
+        conn.execute("BEGIN")
+        try:
+            # 新行的id大于此前的最大id，覆盖的旧记录保留原id
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+            for result in results:
+                row = conn.execute(
+                    "INSERT INTO results (content_key, unique_id, message_id, channel, datetime, title, content, "
+                    "links, tags, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(content_key) DO UPDATE SET unique_id = excluded.unique_id, "
+                    "message_id = excluded.message_id, datetime = excluded.datetime, title = excluded.title, "
+                    "content = excluded.content, links = excluded.links, tags = excluded.tags, "
+                    "indexed_at = excluded.indexed_at "
+                    "RETURNING id",
+                    (
+                        content_key(result),
+                        result.unique_id,
+                        result.message_id,
+                        result.channel,
+                        result.datetime.timestamp() if result.datetime else None,
+                        result.title,
+                        result.content,
+                        json.dumps([[l.type, l.url, l.password] for l in result.links], ensure_ascii=False),
+                        json.dumps(result.tags, ensure_ascii=False),
+                        now,
+                    ),
+                ).fetchone()
+                tokens = " ".join(ngram_tokens(" ".join([result.title, result.content, *result.tags])))
+                conn.execute("DELETE FROM results_fts WHERE rowid = ?", (row[0],))
+                conn.execute("INSERT INTO results_fts (rowid, tokens) VALUES (?, ?)", (row[0], tokens))
+                count += 1
+                if row[0] > max_id:
+                    added += 1
+            self._prune(conn, now, added)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._count = None
+            raise
+        self.indexed += count
+        return count
+    
+    def _prune(self, conn: sqlite3.Connection, now: float, added: int) -> None:
+        """在写入事务中淘汰超过保存时长或超出条目数的最早收录的结果"""
+        if self._count is None:
+            self._count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        else:
+            self._count += added
+        ids: List[int] = []
+        if self.max_age > 0 and now - self._last_age_prune >= self.PRUNE_INTERVAL:
+            self._last_age_prune = now
+            ids += [row[0] for row in conn.execute(
+                "DELETE FROM results WHERE indexed_at < ? RETURNING id", (now - self.max_age,)
+            )]
+        excess = self._count - len(ids) - self.max_entries
+        if self.max_entries > 0 and excess > 0:
+            ids += [row[0] for row in conn.execute(
+                "DELETE FROM results WHERE id IN (SELECT id FROM results ORDER BY indexed_at LIMIT ?) RETURNING id",
+                (excess,),
+            )]
+        if ids:
+            conn.executemany("DELETE FROM results_fts WHERE rowid = ?", [(i,) for i in ids])
+            self._count -= len(ids)
+            self.pruned += len(ids)
+    
+    async def search_async(self, keyword: str, limit: Optional[int] = None) -> List[SearchResult]:
+        """在读线程池中检索，不占用默认线程池"""
+        return await asyncio.get_running_loop().run_in_executor(self._reader, self.search, keyword, limit)
+    
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[SearchResult]:
+        """按相关度检索历史结果，相关度相同的按时间倒序；时间以UTC返回，unique_id为local-加内容键"""
+        query = build_match_query(keyword)
+        if not query:
+            return []
+        self.queries += 1
+        rows = self._connect().execute(
+            "SELECT r.content_key, r.message_id, r.channel, r.datetime, r.title, r.content, r.links, r.tags "
+            "FROM results_fts JOIN results r ON r.id = results_fts.rowid "
+            "WHERE results_fts MATCH ? ORDER BY results_fts.rank, r.datetime DESC LIMIT ?",
+            (query, limit or self.max_results),
+        ).fetchall()
+        return [
+            SearchResult(
+                unique_id=f"local-{key}",
+                message_id=message_id,
+                channel=channel,
+                datetime=datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None,
+                title=title,
+                content=content,
+                links=[Link(type=t, url=u, password=p) for t, u, p in json.loads(links)],
+                tags=json.loads(tags),
+            )
+            for key, message_id, channel, ts, title, content, links, tags in rows
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        total = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "entries": total,
+            "indexed": self.indexed,
+            "queries": self.queries,
+            "pruned": self.pruned,
+        }
+    
+    def close(self) -> None:
+        """等待写入完成并停止读写线程"""
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
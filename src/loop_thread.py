@@ -0,0 +1,106 @@
+"""
+后台事件循环线程
+
+Streamlit在各自的脚本线程中运行页面，若每次搜索都用asyncio.run新建事件循环，
+绑定在循环上的资源（aiohttp会话、后台刷新任务等）都无法跨请求保留。
+LoopThread在专用线程中长期运行一个事件循环，同步代码通过它线程安全地提交协程。
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+
+_DONE = object()
+
+
+class LoopThread:
+    """在专用守护线程中持续运行的事件循环"""
+    
+    def __init__(self, name: str = "event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.start()._loop
+    
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> "LoopThread":
+        """启动线程并等待事件循环就绪，重复调用无副作用"""
+        with self._lock:
+            if self.is_running():
+                return self
+            ready = threading.Event()
+            loop = asyncio.new_event_loop()
+            
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                try:
+                    loop.run_forever()
+                finally:
+                    loop.close()
+            
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            return self
+    
+    def submit(self, coro: Coroutine) -> Future:
+        """将协程提交到后台循环执行，可在任意线程调用"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        在后台循环中执行协程并阻塞等待结果
+        
+        超时或调用方被中断时取消后台的协程。不能在后台循环线程内调用，否则会死锁。
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在后台事件循环线程中同步等待协程")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+    
+    def iterate(self, agen: AsyncIterator, timeout: Optional[float] = None) -> Iterator:
+        """
+        在当前线程中同步迭代后台循环上的异步生成器
+        
+        调用方提前结束迭代时，在后台循环上关闭生成器，释放其持有的任务。
+        timeout为单个元素的等待时间。
+        """
+        async def next_item():
+            try:
+                return await agen.__anext__()
+            except StopAsyncIteration:
+                return _DONE
+        
+        try:
+            while True:
+                item = self.run(next_item(), timeout)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            aclose = getattr(agen, "aclose", None)
+            if aclose is not None and self.is_running():
+                self.submit(aclose())
+    
+    def stop(self, timeout: Optional[float] = 5) -> None:
+        """停止事件循环并等待线程退出"""
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            if thread is None or not thread.is_alive():
+                return
+            loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
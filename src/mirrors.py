@@ -0,0 +1,128 @@
+"""
+多镜像对冲请求：主镜像先发，超过对冲延迟或已知不健康时再发备用镜像，取最先返回的有效结果
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class Mirror:
+    """单个镜像的健康状况，跨查询保留"""
+    
+    # 延迟指数滑动平均的权重
+    EWMA_ALPHA = 0.3
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+        self.successes = 0
+        self.failures = 0
+    
+    def is_healthy(self, recovery: float) -> bool:
+        """最近一次请求失败且尚未过恢复期的镜像视为不健康"""
+        if self.consecutive_failures == 0:
+            return True
+        return time.monotonic() - self.last_failure >= recovery
+    
+    def record_success(self, latency: float) -> None:
+        self.consecutive_failures = 0
+        self.successes += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * self.latency
+    
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.failures += 1
+        self.last_failure = time.monotonic()
+
+
+class MirrorPool:
+    """一组可互相替代的镜像地址"""
+    
+    def __init__(self, urls: List[str], hedge_delay: float = 1.0, recovery: float = 60):
+        self.mirrors = [Mirror(url) for url in urls]
+        self.hedge_delay = hedge_delay
+        self.recovery = recovery
+    
+    def ordered(self) -> List[Mirror]:
+        """健康的镜像在前并按延迟升序，不健康的镜像在后"""
+        def sort_key(mirror: Mirror):
+            healthy = mirror.is_healthy(self.recovery)
+            latency = mirror.latency if mirror.latency is not None else float("inf")
+            return (not healthy, latency)
+        # sorted是稳定排序，未测得延迟时保持配置顺序
+        return sorted(self.mirrors, key=sort_key)
+    
+    async def race(self, fetch: Callable[[str], Awaitable[Any]],
+                   is_valid: Callable[[Any], bool] = lambda result: True) -> Any:
+        """
+        对冲请求各镜像，返回最先到达的有效结果并取消其余请求
+        
+        Args:
+            fetch: 以镜像地址为参数的请求函数
+            is_valid: 判断结果是否有效，无效结果按失败处理并立即尝试下一个镜像
+        
+        Returns:
+            最先到达的有效结果；全部失败时抛出最后一个异常，全部无效时返回最后一个结果
+        """
+        order = self.ordered()
+        running: Dict[asyncio.Task, tuple] = {}
+        next_index = 0
+        last_error: Optional[BaseException] = None
+        last_result = None
+        
+        def launch_next() -> None:
+            nonlocal next_index
+            while next_index < len(order):
+                mirror = order[next_index]
+                next_index += 1
+                task = asyncio.create_task(fetch(mirror.url))
+                running[task] = (mirror, time.monotonic())
+                # 已知不健康的镜像不等对冲延迟，立即并发请求下一个
+                if mirror.is_healthy(self.recovery):
+                    return
+        
+        launch_next()
+        try:
+            while running:
+                timeout = self.hedge_delay if next_index < len(order) else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 超过对冲延迟仍无结果，追加请求下一个镜像
+                    launch_next()
+                    continue
+                for task in done:
+                    mirror, start_time = running.pop(task)
+                    if task.exception() is None and is_valid(task.result()):
+                        mirror.record_success(time.monotonic() - start_time)
+                        return task.result()
+                    mirror.record_failure()
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                    else:
+                        last_result = task.result()
+                launch_next()
+        finally:
+            for task in running:
+                task.cancel()
+        
+        if last_error is not None and last_result is None:
+            raise last_error
+        return last_result
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """获取各镜像的健康状况"""
+        return [
+            {
+                "url": mirror.url,
+                "healthy": mirror.is_healthy(self.recovery),
+                "latency": mirror.latency,
+                "successes": mirror.successes,
+                "failures": mirror.failures,
+            }
+            for mirror in self.mirrors
+        ]
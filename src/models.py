@@ -1,20 +1,25 @@
 """
 数据模型定义
 """
+import sys
 from datetime import datetime
 from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class Link:
     """下载链接模型"""
     type: str
     url: str
     password: str = ""
+    
+    def __post_init__(self):
+        # 链接类型只有十几种取值，驻留后所有结果共用同一个字符串
+        self.type = sys.intern(self.type)
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """搜索结果模型"""
     message_id: str = ""
@@ -25,16 +30,32 @@ class SearchResult:
     content: str = ""
     links: List[Link] = field(default_factory=list)
     tags: List[str] = field(default_factory=list)
+    
+    def __post_init__(self):
+        self.channel = sys.intern(self.channel)
 
 
-@dataclass
+@dataclass(slots=True)
 class MergedLink:
-    """合并后的链接模型"""
+    """合并后的链接模型，标题、时间与来源取自所属的搜索结果，不另存副本"""
     url: str
     password: str = ""
-    note: str = ""
-    datetime: Optional[datetime] = None
-    source: str = ""
+    result: Optional[SearchResult] = None
+    
+    @property
+    def note(self) -> str:
+        return self.result.title if self.result is not None else ""
+    
+    @property
+    def datetime(self) -> Optional[datetime]:
+        return self.result.datetime if self.result is not None else None
+    
+    @property
+    def source(self) -> str:
+        if self.result is None:
+            return ""
+        # 插件未填写channel时使用默认来源
+        return self.result.channel or "聚合搜索"
 
 
 @dataclass
@@ -42,4 +63,10 @@ class SearchResponse:
     """搜索响应模型"""
     total: int
     results: List[SearchResult] = field(default_factory=list)
-    merged_by_type: Optional[Dict[str, List[MergedLink]]] = None 
\ No newline at end of file
+    merged_by_type: Optional[Dict[str, List[MergedLink]]] = None
+    # 渐进式搜索中尚未返回结果的插件
+    pending: List[str] = field(default_factory=list)
+    # 超时未返回结果的插件
+    timed_out: List[str] = field(default_factory=list)
+    # 调用失败或已熔断被跳过的插件
+    failed: List[str] = field(default_factory=list) 
\ No newline at end of file
@@ -1,10 +1,15 @@
 """
-插件适配器，用于兼容现有的同步插件
+插件适配器，用于兼容第三方的同步插件
+
+内置插件均为原生异步实现，直接注册到PluginManager；
+只有search为普通函数的旧式插件才需要经过适配器在线程池中执行。
 """
 import asyncio
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, List
+from . import models, plugin_base
 from .plugin_base import BasePlugin
 
 
@@ -16,22 +21,23 @@ def setup_old_models():
     if plugins_path.exists():
         sys.path.insert(0, str(plugins_path.parent))
     
-    # 为旧插件提供模型
-    from .models import SearchResult, Link
-    import models
-    models.SearchResult = SearchResult
-    models.Link = Link
+    # 旧插件使用 `from models import ...` 与 `from plugin_base import BasePanPlugin`，
+    # 将其指向src下的同一模块，避免同名类被重复加载
+    sys.modules.setdefault("models", models)
+    sys.modules.setdefault("plugin_base", plugin_base)
     
     # 为旧插件提供基类
-    import plugin_base
     plugin_base.BasePanPlugin = BasePlugin
 
 
 class PluginAdapter(BasePlugin):
     """插件适配器，将同步插件转换为异步插件"""
     
-    def __init__(self, sync_plugin):
+    def __init__(self, sync_plugin, executor: ThreadPoolExecutor):
         self.sync_plugin = sync_plugin
+        # 由PluginManager持有的有界线程池，所有同步插件共享
+        self.executor = executor
+        self.cacheable = getattr(sync_plugin, 'cacheable', True)
     
     def name(self) -> str:
         return self.sync_plugin.name()
@@ -39,13 +45,25 @@ class PluginAdapter(BasePlugin):
     def priority(self) -> int:
         return self.sync_plugin.priority()
     
+    def configure(self, options) -> None:
+        self.options = dict(options or {})
+        if hasattr(self.sync_plugin, 'configure'):
+            self.sync_plugin.configure(self.options)
+    
+    def set_http_client(self, http_client) -> None:
+        self.http_client = http_client
+        if hasattr(self.sync_plugin, 'set_http_client'):
+            self.sync_plugin.set_http_client(http_client)
+        else:
+            self.sync_plugin.http_client = http_client
+    
     async def search(self, keyword: str, **kwargs) -> List:
-        """异步执行同步插件的搜索方法"""
-        loop = asyncio.get_event_loop()
+        """在适配器线程池中执行同步插件的搜索方法"""
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
-            None, 
-            self.sync_plugin.search, 
-            keyword, 
+            self.executor,
+            self.sync_plugin.search,
+            keyword,
             kwargs.get('ext', {})
         )
     
@@ -53,4 +71,7 @@ class PluginAdapter(BasePlugin):
         return getattr(self.sync_plugin, 'get_description', lambda: f"{self.name()} 插件")()
     
     def is_enabled(self) -> bool:
-        return getattr(self.sync_plugin, 'is_enabled', lambda: True)() 
\ No newline at end of file
+        return getattr(self.sync_plugin, 'is_enabled', lambda: True)()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return getattr(self.sync_plugin, 'get_stats', lambda: {})()
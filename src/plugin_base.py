@@ -6,7 +6,19 @@ from typing import List, Dict, Any
 
 
 class BasePlugin(ABC):
-    """网盘搜索插件基类"""
+    """
+    网盘搜索插件基类
+    
+    插件应实现异步的search方法，网络请求统一通过注入的http_client完成，
+    不要在search中阻塞事件循环或自行创建事件循环。
+    """
+    
+    # 由PluginManager注入的共享HTTP客户端
+    http_client = None
+    # 来自配置 plugins.options.<插件名> 的插件参数
+    options: Dict[str, Any] = {}
+    # 结果是否写入PluginManager的插件结果缓存
+    cacheable = True
     
     @abstractmethod
     def name(self) -> str:
@@ -32,10 +44,22 @@ class BasePlugin(ABC):
         """
         pass
     
+    def configure(self, options: Dict[str, Any]) -> None:
+        """设置插件参数"""
+        self.options = dict(options or {})
+    
+    def set_http_client(self, http_client) -> None:
+        """注入共享HTTP客户端"""
+        self.http_client = http_client
+    
     def get_description(self) -> str:
         """获取插件描述"""
         return f"{self.name()} 插件"
     
     def is_enabled(self) -> bool:
         """检查插件是否启用"""
-        return True 
\ No newline at end of file
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """插件自身的运行统计，显示在插件状态中"""
+        return {} 
\ No newline at end of file
@@ -3,27 +3,99 @@
 """
 import asyncio
 import importlib
-from typing import List, Dict, Any, Type, Optional
+import inspect
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Type, Optional, AsyncIterator, Tuple, Union
 from .plugin_base import BasePlugin
 from .plugin_adapter import PluginAdapter, setup_old_models
 from .models import SearchResult
+from .cache import PluginResultCache, normalize_keyword, kwargs_key
+from .scheduler import RequestScheduler
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, request_deadline
+from .singleflight import SingleFlight
+
+
+# 单个插件的搜索结果：超时为None，失败或被熔断跳过时为其异常
+PluginOutcome = Union[List[SearchResult], Exception, None]
 
 
 class PluginManager:
     """插件管理器，负责插件注册、调度与统一调用"""
     
-    def __init__(self):
+    DEFAULT_SYNC_WORKERS = 4
+    DEFAULT_TIMEOUT = 30
+    
+    def __init__(self, http_client=None):
         self._plugins: List[BasePlugin] = []
         self._plugin_classes: Dict[str, Type[BasePlugin]] = {}
+        # 所有插件共享的HTTP客户端（连接池）
+        self.http_client = http_client
+        # 同步插件专用线程池，按需创建
+        self.sync_workers = self.DEFAULT_SYNC_WORKERS
+        # 各插件的参数，来自配置 plugins.options
+        self.plugin_options: Dict[str, Dict[str, Any]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 单插件结果缓存，默认不启用，由configure根据配置创建
+        self.result_cache = PluginResultCache(ttl=0)
+        # 正在后台刷新的缓存键 -> 刷新任务
+        self._refresh_tasks: Dict[tuple, asyncio.Task] = {}
+        # 合并并发的相同插件调用，所有会话共享
+        self.flights = SingleFlight()
+        # 单插件超时（秒）及按插件的覆盖值
+        self.default_timeout: float = self.DEFAULT_TIMEOUT
+        self.plugin_timeouts: Dict[str, float] = {}
+        # 超过整体截止时间的插件处理方式: cancel - 取消; cache - 后台继续运行并写入缓存
+        self.late_policy = "cache"
+        self._late_tasks: set = set()
+        # 所有搜索共享的上游请求调度器
+        self.scheduler = RequestScheduler()
+        # 瞬时故障重试策略与各插件的熔断器
+        self.retry_policy = RetryPolicy()
+        self.breaker_threshold = 5
+        self.breaker_cooldown = 60
+        self._breakers: Dict[str, CircuitBreaker] = {}
         # 设置旧插件模型
         setup_old_models()
     
+    def configure(self, config: Dict[str, Any], http_client=None) -> None:
+        """根据应用配置设置插件管理器"""
+        plugins_config = config.get("plugins", {}) or {}
+        self.sync_workers = plugins_config.get("sync_workers", self.DEFAULT_SYNC_WORKERS)
+        self.plugin_options = plugins_config.get("options", {}) or {}
+        self.result_cache = PluginResultCache.from_config(config)
+        self.default_timeout = plugins_config.get("timeout", self.DEFAULT_TIMEOUT)
+        self.plugin_timeouts = plugins_config.get("timeouts", {}) or {}
+        self.late_policy = (config.get("search", {}) or {}).get("late_plugins", "cache")
+        self.scheduler = RequestScheduler.from_config(config)
+        self.retry_policy = RetryPolicy.from_config(config)
+        search_config = config.get("search", {}) or {}
+        self.breaker_threshold = search_config.get("breaker_threshold", 5)
+        self.breaker_cooldown = search_config.get("breaker_cooldown", 60)
+        self._breakers.clear()
+        if http_client is not None:
+            self.http_client = http_client
+        if self.http_client is not None:
+            self.http_client.scheduler = self.scheduler
+            self.http_client.retry_policy = self.retry_policy
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取同步插件线程池"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.sync_workers,
+                thread_name_prefix="pan-search-sync-plugin"
+            )
+        return self._executor
+    
     def register(self, plugin: BasePlugin) -> None:
         """注册单个插件实例"""
         if plugin.name() in [p.name() for p in self._plugins]:
             print(f"警告: 插件名称重复: {plugin.name()}")
             return
         
+        if self.http_client is not None:
+            plugin.set_http_client(self.http_client)
         self._plugins.append(plugin)
     
     def get_plugins(self) -> List[BasePlugin]:
@@ -52,9 +124,13 @@ class PluginManager:
             module = importlib.import_module(f"plugins.{plugin_name}")
             plugin_class = getattr(module, class_name)
             
-            # 创建插件实例并用适配器包装
-            sync_plugin = plugin_class()
-            plugin = PluginAdapter(sync_plugin)
+            # 原生异步插件直接注册，同步插件用适配器包装
+            instance = plugin_class()
+            if inspect.iscoroutinefunction(instance.search):
+                plugin = instance
+            else:
+                plugin = PluginAdapter(instance, self._get_executor())
+            plugin.configure(self.plugin_options.get(plugin_name, {}))
             
             self.register(plugin)
             return plugin
@@ -68,52 +144,205 @@ class PluginManager:
         loaded_plugins = []
         for name in plugin_names:
             # 确保是字符串且不是配置键
-            if isinstance(name, str) and name not in ['enabled', 'timeout', 'max_results']:
+            if isinstance(name, str) and name not in ['enabled', 'timeout', 'timeouts', 'max_results', 'sync_workers', 'options']:
                 plugin = self.load_plugin(name)
                 if plugin:
                     loaded_plugins.append(plugin)
         return loaded_plugins
     
-    async def search_all(self, keyword: str, **kwargs) -> List[SearchResult]:
-        """并发调用所有插件的search，聚合结果"""
-        if not self._plugins:
-            return []
+    async def search_all(self, keyword: str, use_cache: bool = True, **kwargs) -> List[SearchResult]:
+        """并发调用所有插件的search，按完成顺序聚合结果，超时与失败的插件不计入"""
+        all_results = []
+        async with aclosing(self.iter_search(keyword, use_cache=use_cache, **kwargs)) as outcomes:
+            async for _, results in outcomes:
+                if isinstance(results, list):
+                    all_results.extend(results)
+        return all_results
+    
+    async def iter_search(self, keyword: str, use_cache: bool = True, deadline: Optional[float] = None,
+                          **kwargs) -> AsyncIterator[Tuple[str, PluginOutcome]]:
+        """
+        并发调用所有插件，按完成顺序逐个产出 (插件名, 结果列表)
         
-        # 创建搜索任务
-        tasks = []
+        插件超时（单插件超时或超过整体截止时间deadline秒）时结果为None，
+        调用失败或已熔断被跳过时结果为其异常（同asyncio.gather的return_exceptions），
+        以便与正常返回空结果的插件区分。
+        超过截止时间仍未完成的插件按late_policy取消或留在后台写入缓存。
+        """
+        import time
+        loop_deadline = time.monotonic() + deadline if deadline else None
+        tasks: Dict[asyncio.Task, str] = {}
         for plugin in self.get_plugins():
             if plugin.is_enabled():
-                task = self._search_plugin(plugin, keyword, **kwargs)
-                tasks.append(task)
+                task = asyncio.create_task(self._search_plugin(plugin, keyword, use_cache=use_cache, **kwargs))
+                tasks[task] = plugin.name()
         
-        # 并发执行
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            pending = set(tasks)
+            while pending:
+                timeout = None
+                if loop_deadline is not None:
+                    timeout = loop_deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if isinstance(task.exception(), asyncio.TimeoutError):
+                        yield tasks[task], None
+                    elif task.exception() is not None:
+                        print(f"插件 {tasks[task]} 搜索失败: {task.exception()}")
+                        yield tasks[task], task.exception()
+                    else:
+                        yield tasks[task], task.result()
+            
+            for task in pending:
+                print(f"插件 {tasks[task]} 超过整体截止时间 {deadline} 秒")
+                yield tasks[task], None
+        finally:
+            # 调用方提前结束迭代或超过截止时间时处理尚未完成的插件
+            for task in tasks:
+                if not task.done():
+                    self._handle_late_task(task)
+    
+    async def search_plugin(self, plugin: BasePlugin, keyword: str, use_cache: bool = True,
+                            **kwargs) -> PluginOutcome:
+        """单个插件搜索，与iter_search的产出一致：超时返回None，失败或被熔断跳过时返回其异常"""
+        try:
+            return await self._search_plugin(plugin, keyword, use_cache=use_cache, **kwargs)
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            print(f"插件 {plugin.name()} 搜索失败: {e}")
+            return e
+    
+    def _handle_late_task(self, task: asyncio.Task) -> None:
+        """按late_policy取消迟到的插件任务，或保留其在后台运行以写入缓存"""
+        if self.late_policy == "cancel":
+            task.cancel()
+            return
+        self._late_tasks.add(task)
+        task.add_done_callback(self._late_task_done)
+    
+    def _late_task_done(self, task: asyncio.Task) -> None:
+        self._late_tasks.discard(task)
+        if not task.cancelled():
+            # 读取异常，避免未获取异常的警告
+            task.exception()
+    
+    def get_timeout(self, plugin_name: str) -> float:
+        """获取指定插件的超时时间"""
+        return self.plugin_timeouts.get(plugin_name, self.default_timeout)
+    
+    async def _search_plugin(self, plugin: BasePlugin, keyword: str, use_cache: bool = True,
+                             **kwargs) -> List[SearchResult]:
+        """单个插件搜索，优先使用缓存，过期的缓存先返回旧结果再后台刷新"""
+        cache_key = (plugin.name(), normalize_keyword(keyword), kwargs_key(kwargs))
+        use_cache = use_cache and plugin.cacheable
+        if use_cache:
+            cached, stale = await self.result_cache.aget_with_state(cache_key)
+            if cached is not None:
+                if stale:
+                    self._schedule_refresh(plugin, keyword, cache_key, kwargs)
+                print(f"插件 {plugin.name()} 命中缓存{'(已过期，后台刷新)' if stale else ''}")
+                return cached
         
-        # 合并结果
-        all_results = []
-        for i, result in enumerate(results):
-            plugin = self.get_plugins()[i]
-            if isinstance(result, Exception):
-                print(f"插件 {plugin.name()} 搜索失败: {result}")
-            else:
-                all_results.extend(result)
+        # 同一插件、同一关键词的并发调用只请求一次上游
+        return await self.flights.do(cache_key, lambda: self._fetch_plugin(plugin, keyword, cache_key, kwargs))
+    
+    async def _fetch_plugin(self, plugin: BasePlugin, keyword: str, cache_key: tuple,
+                            kwargs: Dict[str, Any]) -> List[SearchResult]:
+        """经熔断器调用插件并写入缓存，已熔断时抛出CircuitOpenError"""
+        if not self.get_breaker(plugin.name()).allow():
+            raise CircuitOpenError(f"插件 {plugin.name()} 已熔断，跳过")
         
-        return all_results
+        result = await self._run_plugin(plugin, keyword, **kwargs)
+        # 空结果多由上游故障导致，不缓存
+        if result and plugin.cacheable:
+            self.result_cache.set(cache_key, result, ttl=self.result_cache.ttl_for(plugin.name()))
+        return result
     
-    async def _search_plugin(self, plugin: BasePlugin, keyword: str, **kwargs) -> List[SearchResult]:
-        """单个插件搜索"""
+    def _schedule_refresh(self, plugin: BasePlugin, keyword: str, cache_key: tuple,
+                          kwargs: Dict[str, Any]) -> None:
+        """在后台刷新过期的插件缓存，同一缓存键只刷新一次"""
+        if cache_key in self._refresh_tasks or cache_key in self.flights:
+            return
+        
+        async def refresh():
+            try:
+                await self.flights.do(cache_key, lambda: self._fetch_plugin(plugin, keyword, cache_key, kwargs))
+            except Exception:
+                # 刷新失败时保留旧结果，失败已计入熔断器
+                return
+        
+        task = asyncio.create_task(refresh())
+        self._refresh_tasks[cache_key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(cache_key, None))
+    
+    async def _run_plugin(self, plugin: BasePlugin, keyword: str, **kwargs) -> List[SearchResult]:
+        """
+        实际调用插件搜索，超过插件超时时间时抛出asyncio.TimeoutError，插件异常原样抛出
+        
+        调用结果计入插件熔断器，超时与异常均视为失败。
+        """
         import time
         start_time = time.time()
+        timeout = self.get_timeout(plugin.name())
+        breaker = self.get_breaker(plugin.name())
+        # 插件内的重试不会超过插件超时时间
+        token = request_deadline.set(time.monotonic() + timeout)
         try:
             print(f"开始搜索插件: {plugin.name()}")
-            result = await plugin.search(keyword, **kwargs)
+            result = await asyncio.wait_for(plugin.search(keyword, **kwargs), timeout)
             elapsed_time = time.time() - start_time
             print(f"插件 {plugin.name()} 搜索完成，耗时: {elapsed_time:.2f}秒")
+            breaker.record_success()
             return result
+        except asyncio.TimeoutError:
+            print(f"插件 {plugin.name()} 搜索超时({timeout}秒)")
+            breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
         except Exception as e:
             elapsed_time = time.time() - start_time
             print(f"插件 {plugin.name()} 搜索失败: {e}，耗时: {elapsed_time:.2f}秒")
-            return []
+            breaker.record_failure()
+            raise
+        finally:
+            request_deadline.reset(token)
+    
+    def get_breaker(self, plugin_name: str) -> CircuitBreaker:
+        """获取指定插件的熔断器"""
+        breaker = self._breakers.get(plugin_name)
+        if breaker is None:
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            self._breakers[plugin_name] = breaker
+        return breaker
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取插件结果缓存统计信息"""
+        stats = self.result_cache.get_stats()
+        stats["refreshing"] = len(self._refresh_tasks)
+        stats["singleflight"] = self.flights.get_stats()
+        return stats
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """获取上游请求调度统计信息"""
+        return self.scheduler.get_stats()
+    
+    def get_http_stats(self) -> Dict[str, Any]:
+        """获取共享HTTP客户端的请求合并统计信息"""
+        if self.http_client is None:
+            return {}
+        return self.http_client.get_stats()
+    
+    def close(self) -> None:
+        """释放同步插件线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
     
     def get_plugin_status(self) -> Dict[str, Dict[str, Any]]:
         """获取所有插件状态"""
@@ -122,6 +351,8 @@ class PluginManager:
             status[plugin.name()] = {
                 "enabled": plugin.is_enabled(),
                 "priority": plugin.priority(),
-                "description": plugin.get_description()
+                "description": plugin.get_description(),
+                "circuit": self.get_breaker(plugin.name()).get_stats(),
+                "stats": plugin.get_stats()
             }
         return status 
\ No newline at end of file
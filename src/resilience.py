@@ -0,0 +1,133 @@
+"""
+容错机制：瞬时故障重试与插件熔断
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+
+# 当前插件调用的截止时间（time.monotonic），重试不会超过该时间
+request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+# 视为瞬时故障、值得重试的HTTP状态码
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """插件已熔断，本次调用被跳过"""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """判断异常是否为可重试的瞬时故障"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUS
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+class RetryPolicy:
+    """带随机抖动的指数退避重试策略"""
+    
+    def __init__(self, retry_times: int = 3, base_delay: float = 0.2, max_delay: float = 2.0):
+        self.retry_times = retry_times
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RetryPolicy":
+        """根据配置中的search段创建重试策略"""
+        search_config = config.get("search", {}) or {}
+        return cls(
+            retry_times=search_config.get("retry_times", 3),
+            base_delay=search_config.get("retry_base_delay", 0.2),
+            max_delay=search_config.get("retry_max_delay", 2.0),
+        )
+    
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行func，遇到瞬时故障时退避重试，等待不会超过当前截止时间"""
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                if attempt >= self.retry_times or not is_transient_error(e):
+                    raise
+                delay = self.backoff(attempt)
+                deadline = request_deadline.get()
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    插件熔断器
+    
+    连续失败达到阈值后进入打开状态，冷却期内直接跳过插件；
+    冷却期结束后放行一次试探调用，成功则关闭，失败则重新打开。
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_skipped = 0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """是否允许本次调用"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                # 冷却结束，只放行一次试探调用
+                self.state = self.HALF_OPEN
+                return True
+            self.total_skipped += 1
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def abandon(self) -> None:
+        """调用被取消、未得出结论时，允许下次调用重新试探"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_skipped": self.total_skipped,
+        }
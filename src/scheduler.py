@@ -0,0 +1,151 @@
+"""
+上游请求调度器，限制全局与单主机的并发请求数
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+
+class ConcurrencyLimiter:
+    """
+    可跨事件循环、跨线程共享的并发限制器
+    
+    asyncio.Semaphore绑定在单个事件循环上，而多个Streamlit会话各自运行事件循环，
+    因此这里用线程锁保护计数，并通过call_soon_threadsafe唤醒等待者。
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.max_queued = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+    
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+    
+    async def acquire(self) -> None:
+        """获取一个并发名额，名额不足时排队等待"""
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self.max_queued = max(self.max_queued, len(self._waiters))
+        
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # 名额已转交给本等待者，取消时需要归还
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+    
+    def release(self) -> None:
+        """归还名额，优先直接转交给最早的等待者"""
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._wake, future)
+                    return
+                except RuntimeError:
+                    # 等待者所在的事件循环已关闭
+                    continue
+            self.in_flight -= 1
+    
+    def _wake(self, future: asyncio.Future) -> None:
+        if future.done():
+            # 等待者已被取消，名额继续转交
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class RequestScheduler:
+    """全局与单主机并发限制的请求调度器，所有搜索共享"""
+    
+    def __init__(self, max_concurrent: int = 10, per_host_limit: int = 4,
+                 host_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrent = max_concurrent
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self._global = ConcurrencyLimiter(max_concurrent)
+        self._hosts: Dict[str, ConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RequestScheduler":
+        """根据配置中的search段创建调度器"""
+        search_config = config.get("search", {}) or {}
+        return cls(
+            max_concurrent=search_config.get("max_concurrent", 10),
+            per_host_limit=search_config.get("per_host_limit", 4),
+            host_limits=search_config.get("host_limits"),
+        )
+    
+    def _host_limiter(self, host: str) -> ConcurrencyLimiter:
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = ConcurrencyLimiter(self.host_limits.get(host, self.per_host_limit))
+                self._hosts[host] = limiter
+            return limiter
+    
+    def slot(self, url: str):
+        """占用一个到url所在主机的请求名额"""
+        return self.key_slot(urlsplit(url).hostname or "")
+    
+    @asynccontextmanager
+    async def key_slot(self, key: str):
+        """占用一个指定键（通常为主机名）的名额，同一键的并发数受host_limits / per_host_limit限制"""
+        host_limiter = self._host_limiter(key)
+        start_time = time.monotonic()
+        # 先排主机队列再占全局名额，避免等待单主机时占着全局名额
+        await host_limiter.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            host_limiter.release()
+            raise
+        
+        wait_time = time.monotonic() - start_time
+        with self._lock:
+            self.total_requests += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+        try:
+            yield
+        finally:
+            self._global.release()
+            host_limiter.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度器统计信息"""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._global.in_flight,
+            "queued": self._global.queued + sum(h.queued for h in self._hosts.values()),
+            "max_queued": self._global.max_queued,
+            "total_requests": self.total_requests,
+            "avg_wait_time": self.total_wait_time / self.total_requests if self.total_requests else 0.0,
+            "max_wait_time": self.max_wait_time,
+            "hosts": {
+                host: {"limit": h.limit, "in_flight": h.in_flight, "queued": h.queued, "max_queued": h.max_queued}
+                for host, h in self._hosts.items()
+            },
+        }
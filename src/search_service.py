@@ -1,75 +1,408 @@
 """
 搜索服务模块
 """
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable, Iterable
 from collections import defaultdict
+from contextlib import aclosing, contextmanager
 from datetime import datetime
+from . import html_parser, json_decoder
 from .models import SearchResult, SearchResponse, MergedLink
-from .plugin_manager import PluginManager
+from .plugin_base import BasePlugin
+from .plugin_manager import PluginManager, PluginOutcome
 from .config import ConfigManager
+from .cache import ResponseCache, normalize_keyword, kwargs_key
+from .cache_warmer import QueryTracker
+from .scheduler import RequestScheduler
+from .singleflight import SingleFlight, StreamFlight
+from .local_index import LocalIndex
+from .url_normalizer import normalize_link_url
+
+
+# 插件返回时的回调，参数为插件名与其结果（超时为None）
+PluginCallback = Callable[[str, PluginOutcome], None]
 
 
 class SearchService:
     """聚合搜索服务"""
     
-    def __init__(self, plugin_manager: PluginManager):
+    def __init__(self, plugin_manager: PluginManager, config: Optional[ConfigManager] = None,
+                 local_index: Optional[LocalIndex] = None):
         self.plugin_manager = plugin_manager
-        self.config = ConfigManager()
+        self.config = config or ConfigManager()
+        self.cache = ResponseCache.from_config(self.config.get_config())
+        # 收录在线插件结果的本地索引，None表示不收录
+        self.local_index = local_index
+        # 合并并发的相同搜索，所有会话共享
+        self.flights = SingleFlight()
+        # 合并并发的相同渐进式搜索，订阅者共享同一组快照
+        self.stream_flights = StreamFlight()
+        # 交互式搜索的关键词热度，供缓存预热器选取热门搜索
+        self.query_tracker = QueryTracker(
+            half_life=self.config.get('cache_warmer.half_life', 3600),
+            max_tracked=self.config.get('cache_warmer.max_tracked', 1000),
+        )
+        # 由PanSearchApp设置的缓存预热器
+        self.cache_warmer = None
+        # 正在进行的交互式搜索（search与search_stream）数，缓存预热据此让路
+        self._interactive = 0
+        self._interactive_lock = threading.Lock()
+        # 批量搜索的 (关键词, 插件) 调度器，键为插件名；交互式搜索不经过它
+        search_config = self.config.get_config().get("search", {}) or {}
+        self.batch_scheduler = RequestScheduler(
+            max_concurrent=search_config.get("batch_concurrency", search_config.get("max_concurrent", 10)),
+            per_host_limit=search_config.get("batch_per_plugin", search_config.get("per_host_limit", 4)),
+        )
     
-    async def search(self, keyword: str, **kwargs) -> SearchResponse:
+    async def search(self, keyword: str, bypass_cache: bool = False,
+                     deadline: Optional[float] = None, **kwargs) -> SearchResponse:
         """
         执行聚合搜索
         
         Args:
             keyword: 搜索关键词
+            bypass_cache: 为True时跳过缓存读取，强制重新搜索并刷新缓存
+            deadline: 整体截止时间(秒)，默认读取search.deadline
             **kwargs: 扩展参数
             
         Returns:
-            SearchResponse: 搜索响应
+            SearchResponse: 搜索响应，timed_out为超时的插件，failed为失败或已熔断的插件
+        """
+        if keyword.strip():
+            self.query_tracker.record(self._cache_key(keyword, kwargs), keyword.strip(), kwargs)
+        with self._interactive_search():
+            if bypass_cache or not keyword.strip():
+                return await self._collect(keyword, bypass_cache, deadline, kwargs)
+            # 相同的搜索正在进行时直接等待其结果，不再重复请求各插件
+            flight_key = (self._cache_key(keyword, kwargs), deadline)
+            return await self.flights.do(flight_key,
+                                         lambda: self._collect(keyword, bypass_cache, deadline, kwargs))
+    
+    @contextmanager
+    def _interactive_search(self):
+        """在交互式搜索期间计数"""
+        with self._interactive_lock:
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._interactive_lock:
+                self._interactive -= 1
+    
+    @property
+    def interactive_in_flight(self) -> int:
+        """正在进行的交互式搜索数"""
+        return self._interactive
+    
+    async def _collect(self, keyword: str, bypass_cache: bool, deadline: Optional[float],
+                       kwargs: Dict[str, Any]) -> SearchResponse:
+        """执行搜索主流程，只返回最终响应"""
+        response = SearchResponse(total=0)
+        async with aclosing(self._search_snapshots(keyword, bypass_cache, deadline, kwargs,
+                                                   progressive=False)) as snapshots:
+            async for response in snapshots:
+                pass
+        return response
+    
+    async def search_stream(self, keyword: str, bypass_cache: bool = False,
+                            deadline: Optional[float] = None,
+                            on_plugin: Optional[PluginCallback] = None, **kwargs) -> AsyncIterator[SearchResponse]:
+        """
+        渐进式聚合搜索，每个插件完成后产出一次当前已去重的完整快照
+        
+        并发的相同搜索（bypass_cache为False时）共享同一次搜索的快照，后加入的调用
+        先收到截至当前的最新快照，on_plugin按插件逐个补发。
+        
+        Args:
+            keyword: 搜索关键词
+            bypass_cache: 为True时跳过缓存读取，强制重新搜索并刷新缓存
+            deadline: 整体截止时间(秒)，默认读取search.deadline
+            on_plugin: 每个插件返回时以(插件名, 该插件的结果)调用，超时的插件结果为None，
+                失败或已熔断的插件结果为其异常，在产出对应快照之前调用；命中响应缓存时不调用
+            **kwargs: 扩展参数
+            
+        Yields:
+            SearchResponse: 截至当前的搜索响应，pending为尚未完成的插件
+        """
+        if keyword.strip():
+            self.query_tracker.record(self._cache_key(keyword, kwargs), keyword.strip(), kwargs)
+        with self._interactive_search():
+            if bypass_cache or not keyword.strip():
+                async with aclosing(self._search_snapshots(keyword, bypass_cache, deadline, kwargs,
+                                                           progressive=True, on_plugin=on_plugin)) as snapshots:
+                    async for response in snapshots:
+                        yield response
+                return
+            
+            # 相同的渐进式搜索正在进行时订阅其快照，插件结果与最终的缓存写入只处理一次
+            flight_key = (self._cache_key(keyword, kwargs), deadline)
+            async with aclosing(self.stream_flights.stream(
+                    flight_key, lambda: self._snapshot_events(keyword, deadline, kwargs))) as batches:
+                async for events in batches:
+                    response = None
+                    for event in events:
+                        if isinstance(event, SearchResponse):
+                            response = event
+                        elif on_plugin is not None:
+                            on_plugin(*event)
+                    # 订阅者处理较慢时只产出一批中最新的快照
+                    if response is not None:
+                        yield response
+    
+    async def _snapshot_events(self, keyword: str, deadline: Optional[float],
+                               kwargs: Dict[str, Any]) -> AsyncIterator[Any]:
+        """共享的渐进式搜索，依次产出各插件的 (插件名, 结果) 与随后的快照"""
+        plugin_events: List[Tuple[str, PluginOutcome]] = []
+        async with aclosing(self._search_snapshots(keyword, False, deadline, kwargs, progressive=True,
+                                                   on_plugin=lambda *event: plugin_events.append(event))) as snapshots:
+            async for response in snapshots:
+                for event in plugin_events:
+                    yield event
+                plugin_events.clear()
+                yield response
+    
+    async def _search_snapshots(self, keyword: str, bypass_cache: bool, deadline: Optional[float],
+                                kwargs: Dict[str, Any], progressive: bool,
+                                on_plugin: Optional[PluginCallback] = None) -> AsyncIterator[SearchResponse]:
+        """
+        搜索主流程，progressive为True时每个插件返回后产出快照，否则只产出最终响应
+        
+        超过截止时间或达到法定数量（search.quorum_plugins / search.quorum_results）后
+        以已到达的结果组装响应，未完成的插件记入pending，超时的插件记入timed_out，
+        失败或已熔断的插件记入failed。
         """
         import time
         start_time = time.time()
         print(f"开始聚合搜索关键词: {keyword}")
         
         if not keyword.strip():
-            return SearchResponse(total=0)
+            yield SearchResponse(total=0)
+            return
         
+        cache_key = self._cache_key(keyword, kwargs)
+        if not bypass_cache:
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                print(f"命中缓存: {keyword}")
+                yield cached
+                return
+        
+        if deadline is None:
+            deadline = self.config.get('search.deadline')
+        pending = [p.name() for p in self.plugin_manager.get_plugins() if p.is_enabled()]
+        results_by_plugin: Dict[str, List[SearchResult]] = {}
+        timed_out: List[str] = []
+        failed: List[str] = []
+        response = SearchResponse(total=0, pending=list(pending))
         try:
-            # 1. 调用所有插件并记录来源
-            all_results = await self.plugin_manager.search_all(keyword, **kwargs)
-            
-            # 打印插件搜索完成信息
-            elapsed_time = time.time() - start_time
-            print(f"所有插件搜索完成，共获得 {len(all_results)} 个结果，耗时: {elapsed_time:.2f}秒")
-            
-            # 2. 去重处理
-            merged_results = self._deduplicate_results(all_results)
-            
-            # 3. 排序处理
-            merged_results = self._sort_results(merged_results)
-            
-            # 4. 按类型分组链接
-            merged_links = self._group_links_by_type(merged_results)
-            
-            # 5. 应用类型过滤
-            filter_mode = self.config.get('type_filter.filter_mode', 'none')
-            if filter_mode != 'none':
-                merged_links = self._filter_links_by_type(merged_links)
-            
-            # 6. 组装响应
-            response = SearchResponse(
-                total=len(merged_results),
-                results=merged_results,
-                merged_by_type=merged_links
-            )
-            
-            total_elapsed_time = time.time() - start_time
-            print(f"搜索处理完成，最终结果数: {response.total}，总耗时: {total_elapsed_time:.2f}秒")
-            return response
-            
+            async with aclosing(self.plugin_manager.iter_search(
+                    keyword, use_cache=not bypass_cache, deadline=deadline, **kwargs)) as outcomes:
+                async for plugin_name, results in outcomes:
+                    pending.remove(plugin_name)
+                    if results is None:
+                        timed_out.append(plugin_name)
+                    elif isinstance(results, Exception):
+                        failed.append(plugin_name)
+                    else:
+                        results_by_plugin[plugin_name] = results
+                        self._ingest(plugin_name, results)
+                    if on_plugin is not None:
+                        on_plugin(plugin_name, results)
+                    
+                    quorum = bool(pending) and self._quorum_reached(results_by_plugin)
+                    if progressive or quorum or not pending:
+                        response = self._build_response(self._ordered_results(results_by_plugin))
+                        response.pending = list(pending)
+                        response.timed_out = list(timed_out)
+                        response.failed = list(failed)
+                        yield response
+                    if quorum:
+                        print(f"已达到法定结果数，不再等待: {', '.join(pending)}")
+                        break
         except Exception as e:
             print(f"搜索失败: {e}")
-            return SearchResponse(total=0)
+            yield SearchResponse(total=0)
+            return
+        
+        if not results_by_plugin and not timed_out and not failed:
+            # 没有启用的插件时也要给调用方一个最终响应
+            response.pending = []
+            yield response
+        
+        total_elapsed_time = time.time() - start_time
+        print(f"搜索处理完成，最终结果数: {response.total}，总耗时: {total_elapsed_time:.2f}秒")
+        if timed_out:
+            print(f"超时的插件: {', '.join(timed_out)}")
+        if failed:
+            print(f"失败的插件: {', '.join(failed)}")
+        
+        # 空结果多由上游故障导致，部分结果会遗漏来源，均不缓存
+        if response.total > 0 and not response.pending and not response.timed_out and not response.failed:
+            self.cache.set(cache_key, response)
+    
+    async def search_many(self, keywords: Iterable[str], bypass_cache: bool = False,
+                          **kwargs) -> Dict[str, SearchResponse]:
+        """
+        批量搜索多个关键词，全部完成后返回 {关键词: 响应}
+        
+        参数与调度方式同iter_search_many。
+        """
+        responses = {}
+        async with aclosing(self.iter_search_many(keywords, bypass_cache, **kwargs)) as outcomes:
+            async for keyword, response in outcomes:
+                responses[keyword] = response
+        return responses
+    
+    async def iter_search_many(self, keywords: Iterable[str], bypass_cache: bool = False,
+                               **kwargs) -> AsyncIterator[Tuple[str, SearchResponse]]:
+        """
+        批量搜索多个关键词，按完成顺序逐个产出 (关键词, 响应)
+        
+        所有 (关键词, 插件) 组合经batch_scheduler统一排队：同时进行的组合总数不超过
+        search.batch_concurrency，单个插件不超过search.batch_per_plugin，排队时不计入插件超时。
+        插件结果缓存、请求合并与连接池与交互式搜索共用。规范化后相同的关键词只搜索一次，
+        传入的每种写法都会以共享的响应产出一次。命中响应缓存的关键词最先产出。
+        
+        Args:
+            keywords: 关键词列表
+            bypass_cache: 为True时跳过缓存读取，强制重新搜索并刷新缓存
+            **kwargs: 扩展参数
+        """
+        plugins = [p for p in self.plugin_manager.get_plugins() if p.is_enabled()]
+        # 缓存键 -> 规范化后相同的各种写法
+        groups: Dict[Tuple, List[str]] = {}
+        for keyword in keywords:
+            keyword = keyword.strip()
+            if keyword:
+                spellings = groups.setdefault(self._cache_key(keyword, kwargs), [])
+                if keyword not in spellings:
+                    spellings.append(keyword)
+        
+        # 磁盘层的缓存读取并发进行
+        if bypass_cache:
+            cached = [None] * len(groups)
+        else:
+            cached = await asyncio.gather(*(self.cache.aget(cache_key) for cache_key in groups))
+        hits: List[Tuple[Tuple, SearchResponse]] = []
+        tasks: Dict[asyncio.Task, Tuple] = {}
+        for (cache_key, spellings), response in zip(groups.items(), cached):
+            if response is not None:
+                hits.append((cache_key, response))
+            else:
+                task = asyncio.create_task(
+                    self._search_batch_keyword(spellings[0], cache_key, plugins, bypass_cache, kwargs)
+                )
+                tasks[task] = cache_key
+        
+        try:
+            for cache_key, response in hits:
+                for keyword in groups[cache_key]:
+                    yield keyword, response
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    for keyword in groups[tasks[task]]:
+                        yield keyword, response
+        finally:
+            # 调用方提前结束迭代时取消尚未完成的关键词
+            for task in tasks:
+                task.cancel()
+    
+    async def _search_batch_keyword(self, keyword: str, cache_key: Tuple, plugins: List[BasePlugin],
+                                    bypass_cache: bool, kwargs: Dict[str, Any]) -> SearchResponse:
+        """批量搜索中的单个关键词，各插件经batch_scheduler排队后执行"""
+        async def run(plugin: BasePlugin) -> PluginOutcome:
+            async with self.batch_scheduler.key_slot(plugin.name()):
+                return await self.plugin_manager.search_plugin(plugin, keyword, use_cache=not bypass_cache,
+                                                               **kwargs)
+        
+        outcomes = await asyncio.gather(*(run(plugin) for plugin in plugins))
+        results_by_plugin: Dict[str, List[SearchResult]] = {}
+        timed_out = []
+        failed = []
+        for plugin, results in zip(plugins, outcomes):
+            if results is None:
+                timed_out.append(plugin.name())
+            elif isinstance(results, Exception):
+                failed.append(plugin.name())
+            else:
+                results_by_plugin[plugin.name()] = results
+                self._ingest(plugin.name(), results)
+        
+        response = self._build_response(self._ordered_results(results_by_plugin))
+        response.timed_out = timed_out
+        response.failed = failed
+        if response.total > 0 and not timed_out and not failed:
+            self.cache.set(cache_key, response)
+        return response
+    
+    def cache_ttl_remaining(self, keyword: str, kwargs: Optional[Dict[str, Any]] = None) -> Optional[float]:
+        """关键词的响应缓存距离过期的秒数，未缓存时返回None"""
+        return self.cache.ttl_remaining(self._cache_key(keyword, kwargs or {}))
+    
+    def _ingest(self, plugin_name: str, results: List[SearchResult]) -> None:
+        """将在线插件的结果写入本地索引"""
+        if self.local_index is None or not results:
+            return
+        plugin = self.plugin_manager.get_plugin(plugin_name)
+        if plugin is not None and not plugin.cacheable:
+            # 不缓存的插件（如local本身）结果不是新数据
+            return
+        self.local_index.add_async(results)
+    
+    def _quorum_reached(self, results_by_plugin: Dict[str, List[SearchResult]]) -> bool:
+        """是否已有足够的插件或结果返回，可以提前结束搜索"""
+        quorum_plugins = self.config.get('search.quorum_plugins', 0) or 0
+        quorum_results = self.config.get('search.quorum_results', 0) or 0
+        if quorum_plugins and len(results_by_plugin) >= quorum_plugins:
+            return True
+        if quorum_results and sum(len(r) for r in results_by_plugin.values()) >= quorum_results:
+            return True
+        return False
+    
+    def _ordered_results(self, results_by_plugin: Dict[str, List[SearchResult]]) -> List[SearchResult]:
+        """按插件优先级拼接各插件结果，保证去重结果与完成顺序无关"""
+        all_results = []
+        for plugin in self.plugin_manager.get_plugins():
+            all_results.extend(results_by_plugin.get(plugin.name(), []))
+        return all_results
+    
+    def _build_response(self, all_results: List[SearchResult]) -> SearchResponse:
+        """对插件结果去重、排序、按类型分组并过滤，组装为响应"""
+        # 1. 去重处理
+        merged_results = self._deduplicate_results(all_results)
+        
+        # 2. 排序处理
+        merged_results = self._sort_results(merged_results)
+        
+        # 3. 按类型分组链接
+        merged_links = self._group_links_by_type(merged_results)
+        
+        # 4. 应用类型过滤
+        filter_mode = self.config.get('type_filter.filter_mode', 'none')
+        if filter_mode != 'none':
+            merged_links = self._filter_links_by_type(merged_links)
+        
+        # 5. 组装响应
+        return SearchResponse(
+            total=len(merged_results),
+            results=merged_results,
+            merged_by_type=merged_links
+        )
+    
+    def _cache_key(self, keyword: str, kwargs: Dict[str, Any]) -> Tuple:
+        """缓存键：关键词 + 启用的插件集合 + 类型过滤配置 + 扩展参数"""
+        enabled_plugins = tuple(sorted(p.name() for p in self.plugin_manager.get_plugins() if p.is_enabled()))
+        filter_mode = self.config.get('type_filter.filter_mode', 'none')
+        enabled_types = tuple(sorted(self.config.get('type_filter.enabled_types', []) or []))
+        return (normalize_keyword(keyword), enabled_plugins, filter_mode, enabled_types, kwargs_key(kwargs))
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取响应缓存统计信息"""
+        return self.cache.get_stats()
     
     def _deduplicate_results(self, results: List[SearchResult]) -> List[SearchResult]:
         """去重处理"""
@@ -102,24 +435,38 @@ class SearchService:
         return sorted(results, key=get_sort_key, reverse=True)
     
     def _group_links_by_type(self, results: List[SearchResult]) -> Dict[str, List[MergedLink]]:
-        """按类型分组链接"""
+        """按类型分组链接，规范化后相同的链接只保留信息最完整的一条"""
         grouped_links = defaultdict(list)
+        # (类型, 规范链接) -> 在分组列表中的位置
+        positions: Dict[Tuple[str, str], int] = {}
         
         for result in results:
             for link in result.links:
-                # 使用channel作为来源，如果为空则使用默认值
-                source = result.channel if result.channel else "聚合搜索"
-                merged_link = MergedLink(
-                    url=link.url,
-                    password=link.password,
-                    note=result.title,
-                    datetime=result.datetime,
-                    source=source
-                )
-                grouped_links[link.type].append(merged_link)
+                url, password = normalize_link_url(link.url, link.password)
+                # 标题、时间与来源引用所属结果，不逐条复制
+                merged_link = MergedLink(url=url, password=password, result=result)
+                links = grouped_links[link.type]
+                key = (link.type, url)
+                index = positions.get(key)
+                if index is None:
+                    positions[key] = len(links)
+                    links.append(merged_link)
+                else:
+                    links[index] = self._richer_link(links[index], merged_link)
         
         return dict(grouped_links)
     
+    @staticmethod
+    def _richer_link(existing: MergedLink, candidate: MergedLink) -> MergedLink:
+        """两条相同链接保留信息更完整的一条，缺少的提取码从另一条补充"""
+        def richness(link: MergedLink) -> Tuple[bool, bool, int]:
+            return bool(link.password), link.datetime is not None, len(link.note)
+        
+        kept, other = (candidate, existing) if richness(candidate) > richness(existing) else (existing, candidate)
+        if not kept.password and other.password:
+            kept.password = other.password
+        return kept
+    
     def _filter_links_by_type(self, merged_links: Dict[str, List[MergedLink]]) -> Dict[str, List[MergedLink]]:
         """根据配置过滤链接类型"""
         filter_mode = self.config.get('type_filter.filter_mode', 'none')
@@ -149,6 +496,19 @@ class SearchService:
             "keyword": keyword,
             "total_plugins": len(self.plugin_manager.get_plugins()),
             "enabled_plugins": len([p for p in self.plugin_manager.get_plugins() if p.is_enabled()]),
-            "plugin_status": self.plugin_manager.get_plugin_status()
+            "plugin_status": self.plugin_manager.get_plugin_status(),
+            "cache": self.get_cache_stats(),
+            "singleflight": self.flights.get_stats(),
+            "stream_singleflight": self.stream_flights.get_stats(),
+            "interactive_in_flight": self.interactive_in_flight,
+            "plugin_cache": self.plugin_manager.get_cache_stats(),
+            "scheduler": self.plugin_manager.get_scheduler_stats(),
+            "batch_scheduler": self.batch_scheduler.get_stats(),
+            "cache_warmer": self.cache_warmer.get_stats() if self.cache_warmer else None,
+            "http": self.plugin_manager.get_http_stats(),
+            "local_index": self.local_index.get_stats() if self.local_index else None,
+            "html_parser": html_parser.get_backend(),
+            "json_decoder": json_decoder.get_backend(),
+            "json_schema_decoder": json_decoder.get_schema_backend(),
         }
         return stats 
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+相同请求合并（single-flight）：同一键同时只执行一次，并发的相同调用等待并共享其结果
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class _LeaderCancelled(Exception):
+    """执行者被取消，等待者需要重新发起调用"""
+
+
+class SingleFlight:
+    """
+    可跨事件循环、跨线程共享的请求合并器
+    
+    多个Streamlit会话各自运行事件循环，因此共享结果使用concurrent.futures.Future，
+    等待者通过asyncio.wrap_future在自己的事件循环中等待。
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行func并返回结果，同一key已有调用在执行时等待其结果
+        
+        执行者抛出的异常同样传递给所有等待者；执行者被取消时，等待者重新发起调用。
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = Future()
+                    self._calls[key] = call
+                    self.executed += 1
+                else:
+                    self.coalesced += 1
+            
+            if leader:
+                return await self._lead(key, call, func)
+            try:
+                # shield避免等待者被取消时连带取消共享的Future
+                return await asyncio.shield(asyncio.wrap_future(call))
+            except _LeaderCancelled:
+                continue
+    
+    async def _lead(self, key: Hashable, call: Future, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self._finish(key)
+            call.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            self._finish(key)
+            call.set_exception(e)
+            raise
+        self._finish(key)
+        call.set_result(result)
+        return result
+    
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+
+class _Stream:
+    """一个正在产出的共享流"""
+    
+    __slots__ = ("items", "done", "error", "task", "loop", "wakers")
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self.loop = loop
+        # 订阅者所在的事件循环与唤醒事件
+        self.wakers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable[[], Any]) -> None:
+    """在loop中执行callback，可在任意线程调用，loop已关闭时忽略"""
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        callback()
+        return
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+class StreamFlight:
+    """
+    异步生成器的请求合并：同一键同时只运行一个生成器，并发的相同调用订阅其产出
+    
+    生成器在首个订阅者的事件循环中作为独立任务运行，某个订阅者提前退出不影响其他订阅者，
+    全部订阅者退出后取消生成器。后加入的订阅者先收到此前的全部产出。
+    """
+    
+    def __init__(self):
+        self._streams: Dict[Hashable, _Stream] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    async def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[List[Any]]:
+        """
+        订阅key对应的生成器，没有时以factory()创建
+        
+        Yields:
+            自上次产出以来的新元素列表，订阅者处理较慢时多个元素合并为一批
+        """
+        loop = asyncio.get_running_loop()
+        waker = (loop, asyncio.Event())
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = _Stream(loop)
+                stream.task = loop.create_task(self._produce(key, stream, factory))
+                self._streams[key] = stream
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            stream.wakers.append(waker)
+        
+        index = 0
+        try:
+            while True:
+                waker[1].clear()
+                with self._lock:
+                    items = stream.items[index:]
+                    index = len(stream.items)
+                    done, error = stream.done, stream.error
+                if items:
+                    yield items
+                elif done:
+                    if error is not None:
+                        raise error
+                    return
+                else:
+                    await waker[1].wait()
+        finally:
+            with self._lock:
+                stream.wakers.remove(waker)
+                abandoned = not stream.wakers and not stream.done
+                if abandoned and self._streams.get(key) is stream:
+                    # 新的订阅者不再加入即将取消的流
+                    del self._streams[key]
+            if abandoned:
+                _call_in_loop(stream.loop, stream.task.cancel)
+    
+    async def _produce(self, key: Hashable, stream: _Stream, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async with aclosing(factory()) as items:
+                async for item in items:
+                    self._publish(stream, item)
+        except asyncio.CancelledError:
+            self._finish(key, stream, asyncio.CancelledError())
+            raise
+        except Exception as e:
+            self._finish(key, stream, e)
+        else:
+            self._finish(key, stream, None)
+    
+    def _publish(self, stream: _Stream, item: Any) -> None:
+        with self._lock:
+            stream.items.append(item)
+            wakers = list(stream.wakers)
+        for loop, event in wakers:
+            _call_in_loop(loop, event.set)
+    
+    def _finish(self, key: Hashable, stream: _Stream, error: Optional[BaseException]) -> None:
+        with self._lock:
+            stream.done = True
+            stream.error = error
+            if self._streams.get(key) is stream:
+                del self._streams[key]
+            wakers = list(stream.wakers)
+        for loop, event in wakers:
+            _call_in_loop(loop, event.set)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._streams
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        return {
+            "in_flight": len(self._streams),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
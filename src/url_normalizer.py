@@ -0,0 +1,122 @@
+"""
+网盘分享链接规范化，用于跨插件合并同一链接
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# 别名主机 -> 规范主机
+HOST_ALIASES: Dict[str, str] = {
+    "yun.baidu.com": "pan.baidu.com",
+    "aliyundrive.com": "www.alipan.com",
+    "www.aliyundrive.com": "www.alipan.com",
+    "alipan.com": "www.alipan.com",
+    "h5.cloud.189.cn": "cloud.189.cn",
+    "www.115.com": "115.com",
+    "115cdn.com": "115.com",
+    "anxia.com": "115.com",
+    "123pan.com": "www.123pan.com",
+    "123684.com": "www.123pan.com",
+    "www.123684.com": "www.123pan.com",
+    "123865.com": "www.123pan.com",
+    "www.123865.com": "www.123pan.com",
+    "123912.com": "www.123pan.com",
+    "www.123912.com": "www.123pan.com",
+    "fast.uc.cn": "drive.uc.cn",
+}
+
+# 分享码不区分大小写的主机，统一转为小写
+CASE_INSENSITIVE_HOSTS = {"pan.quark.cn", "drive.uc.cn"}
+
+# 分享码在路径中的主机（别名已转换），查询参数与片段只携带提取码或跟踪信息，可以去掉；
+# 其他主机（如移动云盘）的分享码可能在查询参数或片段中，链接保持原样
+PATH_SHARE_HOSTS = {
+    "pan.baidu.com", "www.alipan.com", "pan.quark.cn", "drive.uc.cn", "pan.xunlei.com",
+    "cloud.189.cn", "115.com", "www.123pan.com", "mypikpak.com", "share.weiyun.com",
+    "www.jianguoyun.com",
+}
+_LANZOU_HOST_RE = re.compile(r"(?:[\w-]+\.)?lanzo[a-z]*\.com")
+
+# 携带提取码的查询参数（天翼云盘 web/share?code= 中的code是分享码而非提取码）
+PASSWORD_PARAMS = ("pwd", "password", "passcode")
+
+# 链接与其后说明之间的分隔：空白、引号与尖括号
+_BOUNDARY_RE = re.compile(r"[\s\"'<>]")
+# 链接末尾的标点，含全角标点
+_TRAILING_PUNCT_RE = re.compile(r"[.,;:!?)\]}，。；：！？、）】」』]+$")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+
+def _is_path_share_host(host: str) -> bool:
+    return host in PATH_SHARE_HOSTS or _LANZOU_HOST_RE.fullmatch(host) is not None
+
+
+@lru_cache(maxsize=8192)
+def canonicalize_url(url: str) -> Tuple[str, str]:
+    """
+    将分享链接转换为规范形式
+    
+    只有分享码在路径中的网盘会被改写（统一主机与https，去掉查询参数与片段）；
+    磁力与ed2k链接、以及分享码在查询参数或片段中的链接只去掉末尾多余的内容。
+    
+    Returns:
+        (规范链接, 从链接中取出的提取码)，无法解析的链接原样返回
+    """
+    url = url.strip()
+    if url.startswith("ed2k://"):
+        # 文件名中可以有中文与标点，链接以最后一个“|/”结束
+        end = url.rfind("|/")
+        return (url[:end + 2] if end >= 0 else url), ""
+    url = _BOUNDARY_RE.split(url, 1)[0]
+    if url.startswith("magnet:"):
+        return url, ""
+    url = _TRAILING_PUNCT_RE.sub("", url)
+    if "://" not in url:
+        return url, ""
+    
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return url, ""
+    host = HOST_ALIASES.get(host, host)
+    if not _is_path_share_host(host):
+        return url, ""
+    
+    # 这些网盘的分享码与提取码只含ASCII字符，其后紧跟的中文是附加说明
+    m = _NON_ASCII_RE.search(url)
+    if m is not None:
+        parts = urlsplit(_TRAILING_PUNCT_RE.sub("", url[:m.start()]))
+    path = parts.path
+    query = dict(parse_qsl(parts.query))
+    fragment = parts.fragment
+    
+    password = ""
+    for name in PASSWORD_PARAMS:
+        if query.get(name):
+            password = query[name]
+            break
+    
+    canonical_query = ""
+    if host == "pan.baidu.com" and path.startswith("/share/init") and query.get("surl"):
+        # 旧式链接 /share/init?surl=xxx 等价于 /s/1xxx
+        path = "/s/1" + query["surl"]
+    elif host == "cloud.189.cn" and fragment.startswith("/t/"):
+        # 移动版链接 /web/share.html#/t/xxx 等价于 /t/xxx
+        path = fragment
+    elif host == "cloud.189.cn" and path.rstrip("/") == "/web/share" and query.get("code"):
+        # 分享码在code参数中，只保留该参数
+        canonical_query = urlencode({"code": query["code"]})
+    
+    path = path.rstrip("/") or "/"
+    if host in CASE_INSENSITIVE_HOSTS:
+        path = path.lower()
+    return urlunsplit(("https", host, path, canonical_query, "")), password
+
+
+def normalize_link_url(url: str, password: str = "") -> Tuple[str, str]:
+    """规范化链接，链接中带的提取码仅在password为空时使用"""
+    canonical, url_password = canonicalize_url(url)
+    return canonical, (password or "").strip() or url_password
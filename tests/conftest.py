@@ -0,0 +1,7 @@
+"""
+测试公共配置：将项目根目录加入导入路径，与benchmarks中的脚本一致
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
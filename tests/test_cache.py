@@ -0,0 +1,152 @@
+"""
+cache：进程内TTL/LRU缓存与过期旧值
+"""
+import asyncio
+
+import pytest
+
+from src import cache as cache_module
+from src.cache import PluginResultCache, ResponseCache, TTLCache, kwargs_key, normalize_keyword
+from src.models import Link, SearchResponse, SearchResult
+from src.plugin_base import BasePlugin
+from src.plugin_manager import PluginManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_normalize_keyword():
+    assert normalize_keyword("  Hello   World ") == "hello world"
+    assert normalize_keyword("繁花\t第一集") == "繁花 第一集"
+
+
+def test_kwargs_key_is_order_independent():
+    assert kwargs_key({"a": 1, "b": 2}) == kwargs_key({"b": 2, "a": 1})
+    assert kwargs_key({}) == ""
+
+
+def test_get_before_and_after_expiry(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("k", "v")
+    clock.advance(9.9)
+    assert cache.get("k") == "v"
+    clock.advance(0.2)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_per_entry_ttl_and_disabled_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("never", 2, ttl=0)
+    clock.advance(2)
+    assert cache.get("short") is None
+    assert cache.get("never") is None
+
+
+def test_lru_eviction_by_entries(clock):
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 访问a使其成为最近使用
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes(clock):
+    cache = TTLCache(ttl=60, max_bytes=100, sizeof=len)
+    cache.set("a", "x" * 60)
+    cache.set("b", "y" * 30)
+    cache.set("c", "z" * 30)
+    assert cache.get("a") is None
+    assert cache.get_stats()["bytes"] == 60
+    # 单个值超过上限时不缓存
+    cache.set("huge", "h" * 101)
+    assert cache.get("huge") is None
+
+
+def test_overwrite_updates_size(clock):
+    cache = TTLCache(ttl=60, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("a", "xx")
+    assert cache.get_stats()["bytes"] == 2
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_response_cache_estimates_size(clock):
+    result = SearchResult(unique_id="r", title="繁花", links=[Link(type="quark", url="https://pan.quark.cn/s/a")])
+    response = SearchResponse(total=1, results=[result], merged_by_type={})
+    cache = ResponseCache(ttl=60)
+    cache.set(("繁花",), response)
+    assert cache.get(("繁花",)) is response
+    assert cache.get_stats()["bytes"] > 0
+
+
+def test_stale_entry_returned_with_state(clock):
+    cache = TTLCache(ttl=10, stale_ttl=20)
+    cache.set("k", "v")
+    assert cache.get_with_state("k") == ("v", False)
+    clock.advance(15)
+    # get只返回未过期的值，get_with_state在旧值保留期内返回旧值
+    assert cache.get("k") is None
+    assert cache.get_with_state("k") == ("v", True)
+    clock.advance(20)
+    assert cache.get_with_state("k") == (None, False)
+    assert cache.get_stats()["stale_hits"] == 1
+
+
+def test_plugin_results_served_stale_then_refreshed(clock):
+    calls = []
+    
+    class Plugin(BasePlugin):
+        def name(self):
+            return "fake"
+        
+        def priority(self):
+            return 1
+        
+        async def search(self, keyword, **kwargs):
+            calls.append(keyword)
+            return [SearchResult(unique_id=f"fake-{len(calls)}", title=keyword)]
+    
+    async def scenario():
+        manager = PluginManager()
+        manager.result_cache = PluginResultCache(ttl=10, stale_ttl=60)
+        plugin = Plugin()
+        manager.register(plugin)
+        first = await manager.search_plugin(plugin, "繁花")
+        cached = await manager.search_plugin(plugin, " 繁花 ")
+        clock.advance(11)
+        stale = await manager.search_plugin(plugin, "繁花")
+        # 旧值立即返回，刷新在后台进行
+        await asyncio.gather(*manager._refresh_tasks.values())
+        fresh = await manager.search_plugin(plugin, "繁花")
+        return first, cached, stale, fresh
+    
+    first, cached, stale, fresh = asyncio.run(scenario())
+    assert first[0].unique_id == cached[0].unique_id == stale[0].unique_id == "fake-1"
+    assert fresh[0].unique_id == "fake-2"
+    assert len(calls) == 2
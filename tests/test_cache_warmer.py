@@ -0,0 +1,171 @@
+"""
+cache_warmer：搜索热度统计与后台预热的选取、限速和让路
+"""
+import asyncio
+
+import pytest
+
+from src import cache_warmer as warmer_module
+from src.cache import kwargs_key, normalize_keyword
+from src.cache_warmer import CacheWarmer, QueryTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    real_sleep = asyncio.sleep
+    
+    async def sleep(seconds):
+        # 预热器的等待只推进假时钟
+        clock.advance(seconds)
+        await real_sleep(0)
+    
+    monkeypatch.setattr(warmer_module.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(warmer_module.asyncio, "sleep", sleep)
+    return clock
+
+
+class FakePluginManager:
+    def __init__(self):
+        self.queued = 0
+    
+    def get_scheduler_stats(self):
+        return {"queued": self.queued}
+
+
+class FakeService:
+    """预热器用到的SearchService接口"""
+    
+    def __init__(self, clock, remaining=None):
+        self.clock = clock
+        self.query_tracker = QueryTracker(half_life=3600)
+        self.plugin_manager = FakePluginManager()
+        self.interactive_in_flight = 0
+        # 关键词 -> 响应缓存剩余秒数，未列出的视为未缓存
+        self.remaining = remaining or {}
+        self.searches = []
+    
+    def cache_ttl_remaining(self, keyword, kwargs=None):
+        return self.remaining.get(keyword)
+    
+    async def search_many(self, keywords, bypass_cache=False, **kwargs):
+        assert bypass_cache
+        self.searches.append((self.clock.now, list(keywords), kwargs))
+        return {}
+
+
+def record(tracker, keyword, times=1, **kwargs):
+    for _ in range(times):
+        tracker.record((normalize_keyword(keyword), kwargs_key(kwargs)), keyword, kwargs)
+
+
+def test_tracker_half_life_decay(clock):
+    tracker = QueryTracker(half_life=100)
+    record(tracker, "繁花", times=4)
+    assert tracker.top(1) == [("繁花", {}, 4.0)]
+    clock.advance(100)
+    assert tracker.top(1)[0][2] == pytest.approx(2.0)
+    clock.advance(100)
+    record(tracker, "繁花")
+    assert tracker.top(1)[0][2] == pytest.approx(2.0)
+
+
+def test_tracker_top_orders_and_filters(clock):
+    tracker = QueryTracker(half_life=100)
+    record(tracker, "a", times=3)
+    record(tracker, "b", times=5, type="quark")
+    record(tracker, "c")
+    assert [(k, kw) for k, kw, _ in tracker.top(2)] == [("b", {"type": "quark"}), ("a", {})]
+    assert [k for k, _, _ in tracker.top(10, min_score=2)] == ["b", "a"]
+
+
+def test_tracker_prunes_coldest(clock):
+    tracker = QueryTracker(half_life=100, max_tracked=10)
+    record(tracker, "hot", times=5)
+    for i in range(10):
+        record(tracker, f"cold{i}")
+    assert len(tracker) == 9
+    assert tracker.top(1)[0][0] == "hot"
+
+
+def test_due_queries_uses_refresh_ahead(clock):
+    service = FakeService(clock, remaining={"expiring": 30, "fresh": 300, "watched": 600})
+    for keyword in ("expiring", "fresh", "uncached"):
+        record(service.query_tracker, keyword, times=3)
+    record(service.query_tracker, "rare")
+    warmer = CacheWarmer(service, refresh_ahead=90, min_hits=2, watchlist=["watched", "Watch Me", ""])
+    due = warmer.due_queries()
+    # 关注列表在前；缓存仍新鲜或热度不足的不预热
+    assert due == [("Watch Me", {}), ("expiring", {}), ("uncached", {})]
+
+
+def test_due_queries_deduplicates_normalized_keywords(clock):
+    service = FakeService(clock)
+    record(service.query_tracker, "Fan Hua", times=3)
+    warmer = CacheWarmer(service, min_hits=2, watchlist=["fan  hua"])
+    assert warmer.due_queries() == [("fan  hua", {})]
+
+
+def test_max_per_minute_spaces_refreshes(clock):
+    service = FakeService(clock)
+    warmer = CacheWarmer(service, interval=60, max_per_minute=2, watchlist=["a", "b", "c", "d"])
+    refreshed = asyncio.run(warmer.warm_once())
+    times = [when for when, _, _ in service.searches]
+    assert [keywords for _, keywords, _ in service.searches] == [["a"], ["b"], ["c"]]
+    assert all(later - earlier >= 30 for earlier, later in zip(times, times[1:]))
+    # 本轮剩余时间不够再刷新一次，留到下一轮
+    assert refreshed == 3
+    assert warmer.deferred == 1
+
+
+def test_waits_while_interactive_searches_in_flight(clock):
+    service = FakeService(clock)
+    service.interactive_in_flight = 1
+    warmer = CacheWarmer(service, interval=60, watchlist=["a"])
+    
+    async def finish_interactive():
+        await asyncio.sleep(5)
+        service.interactive_in_flight = 0
+    
+    async def run():
+        start = clock.now
+        finisher = asyncio.create_task(finish_interactive())
+        refreshed = await warmer.warm_once()
+        await finisher
+        return start, refreshed
+    
+    start, refreshed = asyncio.run(run())
+    assert refreshed == 1
+    assert service.searches[0][0] - start >= 5
+
+
+def test_skips_round_when_busy_throughout(clock):
+    service = FakeService(clock)
+    service.plugin_manager.queued = 3
+    warmer = CacheWarmer(service, interval=60, watchlist=["a"])
+    assert asyncio.run(warmer.warm_once()) == 0
+    assert service.searches == []
+    assert warmer.deferred == 1
+
+
+def test_failed_refresh_counted(clock):
+    service = FakeService(clock)
+    
+    async def fail(*args, **kwargs):
+        raise RuntimeError("upstream down")
+    
+    service.search_many = fail
+    warmer = CacheWarmer(service, watchlist=["a", "b"], max_per_minute=0)
+    assert asyncio.run(warmer.warm_once()) == 0
+    assert warmer.failures == 2
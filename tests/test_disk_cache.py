@@ -0,0 +1,225 @@
+"""
+disk_cache：搜索结果的紧凑编码与SQLite持久化缓存
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import disk_cache as disk_module
+from src.cache import TTLCache
+from src.disk_cache import (
+    DiskCache, SQLiteStore, decode_response, decode_results, encode_response, encode_results
+)
+from src.models import Link, MergedLink, SearchResponse, SearchResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+    
+    def time(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(disk_module.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"), vacuum_interval=0)
+    yield store
+    store.close()
+
+
+def make_disk(store, **limits):
+    return DiskCache(store, "test", encode=str.encode, decode=bytes.decode, **limits)
+
+
+def make_result(i, dt=None):
+    return SearchResult(
+        unique_id=f"r-{i}", channel="hunhepan", datetime=dt, title=f"繁花 第{i}集",
+        links=[Link(type="quark", url=f"https://pan.quark.cn/s/{i:04d}", password="ab12")],
+        tags=["剧集"],
+    )
+
+
+def test_results_round_trip():
+    results = [make_result(1, datetime(2024, 1, 15, 20, 30)), make_result(2)]
+    assert decode_results(encode_results(results)) == results
+
+
+def test_response_round_trip_keeps_merged_link_results():
+    results = [make_result(1), make_result(2)]
+    response = SearchResponse(
+        total=2,
+        results=results,
+        merged_by_type={"quark": [MergedLink(url=r.links[0].url, password="ab12", result=r) for r in results]
+                        + [MergedLink(url="https://pan.quark.cn/s/orphan")]},
+        pending=["jikepan"],
+        timed_out=["wanou"],
+        failed=["huban"],
+    )
+    decoded = decode_response(encode_response(response))
+    assert decoded.results == results
+    assert decoded.total == 2
+    assert (decoded.pending, decoded.timed_out, decoded.failed) == (["jikepan"], ["wanou"], ["huban"])
+    merged = decoded.merged_by_type["quark"]
+    # 分组链接引用解码后的结果对象，而非副本
+    assert merged[0].result is decoded.results[0]
+    assert merged[1].note == "繁花 第2集"
+    assert merged[2].result is None
+
+
+def test_response_without_merged_links():
+    decoded = decode_response(encode_response(SearchResponse(total=0)))
+    assert decoded.merged_by_type is None and decoded.results == []
+
+
+def test_aware_datetime_comes_back_as_same_instant_in_utc():
+    shanghai = timezone(timedelta(hours=8))
+    original = datetime(2024, 1, 15, 20, 30, tzinfo=shanghai)
+    [decoded] = decode_results(encode_results([make_result(1, original)]))
+    assert decoded.datetime == original
+    assert decoded.datetime.utcoffset() == timedelta(0)
+
+
+def test_naive_datetime_stays_naive():
+    original = datetime(2024, 1, 15, 20, 30)
+    [decoded] = decode_results(encode_results([make_result(1, original)]))
+    assert decoded.datetime == original and decoded.datetime.tzinfo is None
+
+
+def test_set_flush_get(store, clock):
+    disk = make_disk(store)
+    disk.set_async("k", "value", clock.now + 10, clock.now + 20)
+    disk.flush()
+    value, expires_at, stale_until, size = disk.get_entry("k")
+    assert (value, expires_at, stale_until, size) == ("value", clock.now + 10, clock.now + 20, 5)
+    assert asyncio.run(disk.get_entry_async("missing")) is None
+
+
+def test_entry_past_stale_window_is_not_returned(store, clock):
+    disk = make_disk(store)
+    disk.set("k", "value", clock.now + 10, clock.now + 20)
+    clock.advance(15)
+    assert disk.get_entry("k") is not None
+    clock.advance(5)
+    assert disk.get_entry("k") is None
+
+
+def test_evicts_least_recently_accessed_by_entries(store, clock):
+    disk = make_disk(store, max_entries=3)
+    for key in "abc":
+        disk.set(key, key, clock.now + 60, clock.now + 60)
+        clock.advance(1)
+    # 访问a后b成为最久未访问的条目
+    assert disk.get_entry("a") is not None
+    disk.flush()
+    clock.advance(1)
+    disk.set("d", "d", clock.now + 60, clock.now + 60)
+    assert disk.get_entry("b") is None
+    assert all(disk.get_entry(key) is not None for key in "acd")
+    assert disk.evictions == 1
+    assert disk.get_stats()["entries"] == 3
+
+
+def test_evicts_by_bytes(store, clock):
+    disk = make_disk(store, max_entries=100, max_bytes=250)
+    for key in "abcd":
+        disk.set(key, key * 100, clock.now + 60, clock.now + 60)
+        clock.advance(1)
+    stats = disk.get_stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 200
+    assert disk.get_entry("a") is None and disk.get_entry("d") is not None
+    # 单条超过上限的值不写入
+    disk.set("big", "x" * 300, clock.now + 60, clock.now + 60)
+    assert disk.get_entry("big") is None
+
+
+def test_replacing_entry_keeps_counts(store, clock):
+    disk = make_disk(store, max_entries=2)
+    for _ in range(3):
+        disk.set("a", "value", clock.now + 60, clock.now + 60)
+    disk.set("b", "value", clock.now + 60, clock.now + 60)
+    assert disk.evictions == 0
+    assert disk.get_stats()["entries"] == 2
+
+
+def test_counts_recomputed_after_vacuum(store, clock):
+    disk = make_disk(store, max_entries=2)
+    disk.set("old", "value", clock.now + 1, clock.now + 1)
+    disk.set("a", "value", clock.now + 60, clock.now + 60)
+    clock.advance(2)
+    assert store.vacuum() == 1
+    disk.set("b", "value", clock.now + 60, clock.now + 60)
+    # 清理后条目数重新统计，不会多淘汰
+    assert disk.evictions == 0
+    assert disk.get_entry("a") is not None
+
+
+def test_invalidate_and_clear(store, clock):
+    disk = make_disk(store)
+    for key in "abc":
+        disk.set(key, key, clock.now + 60, clock.now + 60)
+    disk.invalidate("a")
+    disk.flush()
+    assert disk.get_entry("a") is None and disk.get_entry("b") is not None
+    disk.clear()
+    disk.flush()
+    assert disk.get_stats()["entries"] == 0
+    # 清空后计数同步归零，继续写入不会误淘汰
+    disk.set("d", "d", clock.now + 60, clock.now + 60)
+    assert disk.get_stats()["entries"] == 1
+
+
+def test_namespaces_are_independent(store, clock):
+    first = DiskCache(store, "first", encode=str.encode, decode=bytes.decode)
+    second = DiskCache(store, "second", encode=str.encode, decode=bytes.decode)
+    first.set("k", "one", clock.now + 60, clock.now + 60)
+    second.set("k", "two", clock.now + 60, clock.now + 60)
+    second.clear()
+    second.flush()
+    assert first.get_entry("k")[0] == "one"
+    assert second.get_entry("k") is None
+
+
+def test_undecodable_entry_is_dropped(store, clock):
+    disk = DiskCache(store, "test", encode=str.encode, decode=decode_results)
+    disk.set("k", "not zlib", clock.now + 60, clock.now + 60)
+    assert disk.get_entry("k") is None
+    disk.flush()
+    assert disk.get_stats()["entries"] == 0
+
+
+def test_ttl_cache_loads_from_disk(store):
+    disk = DiskCache(store, "plugin", encode=encode_results, decode=decode_results)
+    cache = TTLCache(ttl=60, stale_ttl=60, disk=disk)
+    results = [make_result(1)]
+    cache.set("k", results)
+    disk.flush()
+    
+    # 模拟重启：新的内存层共用同一磁盘缓存
+    restarted = TTLCache(ttl=60, stale_ttl=60, disk=disk)
+    assert asyncio.run(restarted.aget("k")) == results
+    assert restarted.disk_hits == 1
+    assert len(restarted) == 1
+    value, stale = asyncio.run(restarted.aget_with_state("k"))
+    assert value == results and not stale
+    assert restarted.disk_hits == 1
+
+
+def test_ttl_cache_invalidate_reaches_disk(store):
+    disk = make_disk(store)
+    cache = TTLCache(ttl=60, disk=disk)
+    cache.set("k", "value")
+    cache.invalidate("k")
+    disk.flush()
+    assert TTLCache(ttl=60, disk=disk).get("k") is None
@@ -0,0 +1,111 @@
+"""
+html_parser：各解析后端对同一页面的解析结果一致
+"""
+import asyncio
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from plugins.duoduo import DuoduoPlugin
+from plugins.tgsearch import TGSearchPlugin
+from src import html_parser
+
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+BACKENDS = html_parser.available_backends()
+
+
+@pytest.fixture(autouse=True)
+def restore_backend(monkeypatch):
+    monkeypatch.setattr(html_parser, "_backend", None)
+
+
+def read_fixture(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def tg_rows(html):
+    return [
+        (r.message_id, r.unique_id, r.datetime, r.title, r.content,
+         [(link.type, link.url, link.password) for link in r.links])
+        for r in TGSearchPlugin()._parse_messages("channel", html)
+    ]
+
+
+class FakeHttpClient:
+    def __init__(self, html):
+        self.html = html
+    
+    async def get_text(self, url, **kwargs):
+        return self.html
+
+
+def duoduo_rows(html):
+    plugin = DuoduoPlugin()
+    plugin.http_client = FakeHttpClient(html)
+    return [(r.unique_id, r.title) for r in asyncio.run(plugin.search("繁花"))]
+
+
+def per_backend(parse, html):
+    rows = {}
+    for backend in BACKENDS:
+        html_parser.set_backend(backend)
+        rows[backend] = parse(html)
+    return rows
+
+
+def test_html_parser_always_available():
+    assert BACKENDS[-1] == "html.parser"
+
+
+def test_backends_agree_on_tg_channel():
+    html = read_fixture("tg_channel.html")
+    rows = per_backend(tg_rows, html)
+    assert rows["html.parser"]
+    assert all(backend_rows == rows["html.parser"] for backend_rows in rows.values())
+    # 与整页解析的消息一致
+    soup = BeautifulSoup(html, "html.parser")
+    messages = soup.find_all("div", class_="tgme_widget_message_wrap")
+    assert [row[0] for row in rows["html.parser"]] == [
+        m.find("a", class_="tgme_widget_message_date")["href"].split("/")[-1] for m in messages
+    ]
+
+
+def test_backends_agree_on_duoduo_search():
+    html = read_fixture("duoduo_search.html")
+    rows = per_backend(duoduo_rows, html)
+    assert rows["html.parser"]
+    assert all(backend_rows == rows["html.parser"] for backend_rows in rows.values())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_element_interface(backend):
+    html = ('<html><head><style>.item{}</style></head><body>'
+            '<div class="item first"><a href="/a" title="x"> 繁花 <b>4K</b> </a></div>'
+            '<p class="item">漫长的季节</p></body></html>')
+    items = html_parser.select_containers(html, "item", backend=backend)
+    assert len(items) == 2
+    divs = html_parser.select_containers(html, "item", tag="div", backend=backend)
+    assert len(divs) == 1
+    link = divs[0].select_one("a")
+    assert link.attr("href") == "/a"
+    assert link.attr("missing", "default") == "default"
+    assert link.text(strip=True) == "繁花4K"
+    assert link.text(separator="|", strip=True) == "繁花|4K"
+    assert divs[0].select_one("span") is None
+    assert [node.text() for node in divs[0].select("b")] == ["4K"]
+
+
+def test_no_containers():
+    assert html_parser.select_containers("<html><body></body></html>", "item") == []
+
+
+def test_unknown_backend_falls_back():
+    assert html_parser.set_backend("nonexistent") == BACKENDS[0]
+    assert html_parser.get_backend() == BACKENDS[0]
+
+
+def test_element_is_abstract():
+    with pytest.raises(TypeError):
+        html_parser.Element()
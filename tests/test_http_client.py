@@ -0,0 +1,116 @@
+"""
+http_client：相同请求的合并与响应体的短期复用
+"""
+import asyncio
+from collections import Counter
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src import json_decoder
+from src.http_client import HttpClient
+
+
+def key(method="GET", url="https://api.example.com/search", decode="json", schema=None, **kwargs):
+    return HttpClient._dedupe_key(method, url, decode, schema, kwargs)
+
+
+def test_dedupe_key_ignores_headers_and_param_order():
+    base = key(params={"q": "繁花", "page": 1}, headers={"User-Agent": "a"})
+    assert base == key(params={"page": "1", "q": "繁花"}, headers={"User-Agent": "b"})
+
+
+def test_dedupe_key_distinguishes_request():
+    base = key(params={"q": "a"})
+    assert base != key(method="POST", params={"q": "a"})
+    assert base != key(url="https://api.example.com/other", params={"q": "a"})
+    assert base != key(params={"q": "b"})
+    assert base != key(decode="text", params={"q": "a"})
+    assert base != key(schema=json_decoder.MACCMS_VOD, params={"q": "a"})
+    assert key(schema=json_decoder.MACCMS_VOD) != key(schema=json_decoder.HUNHEPAN_SEARCH)
+    assert key(method="POST", json={"q": "a", "page": 1}) == key(method="POST", json={"page": 1, "q": "a"})
+    assert key(method="POST", json={"q": "a"}) != key(method="POST", json={"q": "b"})
+
+
+def run(test, **client_options):
+    """启动本地服务，以 (客户端, 服务地址, 各路径的请求次数) 执行test"""
+    hits = Counter()
+    
+    async def handler(request):
+        hits[request.path] += 1
+        await asyncio.sleep(0.02)
+        return web.json_response({"path": request.path, "list": [{"name": "繁花"}]})
+    
+    async def main():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        server = TestServer(app)
+        await server.start_server()
+        client = HttpClient(**client_options)
+        try:
+            await test(client, str(server.make_url("")), hits)
+        finally:
+            await client.close()
+            await server.close()
+    
+    asyncio.run(main())
+
+
+def test_concurrent_gets_share_one_request():
+    async def test(client, base, hits):
+        results = await asyncio.gather(
+            client.get_json(base + "/a", headers={"User-Agent": "one"}),
+            client.get_json(base + "/a", headers={"User-Agent": "two"}),
+            client.get_json(base + "/a"),
+        )
+        assert all(result["path"] == "/a" for result in results)
+        assert hits["/a"] == 1
+        # 再次请求复用响应体
+        await client.get_json(base + "/a")
+        assert hits["/a"] == 1
+    
+    run(test)
+
+
+def test_post_not_deduplicated_unless_idempotent():
+    async def test(client, base, hits):
+        await asyncio.gather(*(client.post_json(base + "/post", json={"q": "a"}) for _ in range(2)))
+        assert hits["/post"] == 2
+        await asyncio.gather(*(client.post_json(base + "/query", json={"q": "a"}, idempotent=True)
+                               for _ in range(2)))
+        assert hits["/query"] == 1
+    
+    run(test)
+
+
+def test_reuse_expires_after_dedupe_ttl():
+    async def test(client, base, hits):
+        await client.get_json(base + "/a")
+        await asyncio.sleep(0.1)
+        await client.get_json(base + "/a")
+        assert hits["/a"] == 2
+    
+    run(test, dedupe_ttl=0.05)
+
+
+def test_callers_get_independent_payloads():
+    async def test(client, base, hits):
+        first, second = await asyncio.gather(client.get_json(base + "/a"), client.get_json(base + "/a"))
+        third = await client.get_json(base + "/a")
+        assert hits["/a"] == 1
+        first["list"][0]["name"] = "changed"
+        first["path"] = "changed"
+        assert second == third == {"path": "/a", "list": [{"name": "繁花"}]}
+        assert second is not third
+    
+    run(test)
+
+
+def test_schema_decoding_with_shared_body():
+    async def test(client, base, hits):
+        full = await client.get_json(base + "/a")
+        decoded = await client.get_json(base + "/a", schema=json_decoder.JIKEPAN_SEARCH)
+        assert decoded["list"] == full["list"]
+        assert client.get_stats()["singleflight"]["executed"] == 2
+    
+    run(test)
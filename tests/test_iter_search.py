@@ -0,0 +1,211 @@
+"""
+PluginManager.iter_search：单插件超时、整体截止时间、迟到插件的处理，以及SearchService的法定数量提前返回
+"""
+import asyncio
+import time
+
+import yaml
+
+from src.config import ConfigManager
+from src.models import Link, SearchResult
+from src.plugin_base import BasePlugin
+from src.plugin_manager import PluginManager
+from src.resilience import CircuitOpenError
+from src.search_service import SearchService
+
+
+class FakePlugin(BasePlugin):
+    """按指定延迟返回一条结果或抛出异常的插件"""
+    
+    cacheable = False
+    
+    def __init__(self, name, delay=0.0, error=None, priority=1):
+        self._name = name
+        self.delay = delay
+        self.error = error
+        self._priority = priority
+        self.calls = 0
+        self.finished = 0
+        self.cancelled = 0
+    
+    def name(self):
+        return self._name
+    
+    def priority(self):
+        return self._priority
+    
+    async def search(self, keyword, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        self.finished += 1
+        return [SearchResult(unique_id=f"{self._name}-{keyword}", channel=self._name, title=keyword,
+                             links=[Link(type="quark", url=f"https://pan.quark.cn/s/{self._name}")])]
+
+
+def make_manager(*plugins, **settings):
+    manager = PluginManager()
+    for name, value in settings.items():
+        setattr(manager, name, value)
+    for plugin in plugins:
+        manager.register(plugin)
+    return manager
+
+
+def collect(manager, keyword="k", **kwargs):
+    async def run():
+        return [(name, results) async for name, results in manager.iter_search(keyword, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_yields_in_completion_order():
+    manager = make_manager(FakePlugin("slow", 0.05), FakePlugin("fast", 0.0))
+    outcomes = collect(manager)
+    assert [name for name, _ in outcomes] == ["fast", "slow"]
+    assert all(len(results) == 1 for _, results in outcomes)
+
+
+def test_plugin_timeout_yields_none():
+    manager = make_manager(FakePlugin("slow", 1.0), FakePlugin("fast"), plugin_timeouts={"slow": 0.05})
+    outcomes = dict(collect(manager))
+    assert outcomes["slow"] is None
+    assert len(outcomes["fast"]) == 1
+
+
+def test_plugin_error_yields_exception():
+    manager = make_manager(FakePlugin("broken", error=ValueError("boom")))
+    [(name, outcome)] = collect(manager)
+    assert name == "broken" and isinstance(outcome, ValueError)
+
+
+def test_open_breaker_yields_circuit_open_error():
+    plugin = FakePlugin("flaky")
+    manager = make_manager(plugin, breaker_threshold=1)
+    manager.get_breaker("flaky").record_failure()
+    [(_, outcome)] = collect(manager)
+    assert isinstance(outcome, CircuitOpenError)
+    assert plugin.calls == 0
+
+
+def test_deadline_reports_unfinished_plugins():
+    manager = make_manager(FakePlugin("slow", 1.0), FakePlugin("fast"), late_policy="cancel")
+    start = time.monotonic()
+    outcomes = collect(manager, deadline=0.1)
+    assert time.monotonic() - start < 0.5
+    assert outcomes[0][0] == "fast"
+    assert outcomes[1] == ("slow", None)
+
+
+def test_late_plugin_cancelled():
+    slow = FakePlugin("slow", 0.3)
+    manager = make_manager(slow, late_policy="cancel")
+    
+    async def run():
+        outcomes = [item async for item in manager.iter_search("k", deadline=0.05)]
+        await asyncio.sleep(0.4)
+        return outcomes
+    
+    assert asyncio.run(run()) == [("slow", None)]
+    assert slow.cancelled == 1
+    assert slow.finished == 0
+
+
+def test_late_plugin_keeps_running_and_fills_cache():
+    slow = FakePlugin("slow", 0.2)
+    slow.cacheable = True
+    manager = make_manager(slow, late_policy="cache")
+    manager.result_cache.ttl = 60
+    manager.result_cache.max_entries = 10
+    
+    async def run():
+        outcomes = [item async for item in manager.iter_search("k", deadline=0.05)]
+        await asyncio.gather(*list(manager._late_tasks))
+        cached = [item async for item in manager.iter_search("k", deadline=0.05)]
+        return outcomes, cached
+    
+    outcomes, cached = asyncio.run(run())
+    assert outcomes == [("slow", None)]
+    assert cached[0][0] == "slow" and cached[0][1][0].unique_id == "slow-k"
+    assert slow.calls == 1
+
+
+def test_early_exit_handles_remaining_tasks():
+    slow = FakePlugin("slow", 0.3)
+    manager = make_manager(FakePlugin("fast"), slow, late_policy="cancel")
+    
+    async def run():
+        async for _ in manager.iter_search("k"):
+            break
+        await asyncio.sleep(0.05)
+    
+    asyncio.run(run())
+    assert slow.cancelled == 1
+
+
+def test_search_all_matches_iter_search():
+    manager = make_manager(FakePlugin("a"), FakePlugin("b", 0.01), FakePlugin("broken", error=ValueError()),
+                           plugin_timeouts={"c": 0.01})
+    manager.register(FakePlugin("c", 1.0))
+    results = asyncio.run(manager.search_all("k"))
+    assert sorted(r.unique_id for r in results) == ["a-k", "b-k"]
+
+
+def make_service(tmp_path, plugins, **search_config):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump({"cache_ttl": 300, "search": search_config}), encoding="utf-8")
+    return SearchService(make_manager(*plugins, late_policy="cancel"), ConfigManager(str(path)))
+
+
+def test_quorum_plugins_returns_early(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("b", 0.02), FakePlugin("c", 1.0)],
+                           quorum_plugins=2)
+    start = time.monotonic()
+    response = asyncio.run(service.search("k"))
+    assert time.monotonic() - start < 0.5
+    assert response.total == 2
+    assert response.pending == ["c"]
+    # 缺少来源的响应不缓存
+    assert service.cache.get(service._cache_key("k", {})) is None
+
+
+def test_quorum_results_returns_early(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("b", 1.0)], quorum_results=1)
+    response = asyncio.run(service.search("k"))
+    assert response.total == 1
+    assert response.pending == ["b"]
+
+
+def test_deadline_marks_timed_out_plugins(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("b", 1.0)], deadline=0.05)
+    response = asyncio.run(service.search("k"))
+    assert response.total == 1
+    assert response.timed_out == ["b"]
+    assert response.pending == []
+
+
+def test_complete_response_cached(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("b")])
+    response = asyncio.run(service.search("k"))
+    assert response.total == 2
+    assert service.cache.get(service._cache_key("k", {})) is response
+
+
+def test_failed_plugins_reported_and_not_cached(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("broken", error=ValueError("boom"))])
+    response = asyncio.run(service.search("k"))
+    assert response.total == 1
+    assert response.failed == ["broken"]
+    assert response.timed_out == []
+    assert service.cache.get(service._cache_key("k", {})) is None
+
+
+def test_search_many_reports_failed_plugins(tmp_path):
+    service = make_service(tmp_path, [FakePlugin("a"), FakePlugin("broken", error=ValueError("boom"))])
+    responses = asyncio.run(service.search_many(["k"]))
+    assert responses["k"].failed == ["broken"]
+    assert service.cache.get(service._cache_key("k", {})) is None
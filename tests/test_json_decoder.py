@@ -0,0 +1,96 @@
+"""
+json_decoder：完整解码与按Schema只解码需要的字段
+"""
+import json
+
+import pytest
+
+from src import json_decoder
+
+
+PAGE = {
+    "code": 200,
+    "msg": "ok",
+    "data": {"total": 1, "list": [{
+        "disk_id": "d1",
+        "disk_name": "繁花",
+        "disk_pass": "ab12",
+        "disk_type": "QUARK",
+        "link": "https://pan.quark.cn/s/abc",
+        "shared_time": "2024-01-15 20:30:00",
+        "files": "第01集.mkv",
+        "share_user": "user",
+        "weight": 0.5,
+    }]},
+}
+
+
+def encode(data):
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def backend(request, monkeypatch):
+    """依次只保留一个解码库运行，未安装的跳过"""
+    if request.param != "json" and getattr(json_decoder, request.param) is None:
+        pytest.skip(f"未安装{request.param}")
+    if request.param != "orjson":
+        monkeypatch.setattr(json_decoder, "orjson", None)
+    if request.param != "msgspec":
+        monkeypatch.setattr(json_decoder, "msgspec", None)
+    return request.param
+
+
+def test_loads(backend):
+    assert json_decoder.get_backend() == backend
+    assert json_decoder.loads(encode(PAGE)) == PAGE
+    assert json_decoder.loads(json.dumps(PAGE)) == PAGE
+    assert json_decoder.loads(b"  ") is None
+
+
+def test_schema_backend(backend):
+    assert json_decoder.get_schema_backend() == backend
+
+
+def test_schema_decodes_declared_fields(backend):
+    schema = json_decoder.Schema("hunhepan_search", json_decoder.HunhepanResponse)
+    decoded = schema.decode(encode(PAGE))
+    [item] = decoded["data"]["list"]
+    assert decoded["code"] == 200
+    assert item["disk_name"] == "繁花" and item["link"] == "https://pan.quark.cn/s/abc"
+    if json_decoder.msgspec is not None:
+        # 未声明的字段不解码
+        assert "msg" not in decoded and "share_user" not in item
+    else:
+        assert decoded == PAGE
+
+
+def test_schema_type_mismatch_falls_back_to_full_decode(backend):
+    page = json.loads(json.dumps(PAGE))
+    # 声明为str的字段实际返回了数字
+    page["data"]["list"][0]["disk_pass"] = 1234
+    schema = json_decoder.Schema("hunhepan_search", json_decoder.HunhepanResponse)
+    assert schema.decode(encode(page)) == page
+
+
+def test_schema_empty_body(backend):
+    assert json_decoder.HUNHEPAN_SEARCH.decode(b"") is None
+
+
+def test_decode_without_schema(backend):
+    assert json_decoder.decode(encode(PAGE)) == PAGE
+    assert json_decoder.decode(encode({"list": []}), json_decoder.MACCMS_VOD) == {"list": []}
+
+
+def test_invalid_json_raises(backend):
+    with pytest.raises(ValueError):
+        json_decoder.loads(b"{not json")
+    with pytest.raises(ValueError):
+        json_decoder.Schema("maccms_vod", json_decoder.MacCMSResponse).decode(b"{not json")
+
+
+def test_schema_backend_with_both_libraries():
+    if json_decoder.orjson is None or json_decoder.msgspec is None:
+        pytest.skip("需要同时安装orjson与msgspec")
+    assert json_decoder.get_backend() == "orjson"
+    assert json_decoder.get_schema_backend() == "msgspec"
@@ -0,0 +1,95 @@
+"""
+link_extractor：单次扫描提取链接与提取码、按主机分类
+"""
+import pytest
+
+from src.link_extractor import classify_url, extract_links, extract_password
+from src.url_normalizer import normalize_link_url
+
+
+def _links(text):
+    return [(link.type, link.url, link.password) for link in extract_links(text)]
+
+
+@pytest.mark.parametrize("url, link_type", [
+    ("https://pan.baidu.com/s/1AbC-d_e", "baidu"),
+    ("https://pan.baidu.com/share/init?surl=AbC", "baidu"),
+    ("https://www.alipan.com/s/AbC123", "aliyun"),
+    ("https://pan.quark.cn/s/abc123", "quark"),
+    ("https://drive.uc.cn/s/abc123", "uc"),
+    ("https://pan.xunlei.com/s/VNabc-12", "xunlei"),
+    ("https://cloud.189.cn/t/AbCd", "tianyi"),
+    ("https://cloud.189.cn/web/share?code=AbCdEf123", "tianyi"),
+    ("https://h5.cloud.189.cn/web/share.html#/t/AbCd", "tianyi"),
+    ("https://115.com/s/sw1abc", "115"),
+    ("https://www.123pan.com/s/abc-Def", "123"),
+    ("https://caiyun.139.com/m/i?0F5CJUOrnRsuX", "mobile"),
+    ("https://mypikpak.com/s/VNabc", "pikpak"),
+    ("magnet:?xt=urn:btih:0123456789abcdef0123456789abcdef01234567", "magnet"),
+    ("ed2k://|file|繁花.mkv|123|0123456789ABCDEF0123456789ABCDEF|/", "ed2k"),
+])
+def test_extract_each_provider(url, link_type):
+    assert _links(f"资源 {url} 更新") == [(link_type, url, "")]
+
+
+def test_classify_url():
+    assert classify_url("HTTPS://PAN.QUARK.CN/s/abc") == "quark"
+    assert classify_url("第1集$https://pan.baidu.com/s/1abc") == "baidu"
+    assert classify_url("magnet:?xt=urn:btih:abc") == "magnet"
+    assert classify_url("https://pan.quark.cn.example.com/s/abc") == ""
+    assert classify_url("https://example.com/s/abc") == ""
+
+
+def test_password_from_query():
+    assert _links("https://pan.baidu.com/s/1abc?pwd=ab12") == [("baidu", "https://pan.baidu.com/s/1abc?pwd=ab12", "ab12")]
+    assert extract_password("https://115.com/s/sw1abc?password=x9y8#") == "x9y8"
+    # 天翼web/share中的code是分享码而非提取码
+    assert extract_password("https://cloud.189.cn/web/share?code=AbCdEf12") == ""
+
+
+def test_text_password_attaches_to_preceding_link():
+    text = "夸克 https://pan.quark.cn/s/aaa111 提取码：ab12\n百度 https://pan.baidu.com/s/1bbb 密码: cd34"
+    assert _links(text) == [
+        ("quark", "https://pan.quark.cn/s/aaa111", "ab12"),
+        ("baidu", "https://pan.baidu.com/s/1bbb", "cd34"),
+    ]
+
+
+def test_text_password_before_link_attaches_to_next_link():
+    text = "提取码 ab12\n\n\nhttps://pan.baidu.com/s/1bbb"
+    assert _links(text) == [("baidu", "https://pan.baidu.com/s/1bbb", "ab12")]
+
+
+def test_text_password_does_not_override_query_password():
+    text = "https://pan.baidu.com/s/1abc?pwd=ab12 pwd=zz99"
+    assert _links(text)[0][2] == "ab12"
+
+
+@pytest.mark.parametrize("text", [
+    "barcode abcd1234 https://pan.baidu.com/s/1xyz",
+    "Xcode 2024 https://pan.baidu.com/s/1xyz",
+    "https://pan.baidu.com/s/1xyz unicode 9999",
+])
+def test_keywords_inside_words_are_not_passwords(text):
+    assert _links(text) == [("baidu", "https://pan.baidu.com/s/1xyz", "")]
+
+
+def test_ascii_keywords_after_non_letters():
+    assert _links("https://pan.baidu.com/s/1xyz (pwd:ab12)")[0][2] == "ab12"
+    assert _links("https://pan.baidu.com/s/1xyz 提取code=ab12")[0][2] == "ab12"
+
+
+def test_duplicate_links_kept_once():
+    text = "https://pan.quark.cn/s/aaa111\nhttps://pan.quark.cn/s/aaa111"
+    assert len(extract_links(text)) == 1
+
+
+def test_tianyi_web_share_survives_normalization():
+    # 提取出的web/share?code=链接在合并时必须保留分享码，不同分享不能合并为一条
+    first, second = extract_links(
+        "https://cloud.189.cn/web/share?code=AAAA1111 访问码：ab12\n"
+        "https://cloud.189.cn/web/share?code=BBBB2222"
+    )
+    assert first.password == "ab12"
+    assert normalize_link_url(first.url, first.password) == ("https://cloud.189.cn/web/share?code=AAAA1111", "ab12")
+    assert normalize_link_url(second.url, second.password)[0] == "https://cloud.189.cn/web/share?code=BBBB2222"
@@ -0,0 +1,119 @@
+"""
+local_index：中日韩二元组分词、按内容键收录与检索
+"""
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from src.config import ConfigManager
+from src.local_index import LocalIndex, build_match_query, content_key, ngram_tokens
+from src.models import Link, SearchResult
+from src.plugin_manager import PluginManager
+from src.search_service import SearchService
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.db"))
+    yield index
+    index.close()
+
+
+def make_result(unique_id, title, url, channel="jikepan", **fields):
+    return SearchResult(unique_id=unique_id, channel=channel, title=title,
+                        links=[Link(type="quark", url=url)], **fields)
+
+
+def test_ngram_tokens():
+    assert ngram_tokens("繁花 第一集") == ["繁花", "花", "第一", "一集", "集"]
+    assert ngram_tokens("繁花第一集", query=True) == ["繁花", "花第", "第一", "一集"]
+    assert ngram_tokens("The Wire S01 4K") == ["the", "wire", "s01", "4k"]
+    assert ngram_tokens("進撃の巨人") == ["進撃", "撃の", "の巨", "巨人", "人"]
+
+
+def test_build_match_query():
+    assert build_match_query("繁花") == '"繁花"'
+    assert build_match_query("花") == '"花"*'
+    assert build_match_query("繁花 繁花 4K") == '"繁花" AND "4k"'
+    assert build_match_query("  ") == ""
+
+
+def test_cjk_bigram_matching(index):
+    index.add([
+        make_result("jikepan-1", "繁花 第一集 4K", "https://pan.quark.cn/s/aaa"),
+        make_result("jikepan-2", "花繁叶茂", "https://pan.quark.cn/s/bbb"),
+    ])
+    assert [r.title for r in index.search("繁花")] == ["繁花 第一集 4K"]
+    assert [r.title for r in index.search("第一集")] == ["繁花 第一集 4K"]
+    assert [r.title for r in index.search("4k")] == ["繁花 第一集 4K"]
+    # 单字既能命中二元组开头，也能命中段末的字
+    assert len(index.search("花")) == 2
+    assert len(index.search("茂")) == 1
+    assert index.search("繁花叶") == []
+
+
+def test_upsert_by_content(index):
+    index.add([make_result("jikepan-0", "繁花 旧标题", "https://pan.quark.cn/s/aaa")])
+    index.add([make_result("jikepan-3", "繁花 新标题", "https://pan.quark.cn/s/aaa?entry=share")])
+    assert index.get_stats()["entries"] == 1
+    assert [r.title for r in index.search("繁花")] == ["繁花 新标题"]
+    # 旧标题的索引词已删除
+    assert index.search("旧标题") == []
+
+
+def test_colliding_unique_ids_are_kept_apart(index):
+    index.add([make_result("jikepan-0", "繁花", "https://pan.quark.cn/s/aaa")])
+    index.add([make_result("jikepan-0", "漫长的季节", "https://pan.quark.cn/s/bbb")])
+    assert index.get_stats()["entries"] == 2
+    assert len(index.search("繁花")) == 1
+    assert len(index.search("季节")) == 1
+
+
+def test_same_links_from_different_channels_are_separate(index):
+    url = "https://pan.quark.cn/s/aaa"
+    index.add([make_result("jikepan-0", "繁花", url), make_result("hunhepan-0", "繁花", url, channel="hunhepan")])
+    assert sorted(r.channel for r in index.search("繁花")) == ["hunhepan", "jikepan"]
+
+
+def test_local_ids_are_prefixed(index, tmp_path):
+    live = make_result("jikepan-0", "繁花", "https://pan.quark.cn/s/aaa",
+                       datetime=datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc))
+    index.add([live])
+    [local] = index.search("繁花")
+    assert local.unique_id == f"local-{content_key(live)}"
+    assert local.datetime == live.datetime
+    # 本地结果不会与在线结果按unique_id互相去重
+    other = make_result("jikepan-0", "漫长的季节", "https://pan.quark.cn/s/bbb")
+    (tmp_path / "config.yaml").write_text("cache_ttl: 0\n", encoding="utf-8")
+    service = SearchService(PluginManager(), ConfigManager(str(tmp_path / "config.yaml")))
+    kept = service._deduplicate_results([other, local])
+    assert kept == [other, local]
+
+
+def test_prunes_oldest_beyond_max_entries(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.db"), max_entries=2)
+    try:
+        for i in range(3):
+            index.add([make_result(f"jikepan-{i}", f"繁花 {i}", f"https://pan.quark.cn/s/{i}")])
+        assert index.get_stats()["entries"] == 2
+        assert index.pruned == 1
+        assert sorted(r.title for r in index.search("繁花")) == ["繁花 1", "繁花 2"]
+    finally:
+        index.close()
+
+
+def test_rebuilds_index_from_older_schema(tmp_path):
+    path = tmp_path / "index.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, unique_id TEXT NOT NULL UNIQUE)")
+    conn.execute("INSERT INTO results (unique_id) VALUES ('jikepan-0')")
+    conn.commit()
+    conn.close()
+    index = LocalIndex(str(path))
+    try:
+        assert index.get_stats()["entries"] == 0
+        index.add([make_result("jikepan-0", "繁花", "https://pan.quark.cn/s/aaa")])
+        assert len(index.search("繁花")) == 1
+    finally:
+        index.close()
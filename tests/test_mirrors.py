@@ -0,0 +1,127 @@
+"""
+mirrors：多镜像对冲请求与镜像健康状况
+"""
+import asyncio
+
+import pytest
+
+from src.mirrors import Mirror, MirrorPool
+
+
+class FakeMirrors:
+    """按地址配置延迟与异常的请求函数，记录调用与取消"""
+    
+    def __init__(self, **behaviour):
+        # 地址 -> (延迟, 异常或返回值)
+        self.behaviour = behaviour
+        self.calls = []
+        self.cancelled = []
+    
+    async def __call__(self, url):
+        self.calls.append(url)
+        delay, outcome = self.behaviour[url]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def race(pool, fetch, **kwargs):
+    async def run():
+        result = await pool.race(fetch, **kwargs)
+        # 让被取消的请求处理取消
+        await asyncio.sleep(0)
+        return result
+    return asyncio.run(run())
+
+
+def test_primary_answers_before_hedge_delay():
+    pool = MirrorPool(["a", "b"], hedge_delay=0.2)
+    fetch = FakeMirrors(a=(0.01, "from a"), b=(0, "from b"))
+    assert race(pool, fetch) == "from a"
+    assert fetch.calls == ["a"]
+    assert pool.mirrors[0].successes == 1
+
+
+def test_hedged_mirror_wins_and_loser_is_cancelled():
+    pool = MirrorPool(["a", "b"], hedge_delay=0.02)
+    fetch = FakeMirrors(a=(1.0, "from a"), b=(0.01, "from b"))
+    assert race(pool, fetch) == "from b"
+    assert fetch.calls == ["a", "b"]
+    assert fetch.cancelled == ["a"]
+    # 被取消的镜像不计为失败
+    assert pool.mirrors[0].failures == 0
+    assert pool.mirrors[1].latency is not None
+
+
+def test_failure_tries_next_mirror_immediately():
+    pool = MirrorPool(["a", "b"], hedge_delay=10)
+    fetch = FakeMirrors(a=(0, ConnectionError("down")), b=(0, "from b"))
+    assert asyncio.run(asyncio.wait_for(pool.race(fetch), 1)) == "from b"
+    assert pool.mirrors[0].consecutive_failures == 1
+
+
+def test_all_mirrors_fail_raises_last_error():
+    pool = MirrorPool(["a", "b", "c"], hedge_delay=0.01)
+    fetch = FakeMirrors(a=(0, ConnectionError("a")), b=(0.01, ConnectionError("b")), c=(0.02, ConnectionError("c")))
+    with pytest.raises(ConnectionError, match="c"):
+        race(pool, fetch)
+    assert all(mirror.failures == 1 for mirror in pool.mirrors)
+    assert not any(stats["healthy"] for stats in pool.get_stats())
+
+
+def test_invalid_results_return_last_result():
+    pool = MirrorPool(["a", "b"], hedge_delay=0.01)
+    fetch = FakeMirrors(a=(0, {"list": []}), b=(0, {"list": []}))
+    assert race(pool, fetch, is_valid=lambda data: bool(data["list"])) == {"list": []}
+    assert all(mirror.failures == 1 for mirror in pool.mirrors)
+
+
+def test_ordered_by_health_then_latency():
+    pool = MirrorPool(["a", "b", "c", "d"], recovery=60)
+    a, b, c, d = pool.mirrors
+    b.record_success(0.5)
+    c.record_success(0.1)
+    a.record_failure()
+    # 未测得延迟的镜像排在已测得的之后，不健康的镜像排在最后
+    assert [m.url for m in pool.ordered()] == ["c", "b", "d", "a"]
+
+
+def test_unhealthy_mirror_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.mirrors.time.monotonic", lambda: now[0])
+    mirror = Mirror("a")
+    mirror.record_failure()
+    assert not mirror.is_healthy(recovery=60)
+    now[0] += 60
+    assert mirror.is_healthy(recovery=60)
+
+
+def test_unhealthy_mirror_is_tried_last():
+    pool = MirrorPool(["a", "b"], hedge_delay=10)
+    pool.mirrors[0].record_success(0.01)
+    pool.mirrors[0].record_failure()
+    pool.mirrors[1].record_success(1.0)
+    fetch = FakeMirrors(a=(0, "from a"), b=(0.01, "from b"))
+    assert race(pool, fetch) == "from b"
+    assert fetch.calls == ["b"]
+
+
+def test_unhealthy_mirrors_are_hedged_without_delay():
+    pool = MirrorPool(["a", "b"], hedge_delay=10)
+    for mirror in pool.mirrors:
+        mirror.record_failure()
+    fetch = FakeMirrors(a=(1.0, "from a"), b=(0.01, "from b"))
+    assert asyncio.run(asyncio.wait_for(pool.race(fetch), 0.5)) == "from b"
+    assert fetch.calls == ["a", "b"]
+
+
+def test_latency_is_ewma():
+    mirror = Mirror("a")
+    mirror.record_success(1.0)
+    mirror.record_success(2.0)
+    assert mirror.latency == pytest.approx(Mirror.EWMA_ALPHA * 2.0 + (1 - Mirror.EWMA_ALPHA) * 1.0)
@@ -0,0 +1,165 @@
+"""
+resilience：瞬时故障重试与插件熔断
+"""
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from src import resilience
+from src.resilience import CircuitBreaker, RetryPolicy, is_transient_error, request_deadline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def response_error(status):
+    return aiohttp.ClientResponseError(request_info=None, history=(), status=status)
+
+
+class Flaky:
+    """前failures次调用抛出error，之后返回ok"""
+    
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def test_is_transient_error():
+    assert is_transient_error(aiohttp.ClientConnectionError())
+    assert is_transient_error(asyncio.TimeoutError())
+    assert is_transient_error(response_error(503))
+    assert is_transient_error(response_error(429))
+    assert not is_transient_error(response_error(404))
+    assert not is_transient_error(ValueError("bad json"))
+
+
+def test_retries_transient_errors():
+    func = Flaky(aiohttp.ClientConnectionError(), failures=2)
+    policy = RetryPolicy(retry_times=3, base_delay=0, max_delay=0)
+    assert asyncio.run(policy.call(func)) == "ok"
+    assert func.calls == 3
+
+
+def test_gives_up_after_retry_times():
+    func = Flaky(response_error(503), failures=10)
+    policy = RetryPolicy(retry_times=2, base_delay=0, max_delay=0)
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(policy.call(func))
+    assert func.calls == 3
+
+
+def test_does_not_retry_other_errors():
+    func = Flaky(ValueError("bad json"), failures=1)
+    with pytest.raises(ValueError):
+        asyncio.run(RetryPolicy(retry_times=3, base_delay=0, max_delay=0).call(func))
+    assert func.calls == 1
+
+
+def test_retry_stops_at_request_deadline():
+    func = Flaky(aiohttp.ClientConnectionError(), failures=10)
+    policy = RetryPolicy(retry_times=5, base_delay=1, max_delay=1)
+    policy.backoff = lambda attempt: 1.0
+    
+    async def run():
+        token = request_deadline.set(time.monotonic() + 0.5)
+        try:
+            return await policy.call(func)
+        finally:
+            request_deadline.reset(token)
+    
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(run())
+    assert func.calls == 1
+
+
+def test_backoff_bounds():
+    policy = RetryPolicy(base_delay=0.2, max_delay=2.0)
+    for attempt in range(8):
+        cap = min(2.0, 0.2 * 2 ** attempt)
+        assert all(0 <= policy.backoff(attempt) <= cap for _ in range(50))
+
+
+def test_from_config():
+    policy = RetryPolicy.from_config({"search": {"retry_times": 1, "retry_base_delay": 0.5}})
+    assert (policy.retry_times, policy.base_delay, policy.max_delay) == (1, 0.5, 2.0)
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats()["total_skipped"] == 1
+
+
+def test_success_resets_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.advance(59)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.advance(60)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.advance(60)
+    assert breaker.allow()
+
+
+def test_abandoned_probe_allows_new_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.advance(60)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,110 @@
+"""
+scheduler：全局与单主机并发限制，跨事件循环共享
+"""
+import asyncio
+import threading
+
+from src.scheduler import ConcurrencyLimiter, RequestScheduler
+
+
+async def _track(scheduler, key, active, peaks, hold=0.02):
+    async with scheduler.key_slot(key):
+        active[key] = active.get(key, 0) + 1
+        active["*"] = active.get("*", 0) + 1
+        peaks[key] = max(peaks.get(key, 0), active[key])
+        peaks["*"] = max(peaks.get("*", 0), active["*"])
+        await asyncio.sleep(hold)
+        active[key] -= 1
+        active["*"] -= 1
+
+
+def test_global_and_per_host_limits():
+    scheduler = RequestScheduler(max_concurrent=3, per_host_limit=2, host_limits={"slow.example": 1})
+    active, peaks = {}, {}
+    
+    async def run():
+        keys = ["a.example"] * 6 + ["b.example"] * 6 + ["slow.example"] * 3
+        await asyncio.gather(*(_track(scheduler, key, active, peaks) for key in keys))
+    
+    asyncio.run(run())
+    assert peaks["*"] == 3
+    assert peaks["a.example"] <= 2 and peaks["b.example"] <= 2
+    assert peaks["slow.example"] == 1
+    stats = scheduler.get_stats()
+    assert stats["total_requests"] == 15
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+
+
+def test_slot_uses_url_host():
+    scheduler = RequestScheduler(max_concurrent=10, per_host_limit=1)
+    
+    async def run():
+        async with scheduler.slot("https://pan.example.com/api?q=1"):
+            return scheduler.get_stats()["hosts"]
+    
+    hosts = asyncio.run(run())
+    assert hosts["pan.example.com"]["in_flight"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    limiter = ConcurrencyLimiter(1)
+    
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        # 名额已全部归还，可以立即再次获取
+        await asyncio.wait_for(limiter.acquire(), 0.1)
+        limiter.release()
+    
+    asyncio.run(run())
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_cancel_after_handoff_returns_slot():
+    limiter = ConcurrencyLimiter(1)
+    
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # 名额转交后、等待者恢复运行前取消
+        limiter.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+    
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+
+
+def test_limit_shared_across_event_loops():
+    limiter = ConcurrencyLimiter(2)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+    
+    async def worker():
+        for _ in range(5):
+            await limiter.acquire()
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.005)
+            with lock:
+                state["active"] -= 1
+            limiter.release()
+    
+    async def session():
+        await asyncio.gather(worker(), worker())
+    
+    threads = [threading.Thread(target=asyncio.run, args=(session(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert state["peak"] == 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,153 @@
+"""
+SearchService.search_many / iter_search_many：批量调度限制、提前结束与缓存命中
+"""
+import asyncio
+from contextlib import aclosing
+
+import yaml
+
+from src.config import ConfigManager
+from src.models import Link, SearchResponse, SearchResult
+from src.plugin_base import BasePlugin
+from src.plugin_manager import PluginManager
+from src.search_service import SearchService
+
+
+class TrackingPlugin(BasePlugin):
+    """记录同时进行的调用数，按关键词指定延迟"""
+    
+    cacheable = False
+    
+    def __init__(self, name, delay=0.02, delays=None):
+        self._name = name
+        self.delay = delay
+        self.delays = delays or {}
+        self.keywords = []
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+    
+    def name(self):
+        return self._name
+    
+    def priority(self):
+        return 1
+    
+    async def search(self, keyword, **kwargs):
+        self.keywords.append(keyword)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(keyword, self.delay))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        return [SearchResult(unique_id=f"{self._name}-{keyword}", channel=self._name, title=keyword,
+                             links=[Link(type="quark", url=f"https://pan.quark.cn/s/{self._name}{keyword}")])]
+
+
+def make_service(tmp_path, *plugins, **search_config):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump({"cache_ttl": 300, "search": search_config}), encoding="utf-8")
+    manager = PluginManager()
+    for plugin in plugins:
+        manager.register(plugin)
+    return SearchService(manager, ConfigManager(str(path)))
+
+
+def test_batch_scheduler_limits(tmp_path):
+    a, b = TrackingPlugin("a"), TrackingPlugin("b")
+    service = make_service(tmp_path, a, b, batch_concurrency=3, batch_per_plugin=2)
+    active = {"total": 0, "peak": 0}
+    
+    def track(plugin):
+        search = plugin.search
+        
+        async def wrapped(keyword, **kwargs):
+            active["total"] += 1
+            active["peak"] = max(active["peak"], active["total"])
+            try:
+                return await search(keyword, **kwargs)
+            finally:
+                active["total"] -= 1
+        plugin.search = wrapped
+    
+    track(a)
+    track(b)
+    responses = asyncio.run(service.search_many([f"k{i}" for i in range(6)]))
+    assert sorted(responses) == [f"k{i}" for i in range(6)]
+    assert all(response.total == 2 for response in responses.values())
+    assert active["peak"] == 3
+    assert a.peak <= 2 and b.peak <= 2
+    assert service.batch_scheduler.get_stats()["in_flight"] == 0
+
+
+def test_early_stop_cancels_remaining_keywords(tmp_path):
+    plugin = TrackingPlugin("a", delay=1.0, delays={"fast": 0})
+    service = make_service(tmp_path, plugin)
+    
+    async def run():
+        async with aclosing(service.iter_search_many(["slow1", "fast", "slow2"])) as outcomes:
+            async for keyword, _ in outcomes:
+                break
+        await asyncio.sleep(0.01)
+        return keyword
+    
+    assert asyncio.run(run()) == "fast"
+    assert plugin.cancelled == 2
+    assert service.batch_scheduler.get_stats()["in_flight"] == 0
+
+
+def test_cache_hits_yielded_first(tmp_path):
+    plugin = TrackingPlugin("a", delay=0)
+    service = make_service(tmp_path, plugin)
+    cached = SearchResponse(total=0)
+    service.cache.set(service._cache_key("cached", {}), cached)
+    
+    async def run():
+        return [outcome async for outcome in service.iter_search_many(["fresh", "cached"])]
+    
+    outcomes = asyncio.run(run())
+    assert outcomes[0] == ("cached", cached)
+    assert [keyword for keyword, _ in outcomes] == ["cached", "fresh"]
+    assert plugin.keywords == ["fresh"]
+
+
+def test_bypass_cache_searches_again(tmp_path):
+    plugin = TrackingPlugin("a", delay=0)
+    service = make_service(tmp_path, plugin)
+    service.cache.set(service._cache_key("k", {}), SearchResponse(total=0))
+    responses = asyncio.run(service.search_many(["k"], bypass_cache=True))
+    assert responses["k"].total == 1
+    assert plugin.keywords == ["k"]
+
+
+def test_every_spelling_maps_to_shared_response(tmp_path):
+    plugin = TrackingPlugin("a", delay=0)
+    service = make_service(tmp_path, plugin)
+    responses = asyncio.run(service.search_many(["Fan Hua", " fan  hua ", "FAN HUA", "Fan Hua", "", "other"]))
+    assert sorted(responses) == ["FAN HUA", "Fan Hua", "fan  hua", "other"]
+    assert responses["Fan Hua"] is responses["fan  hua"] is responses["FAN HUA"]
+    assert len(plugin.keywords) == 2
+    # 命中缓存时同样映射每种写法
+    cached = asyncio.run(service.search_many(["fan hua", "Fan Hua"]))
+    assert cached["fan hua"] is cached["Fan Hua"] is responses["Fan Hua"]
+    assert len(plugin.keywords) == 2
+
+
+def test_cache_reads_run_concurrently(tmp_path):
+    service = make_service(tmp_path, TrackingPlugin("a", delay=0))
+    reads = {"active": 0, "peak": 0}
+    
+    async def slow_aget(key):
+        reads["active"] += 1
+        reads["peak"] = max(reads["peak"], reads["active"])
+        await asyncio.sleep(0.02)
+        reads["active"] -= 1
+        return None
+    
+    service.cache.aget = slow_aget
+    asyncio.run(service.search_many(["a", "b", "c"]))
+    assert reads["peak"] == 3
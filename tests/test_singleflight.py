@@ -0,0 +1,209 @@
+"""
+singleflight：相同请求与相同流式搜索的合并
+"""
+import asyncio
+import threading
+
+import pytest
+
+from src.singleflight import SingleFlight, StreamFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "result"
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+    
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_exception_is_shared_with_waiters():
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+    
+    errors = asyncio.run(run())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.get_stats()["executed"] == 1
+
+
+def test_waiter_retries_when_leader_cancelled():
+    flight = SingleFlight()
+    calls = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return len(calls)
+    
+    async def run():
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+    
+    assert asyncio.run(run()) == 2
+    assert "k" not in flight
+
+
+def test_coalesces_across_event_loops():
+    flight = SingleFlight()
+    barrier = threading.Barrier(2)
+    calls = []
+    results = []
+    
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "shared"
+    
+    def worker():
+        barrier.wait()
+        results.append(asyncio.run(flight.do("k", fetch)))
+    
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["shared", "shared"]
+    assert len(calls) == 1
+
+
+async def _collect(agen):
+    items = []
+    async for batch in agen:
+        items.extend(batch)
+    return items
+
+
+def test_stream_subscribers_share_one_producer():
+    flight = StreamFlight()
+    runs = []
+    
+    async def produce():
+        runs.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.005)
+            yield i
+    
+    async def run():
+        return await asyncio.gather(*(_collect(flight.stream("k", produce)) for _ in range(3)))
+    
+    assert asyncio.run(run()) == [[0, 1, 2]] * 3
+    assert len(runs) == 1
+    assert flight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 2}
+
+
+def test_late_joiner_receives_earlier_items():
+    flight = StreamFlight()
+    
+    async def run():
+        gate = asyncio.Event()
+        
+        async def produce():
+            yield "first"
+            await gate.wait()
+            yield "second"
+        
+        early = flight.stream("k", produce)
+        assert await early.__anext__() == ["first"]
+        late = flight.stream("k", produce)
+        assert await late.__anext__() == ["first"]
+        gate.set()
+        assert await _collect(early) == ["second"]
+        assert await _collect(late) == ["second"]
+    
+    asyncio.run(run())
+    assert flight.get_stats()["executed"] == 1
+
+
+def test_producer_cancelled_when_all_subscribers_leave():
+    flight = StreamFlight()
+    state = {}
+    
+    async def run():
+        async def produce():
+            try:
+                yield 1
+                await asyncio.Event().wait()
+            finally:
+                state["closed"] = True
+        
+        first = flight.stream("k", produce)
+        second = flight.stream("k", produce)
+        assert await first.__anext__() == [1]
+        assert await second.__anext__() == [1]
+        await first.aclose()
+        await asyncio.sleep(0.01)
+        assert "closed" not in state
+        await second.aclose()
+        await asyncio.sleep(0.01)
+    
+    asyncio.run(run())
+    assert state.get("closed")
+    assert "k" not in flight
+
+
+def test_stream_error_propagates_to_subscribers():
+    flight = StreamFlight()
+    
+    async def produce():
+        yield 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def run():
+        return await asyncio.gather(*(_collect(flight.stream("k", produce)) for _ in range(2)),
+                                    return_exceptions=True)
+    
+    errors = asyncio.run(run())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert "k" not in flight
+
+
+def test_stream_shared_across_event_loops():
+    flight = StreamFlight()
+    started = threading.Event()
+    results = {}
+    
+    async def produce():
+        yield 1
+        await asyncio.sleep(0.1)
+        yield 2
+    
+    async def subscribe(name):
+        items = []
+        async for batch in flight.stream("k", produce):
+            items.extend(batch)
+            started.set()
+        results[name] = items
+    
+    def late():
+        started.wait(5)
+        asyncio.run(subscribe("late"))
+    
+    thread = threading.Thread(target=late)
+    thread.start()
+    asyncio.run(subscribe("early"))
+    thread.join(5)
+    assert results == {"early": [1, 2], "late": [1, 2]}
+    assert flight.get_stats()["executed"] == 1
@@ -0,0 +1,79 @@
+"""
+url_normalizer：各网盘的规范化规则
+"""
+import pytest
+
+from src.url_normalizer import canonicalize_url, normalize_link_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    # 百度：别名主机、旧式surl链接、提取码参数
+    ("http://yun.baidu.com/s/1AbC?pwd=x1y2", ("https://pan.baidu.com/s/1AbC", "x1y2")),
+    ("https://pan.baidu.com/share/init?surl=AbC", ("https://pan.baidu.com/s/1AbC", "")),
+    # 阿里云盘：旧域名统一为alipan
+    ("https://www.aliyundrive.com/s/AbC123", ("https://www.alipan.com/s/AbC123", "")),
+    ("https://alipan.com/s/AbC123/", ("https://www.alipan.com/s/AbC123", "")),
+    # 夸克、UC：分享码不区分大小写
+    ("https://pan.quark.cn/s/AbC123#/list/share", ("https://pan.quark.cn/s/abc123", "")),
+    ("https://fast.uc.cn/s/AbC123?public=1", ("https://drive.uc.cn/s/abc123", "")),
+    # 迅雷
+    ("https://pan.xunlei.com/s/VNabc-12?pwd=ab12#", ("https://pan.xunlei.com/s/VNabc-12", "ab12")),
+    # 天翼：h5移动版链接、web/share?code=中的分享码需保留
+    ("https://h5.cloud.189.cn/web/share.html#/t/AbCd", ("https://cloud.189.cn/t/AbCd", "")),
+    ("https://cloud.189.cn/t/AbCd（访问码：ab12）", ("https://cloud.189.cn/t/AbCd", "")),
+    ("https://cloud.189.cn/web/share?code=AbCdEf123", ("https://cloud.189.cn/web/share?code=AbCdEf123", "")),
+    ("https://cloud.189.cn/web/share?code=AbCdEf123&pwd=ab12",
+     ("https://cloud.189.cn/web/share?code=AbCdEf123", "ab12")),
+    # 115、123
+    ("https://115cdn.com/s/sw1abc?password=ab12#", ("https://115.com/s/sw1abc", "ab12")),
+    ("https://www.123684.com/s/abc-Def?提取码:ab12", ("https://www.123pan.com/s/abc-Def", "")),
+    # 蓝奏云：子域名各不相同，不合并主机
+    ("https://wwi.lanzoui.com/iAbc123?w=1", ("https://wwi.lanzoui.com/iAbc123", "")),
+])
+def test_path_share_providers(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    # 移动云盘的分享码在查询参数或片段中
+    "https://caiyun.139.com/m/i?0F5CJUOrnRsuX",
+    "https://yun.139.com/shareweb/#/w/i/0a5CJkG4lhJqD",
+    "https://caiyun.139.com/w/i/2nQPGx7vJcAkE",
+    # 未登记的主机
+    "https://example.com/share?id=1#top",
+])
+def test_other_hosts_unchanged(url):
+    assert canonicalize_url(url) == (url, "")
+
+
+def test_distinct_tianyi_shares_stay_distinct():
+    first = canonicalize_url("https://cloud.189.cn/web/share?code=AAAA1111")[0]
+    second = canonicalize_url("https://cloud.189.cn/web/share?code=BBBB2222")[0]
+    assert first != second
+
+
+def test_magnet_unchanged():
+    url = "magnet:?xt=urn:btih:ABCDEF0123456789ABCDEF0123456789ABCDEF01&dn=%E7%B9%81%E8%8A%B1"
+    assert canonicalize_url(url) == (url, "")
+    assert canonicalize_url(url + " 繁花全集") == (url, "")
+
+
+def test_ed2k_keeps_non_ascii_file_name():
+    url = "ed2k://|file|繁花.第01集.4K.国语中字.mkv|1234567|0123456789ABCDEF0123456789ABCDEF|/"
+    assert canonicalize_url(url) == (url, "")
+    assert canonicalize_url(url + "，高清") == (url, "")
+
+
+@pytest.mark.parametrize("suffix", [" 提取码 ab12", "，", "。", ")", "\"", "<br>", "提取码"])
+def test_trailing_junk_stripped(suffix):
+    assert canonicalize_url("https://pan.quark.cn/s/abc123" + suffix)[0] == "https://pan.quark.cn/s/abc123"
+
+
+def test_normalize_link_url_prefers_explicit_password():
+    assert normalize_link_url("https://pan.baidu.com/s/1abc?pwd=url1", "own1") == ("https://pan.baidu.com/s/1abc", "own1")
+    assert normalize_link_url("https://pan.baidu.com/s/1abc?pwd=url1", " ") == ("https://pan.baidu.com/s/1abc", "url1")
+
+
+def test_unparseable_url_returned_as_is():
+    assert canonicalize_url("pan.quark.cn/s/abc") == ("pan.quark.cn/s/abc", "")
+    assert canonicalize_url("https://[::1") == ("https://[::1", "")
@@ -2,15 +2,17 @@
 网盘搜索Web应用
 """
 import streamlit as st
-import asyncio
+import html
+import math
 import sys
 from pathlib import Path
+from typing import List
 
 # 添加src目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.app import PanSearchApp
-from src.models import SearchResponse
+from src.app import PanSearchApp, get_app_sync, get_loop_thread
+from src.models import MergedLink, SearchResponse
 
 
 # 页面配置
@@ -20,181 +22,234 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 不使用任何自定义CSS样式，完全使用默认的Streamlit样式
-
 
 @st.cache_resource
 def get_search_app():
-    """获取搜索应用实例"""
-    app = PanSearchApp()
-    # 同步初始化
-    asyncio.run(app.initialize())
-    return app
+    """获取搜索应用实例，应用运行在后台事件循环线程上，各会话共用"""
+    return get_app_sync()
 
 
-def display_search_results(response: SearchResponse):
-    """显示搜索结果"""
-    if not response.merged_by_type:
-        st.info("未找到任何资源，请尝试其他关键词。")
-        return
-    
-    # 过滤掉 "others" 分类，只显示实际存在的分类
-    filtered_types = {k: v for k, v in response.merged_by_type.items() if k != "others"}
-    
-    if not filtered_types:
-        st.info("未找到任何资源，请尝试其他关键词。")
-        return
-    
-    # 按类型显示结果
-    type_names = list(filtered_types.keys())
-    tabs = st.tabs([f"{t} ({len(filtered_types[t])})" for t in type_names])
-    
-    # 添加CSS样式
-    st.markdown("""
-    <style>
+RESULT_CSS = """
+<style>
+.result-card {
+    border: 1px solid #e0e0e0;
+    border-radius: 8px;
+    padding: 1rem;
+    margin-bottom: 1rem;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    background-color: #fff;
+    transition: box-shadow 0.3s ease;
+}
+
+@media (prefers-color-scheme: dark) {
     .result-card {
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 1rem;
-        margin-bottom: 1rem;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        background-color: #fff;
-        transition: box-shadow 0.3s ease;
+        border: 1px solid #444;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.3);
+        background-color: #2d2d2d;
     }
-    
-    @media (prefers-color-scheme: dark) {
-        .result-card {
-            border: 1px solid #444;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.3);
-            background-color: #2d2d2d;
-        }
-    }
-    
+}
+
+.result-card:hover {
+    box-shadow: 0 4px 8px rgba(0,0,0,0.15);
+}
+
+@media (prefers-color-scheme: dark) {
     .result-card:hover {
-        box-shadow: 0 4px 8px rgba(0,0,0,0.15);
+        box-shadow: 0 4px 8px rgba(0,0,0,0.5);
     }
-    
-    @media (prefers-color-scheme: dark) {
-        .result-card:hover {
-            box-shadow: 0 4px 8px rgba(0,0,0,0.5);
-        }
-    }
-    
+}
+
+.result-title {
+    margin: 0 0 1rem 0;
+    color: #333;
+    font-size: 1.2rem;
+    font-weight: bold;
+}
+
+@media (prefers-color-scheme: dark) {
     .result-title {
-        margin: 0 0 1rem 0;
-        color: #333;
-        font-size: 1.2rem;
-        font-weight: bold;
+        color: #ddd;
     }
-    
-    @media (prefers-color-scheme: dark) {
-        .result-title {
-            color: #ddd;
-        }
-    }
-    
+}
+
+.result-meta {
+    margin: 0.5rem 0;
+    font-size: 0.9rem;
+    color: #333;
+}
+
+@media (prefers-color-scheme: dark) {
     .result-meta {
-        margin: 0.5rem 0;
-        font-size: 0.9rem;
-        color: #333;
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .result-meta {
-            color: #ddd;
-        }
+        color: #ddd;
     }
-    
+}
+
+.source-tag {
+    background-color: #f0f0f0;
+    padding: 0.2rem 0.5rem;
+    border-radius: 4px;
+    font-size: 0.8rem;
+    color: #666;
+}
+
+@media (prefers-color-scheme: dark) {
     .source-tag {
-        background-color: #f0f0f0;
-        padding: 0.2rem 0.5rem;
-        border-radius: 4px;
-        font-size: 0.8rem;
-        color: #666;
-    }
-    
-    @media (prefers-color-scheme: dark) {
-        .source-tag {
-            background-color: #444;
-            color: #ccc;
-        }
+        background-color: #444;
+        color: #ccc;
     }
-    
+}
+
+.result-link {
+    word-break: break-all;
+    color: #1976d2;
+    text-decoration: none;
+}
+
+@media (prefers-color-scheme: dark) {
     .result-link {
-        word-break: break-all;
-        color: #1976d2;
-        text-decoration: none;
+        color: #64b5f6;
     }
-    
-    @media (prefers-color-scheme: dark) {
-        .result-link {
-            color: #64b5f6;
-        }
+}
+
+.result-link:hover {
+    text-decoration: underline;
+}
+
+.password {
+    font-family: monospace;
+    background-color: #f5f5f5;
+    padding: 0.1rem 0.3rem;
+    border-radius: 3px;
+    font-weight: bold;
+    color: #333;
+}
+
+@media (prefers-color-scheme: dark) {
+    .password {
+        background-color: #444;
+        color: #fff;
     }
-    
-    .result-link:hover {
-        text-decoration: underline;
+}
+
+strong {
+    color: #333;
+}
+
+@media (prefers-color-scheme: dark) {
+    strong {
+        color: #ddd;
     }
+}
+</style>
+"""
+
+DEFAULT_PAGE_SIZE = 20
+
+CARD_TEMPLATE = """<div class="result-card">
+<div class="result-title">{note}</div>
+<div class="result-meta"><span class="source-tag">来源: {source}</span></div>
+<div class="result-meta"><strong>链接:</strong> <a href="{url}" target="_blank" class="result-link">{url}</a></div>
+<div class="result-meta"><strong>提取码:</strong> <span class="password">{password}</span></div>
+</div>"""
+
+
+def inject_styles():
+    """注入结果卡片样式，每次运行脚本只注入一次，不随结果快照与分类重复注入"""
+    st.markdown(RESULT_CSS, unsafe_allow_html=True)
+
+
+def render_cards(links: List[MergedLink]) -> str:
+    """将一页链接拼接为单个HTML块"""
+    return "".join(
+        CARD_TEMPLATE.format(
+            note=html.escape(link.note),
+            source=html.escape(link.source or "未知"),
+            url=html.escape(link.url),
+            password=html.escape(link.password or "无"),
+        )
+        for link in links
+    )
+
+
+def display_search_results(response: SearchResponse, page_size: int = DEFAULT_PAGE_SIZE,
+                           interactive: bool = True):
+    """
+    显示搜索结果，每个分类只渲染当前页
     
-    .password {
-        font-family: monospace;
-        background-color: #f5f5f5;
-        padding: 0.1rem 0.3rem;
-        border-radius: 3px;
-        font-weight: bold;
-        color: #333;
-    }
+    interactive为False时不创建翻页控件，只显示第一页，用于渐进式搜索中反复重绘的快照。
+    """
+    if not response.merged_by_type:
+        st.info("未找到任何资源，请尝试其他关键词。")
+        return
     
-    @media (prefers-color-scheme: dark) {
-        .password {
-            background-color: #444;
-            color: #fff;
-        }
-    }
+    # 过滤掉 "others" 分类，只显示实际存在的分类
+    filtered_types = {k: v for k, v in response.merged_by_type.items() if k != "others"}
     
-    strong {
-        color: #333;
-    }
+    if not filtered_types:
+        st.info("未找到任何资源，请尝试其他关键词。")
+        return
     
-    @media (prefers-color-scheme: dark) {
-        strong {
-            color: #ddd;
-        }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # 按类型显示结果
+    type_names = list(filtered_types.keys())
+    tabs = st.tabs([f"{t} ({len(filtered_types[t])})" for t in type_names])
     
     for idx, resource_type in enumerate(type_names):
         with tabs[idx]:
             links = filtered_types[resource_type]
-            
-            for i, link in enumerate(links):
-                with st.container():
-                    st.markdown(f"""
-                    <div class="result-card">
-                        <div class="result-title">{link.note}</div>
-                        <div class="result-meta">
-                            <span class="source-tag">来源: {link.source if link.source else '未知'}</span>
-                        </div>
-                        <div class="result-meta">
-                            <strong>链接:</strong> 
-                            <a href="{link.url}" target="_blank" class="result-link">{link.url}</a>
-                        </div>
-                        <div class="result-meta">
-                            <strong>提取码:</strong> 
-                            <span class="password">{link.password if link.password else '无'}</span>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            pages = max(1, math.ceil(len(links) / page_size))
+            page = 1
+            if interactive and pages > 1:
+                page = st.number_input(
+                    f"页码（共 {pages} 页）", min_value=1, max_value=pages, value=1,
+                    key=f"page_{resource_type}"
+                )
+            start = (page - 1) * page_size
+            st.markdown(render_cards(links[start:start + page_size]), unsafe_allow_html=True)
+
+
+def reset_pages():
+    """新的搜索从第一页开始显示"""
+    for key in [k for k in st.session_state if str(k).startswith("page_")]:
+        del st.session_state[key]
+
+
+def search_progressively(app: PanSearchApp, keyword: str,
+                         page_size: int = DEFAULT_PAGE_SIZE) -> SearchResponse:
+    """渐进式搜索，每个插件返回后重绘结果区域，完成后由调用方显示可翻页的最终结果"""
+    status = st.empty()
+    placeholder = st.empty()
+    response = None
+    status.info("正在搜索中，请稍候...")
+    # 搜索在后台事件循环上进行，这里只在脚本线程中逐个取出快照并重绘
+    for response in get_loop_thread().iterate(app.search_stream(keyword)):
+        if response.pending:
+            status.info(f"已显示部分结果，仍在等待: {', '.join(response.pending)}")
+        if response.total > 0:
+            with placeholder.container():
+                display_search_results(response, page_size, interactive=False)
+    placeholder.empty()
+    
+    if response and response.total > 0:
+        status.success("搜索完成！")
+    else:
+        status.empty()
+    if response and response.timed_out:
+        st.warning(f"以下来源超时，结果可能不完整: {', '.join(response.timed_out)}")
+    if response and response.failed:
+        st.warning(f"以下来源暂时不可用，结果可能不完整: {', '.join(response.failed)}")
+    return response
 
 
 def main():
     """主函数"""
     # 使用默认的Streamlit标题
     st.title("聚合网盘资源搜索")
+    inject_styles()
     
     # 获取应用实例
     app = get_search_app()
+    ui_config = app.get_config().get("ui", {})
+    page_size = max(1, ui_config.get("page_size", DEFAULT_PAGE_SIZE))
     
     # 主界面
     # 使用默认的Streamlit布局
@@ -210,13 +265,25 @@ def main():
     
     # 执行搜索
     if search_btn and keyword.strip():
+        reset_pages()
+        st.session_state.pop("search_response", None)
         try:
-            with st.spinner("正在搜索中，请稍候..."):
-                result = asyncio.run(app.search(keyword.strip()))
+            progressive = ui_config.get("progressive", True)
+            if progressive:
+                result = search_progressively(app, keyword.strip(), page_size)
+            else:
+                with st.spinner("正在搜索中，请稍候..."):
+                    result = get_loop_thread().run(app.search(keyword.strip()))
+                
+                if result and result.total > 0:
+                    st.success(f"搜索完成！")
+                    if result.timed_out:
+                        st.warning(f"以下来源超时，结果可能不完整: {', '.join(result.timed_out)}")
+                    if result.failed:
+                        st.warning(f"以下来源暂时不可用，结果可能不完整: {', '.join(result.failed)}")
             
             if result and result.total > 0:
-                st.success(f"搜索完成！")
-                display_search_results(result)
+                st.session_state["search_response"] = result
             else:
                 st.info("未找到任何资源，请尝试其他关键词。")
                 
@@ -227,6 +294,11 @@ def main():
     elif search_btn and not keyword.strip():
         st.warning("请输入搜索关键词")
     
+    # 翻页会重新运行脚本，此时沿用上次的搜索结果
+    response = st.session_state.get("search_response")
+    if response is not None:
+        display_search_results(response, page_size)
+    
 
 if __name__ == "__main__":
     main()
\ No newline at end of file